@@ -1,13 +1,13 @@
 from .models import models
 from django.contrib import admin
 from .models import Notification
-from django.db.models import Count, Avg
+from django.db.models import Count, Avg, Prefetch
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
 from .models import (
     Conversation, ChatFeedback, UnansweredQuestion, 
-    FAQ, UserLanguagePreference, ChatAnalytics
+    FAQ, UserLanguagePreference, ChatAnalytics, ChatSession
 )
 from .models import (
     MentalHealthResource, MentalHealthTrigger, 
@@ -16,6 +16,13 @@ from .models import (
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
+from django.urls import path
+from django.shortcuts import redirect
+from django.conf import settings
+from .analytics import (
+    get_conversation_summary, get_crisis_summary,
+    SESSION_FIELDS
+)
 
 
 @admin.register(Conversation)
@@ -28,41 +35,61 @@ class ConversationAdmin(admin.ModelAdmin):
     search_fields = ['user_message', 'bot_response', 'user__username']
     readonly_fields = ['timestamp']
     date_hierarchy = 'timestamp'
+    list_select_related = ['user']
+    
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        return qs.annotate(feedback_count=Count('feedback'))
     
     def short_message(self, obj):
         return obj.user_message[:50] + '...' if len(obj.user_message) > 50 else obj.user_message
     short_message.short_description = 'User Message'
     
     def has_feedback(self, obj):
-        count = obj.feedback.count()
+        count = obj.feedback_count
         if count > 0:
             return format_html('<span style="color: green;">✓ {}</span>', count)
         return format_html('<span style="color: gray;">—</span>')
     has_feedback.short_description = 'Feedback'
+    has_feedback.admin_order_field = 'feedback_count'
+    
+    def get_urls(self):
+        custom_urls = [
+            path(
+                'refresh-summary/',
+                self.admin_site.admin_view(self.refresh_summary_view),
+                name='chat_conversation_refresh_summary',
+            ),
+        ]
+        return custom_urls + super().get_urls()
+    
+    def refresh_summary_view(self, request):
+        """Rebuild the cached summary statistics and return to the changelist"""
+        get_conversation_summary(refresh=True)
+        self.message_user(request, "Summary statistics refreshed")
+        return redirect('admin:chat_conversation_changelist')
     
     def changelist_view(self, request, extra_context=None):
         response = super().changelist_view(request, extra_context)
         
-        # Add summary statistics
-        total_conversations = Conversation.objects.count()
-        fallback_conversations = Conversation.objects.filter(is_fallback=True).count()
-        avg_confidence = Conversation.objects.filter(
-            confidence_score__isnull=False
-        ).aggregate(avg=Avg('confidence_score'))['avg']
-        
-        positive_feedback = ChatFeedback.objects.filter(
-            models.Q(is_helpful=True) | models.Q(star_rating__gte=4)
-        ).count()
-        
-        response.context_data['summary'] = {
-            'total_conversations': total_conversations,
-            'fallback_rate': f"{(fallback_conversations/total_conversations*100):.1f}%" if total_conversations > 0 else "0%",
-            'avg_confidence': f"{avg_confidence:.2f}" if avg_confidence else "N/A",
-            'positive_feedback': positive_feedback
-        }
+        # Add summary statistics (cached snapshot, see ADMIN_SUMMARY_CACHE_TTL)
+        if hasattr(response, 'context_data'):
+            response.context_data['summary'] = get_conversation_summary()
         
         return response
 
+@admin.register(ChatSession)
+class ChatSessionAdmin(admin.ModelAdmin):
+    list_display = [
+        'session_id', 'user', 'turn_count', 'languages_used', 'fallback_count',
+        'last_is_fallback', 'mental_health_flagged', 'last_intent', 'last_message_at'
+    ]
+    list_filter = ['last_is_fallback', 'mental_health_flagged', 'languages_used', 'last_message_at']
+    search_fields = ['session_id', 'user__username', 'last_intent']
+    list_select_related = ['user']
+    date_hierarchy = 'last_message_at'
+    readonly_fields = SESSION_FIELDS + ['session_id']
+
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
     list_display = ('title', 'message', 'scheduled_time', 'is_sent', 'is_read')
@@ -141,6 +168,8 @@ class FAQAdmin(admin.ModelAdmin):
     list_filter = ['language', 'category', 'is_active', 'created_at']
     search_fields = ['question', 'answer', 'keywords', 'category']
     readonly_fields = ['usage_count', 'created_at', 'updated_at']
+    raw_id_fields = ['translated_from']
+    list_select_related = ['created_by']
     
     def short_question(self, obj):
         return obj.question[:50] + '...' if len(obj.question) > 50 else obj.question
@@ -156,6 +185,7 @@ class UserLanguagePreferenceAdmin(admin.ModelAdmin):
     list_display = ['user', 'preferred_language', 'auto_detect']
     list_filter = ['preferred_language', 'auto_detect']
     search_fields = ['user__username', 'user__email']
+    list_select_related = ['user']
 
 @admin.register(ChatAnalytics)
 class ChatAnalyticsAdmin(admin.ModelAdmin):
@@ -201,7 +231,7 @@ class MentalHealthResourceAdmin(admin.ModelAdmin):
     
     fieldsets = (
         ('Basic Information', {
-            'fields': ('title', 'description', 'resource_type', 'urgency_level')
+            'fields': ('title', 'description', 'description_sn', 'resource_type', 'urgency_level')
         }),
         ('Contact Information', {
             'fields': ('phone_number', 'email', 'website_url', 'address')
@@ -224,6 +254,12 @@ class MentalHealthResourceAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         qs = super().get_queryset(request)
         return qs.select_related()
+    
+    def save_model(self, request, obj, form, change):
+        # A Shona description typed in by hand is current for this English text
+        if 'description_sn' in form.changed_data and obj.description_sn:
+            obj.description_sn_source = obj.description_hash()
+        super().save_model(request, obj, form, change)
 
 @admin.register(MentalHealthTrigger)
 class MentalHealthTriggerAdmin(admin.ModelAdmin):
@@ -235,10 +271,14 @@ class MentalHealthTriggerAdmin(admin.ModelAdmin):
     search_fields = ['trigger_phrase', 'custom_response']
     filter_horizontal = ['suggested_resources']
     
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        return qs.annotate(suggested_resource_count=Count('suggested_resources'))
+    
     def resource_count(self, obj):
-        count = obj.suggested_resources.count()
-        return format_html('<span class="badge">{}</span>', count)
+        return format_html('<span class="badge">{}</span>', obj.suggested_resource_count)
     resource_count.short_description = 'Resources'
+    resource_count.admin_order_field = 'suggested_resource_count'
 
 @admin.register(MentalHealthInteraction)
 class MentalHealthInteractionAdmin(admin.ModelAdmin):
@@ -253,9 +293,17 @@ class MentalHealthInteractionAdmin(admin.ModelAdmin):
     search_fields = ['session_id', 'user__username', 'follow_up_notes']
     readonly_fields = ['timestamp', 'ip_address']
     filter_horizontal = ['resources_provided']
+    list_select_related = ['user']
     
     actions = ['mark_follow_up_completed']
     
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        # Newest alert first so crisis_alert_status can read it without a query
+        return qs.prefetch_related(
+            Prefetch('crisisalert_set', queryset=CrisisAlert.objects.order_by('-created_at'))
+        )
+    
     def follow_up_status(self, obj):
         if not obj.requires_follow_up:
             return format_html('<span style="color: gray;">Not Required</span>')
@@ -266,8 +314,9 @@ class MentalHealthInteractionAdmin(admin.ModelAdmin):
     follow_up_status.short_description = 'Follow-up'
     
     def crisis_alert_status(self, obj):
-        if hasattr(obj, 'crisisalert'):
-            alert = obj.crisisalert
+        alerts = obj.crisisalert_set.all()
+        if alerts:
+            alert = alerts[0]
             color_map = {
                 'new': 'red',
                 'acknowledged': 'orange', 
@@ -292,11 +341,12 @@ class MentalHealthInteractionAdmin(admin.ModelAdmin):
 class CrisisAlertAdmin(admin.ModelAdmin):
     list_display = [
         'created_at', 'status', 'session_display', 'concern_level',
-        'acknowledged_by', 'response_time'
+        'acknowledged_by', 'delivery_time', 'response_time'
     ]
     list_filter = ['status', 'created_at', 'mental_health_interaction__concern_level']
     search_fields = ['alert_message', 'response_notes', 'mental_health_interaction__session_id']
-    readonly_fields = ['created_at', 'mental_health_interaction']
+    readonly_fields = ['created_at', 'mental_health_interaction', 'delivered_at', 'delivery_attempts']
+    list_select_related = ['mental_health_interaction', 'acknowledged_by']
     
     actions = ['mark_acknowledged', 'mark_contacted', 'mark_resolved']
     
@@ -310,6 +360,7 @@ class CrisisAlertAdmin(admin.ModelAdmin):
         color = color_map.get(level, 'gray')
         return format_html('<span style="color: {}; font-weight: bold;">{}</span>', color, level.upper())
     concern_level.short_description = 'Concern Level'
+    concern_level.admin_order_field = 'mental_health_interaction__concern_level'
     
     def response_time(self, obj):
         if obj.acknowledged_at:
@@ -321,6 +372,14 @@ class CrisisAlertAdmin(admin.ModelAdmin):
         return format_html('<span style="color: red;">Not acknowledged</span>')
     response_time.short_description = 'Response Time'
     
+    def delivery_time(self, obj):
+        delta = obj.time_to_delivery
+        if delta is None:
+            return format_html('<span style="color: red;">Not delivered</span>')
+        color = 'green' if delta.total_seconds() <= settings.CRISIS_DELIVERY_SLO_SECONDS else 'orange'
+        return format_html('<span style="color: {};">{} s</span>', color, f"{delta.total_seconds():.1f}")
+    delivery_time.short_description = 'Delivery Time'
+    
     def mark_acknowledged(self, request, queryset):
         from django.utils import timezone
         count = queryset.filter(status='new').update(
@@ -345,14 +404,9 @@ class CrisisAlertAdmin(admin.ModelAdmin):
     def changelist_view(self, request, extra_context=None):
         response = super().changelist_view(request, extra_context)
         
-        # Add crisis alert summary
-        new_alerts = CrisisAlert.objects.filter(status='new').count()
-        pending_alerts = CrisisAlert.objects.filter(status__in=['new', 'acknowledged']).count()
-        
-        response.context_data['crisis_summary'] = {
-            'new_alerts': new_alerts,
-            'pending_alerts': pending_alerts
-        }
+        # Add crisis alert summary (always live, never cached)
+        if hasattr(response, 'context_data'):
+            response.context_data['crisis_summary'] = get_crisis_summary()
         
         return response
 
@@ -362,7 +416,7 @@ class MentalHealthAdminSection:
     
     @staticmethod
     def get_crisis_alerts_count():
-        return CrisisAlert.objects.filter(status='new').count()
+        return get_crisis_summary()['new_alerts']
     
     @staticmethod
     def get_pending_followups_count():
@@ -0,0 +1,309 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg, Count, Max, Min, OuterRef, Q, Subquery
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import (
+    Conversation, ChatFeedback, CrisisAlert, ChatAnalytics, AnalyticsRollupState,
+    AnalyticsDirtyDay, ChatSession
+)
+
+CONVERSATION_SUMMARY_KEY = 'chat:admin:conversation_summary'
+
+
+def _summary_ttl():
+    return getattr(settings, 'ADMIN_SUMMARY_CACHE_TTL', 60)
+
+
+def _cached_snapshot(key, builder, refresh=False):
+    """
+    Return a cached summary snapshot, rebuilding it when missing, expired
+    or when an explicit refresh is requested
+    """
+    if not refresh:
+        snapshot = cache.get(key)
+        if snapshot is not None:
+            return snapshot
+
+    snapshot = builder()
+    cache.set(key, snapshot, _summary_ttl())
+    return snapshot
+
+
+def _build_conversation_summary():
+    """Compute conversation statistics with one aggregate query per table"""
+    stats = Conversation.objects.aggregate(
+        total=Count('id'),
+        fallbacks=Count('id', filter=Q(is_fallback=True)),
+        avg_confidence=Avg('confidence_score'),
+    )
+    positive_feedback = ChatFeedback.objects.filter(
+        Q(is_helpful=True) | Q(star_rating__gte=4)
+    ).count()
+
+    total = stats['total']
+    avg_confidence = stats['avg_confidence']
+    return {
+        'total_conversations': total,
+        'fallback_rate': f"{(stats['fallbacks']/total*100):.1f}%" if total > 0 else "0%",
+        'avg_confidence': f"{avg_confidence:.2f}" if avg_confidence else "N/A",
+        'positive_feedback': positive_feedback,
+        'generated_at': timezone.now().isoformat(),
+    }
+
+
+def get_crisis_summary():
+    """
+    Summary statistics shown on the CrisisAlert changelist. Always computed
+    live: the counts come from one cheap grouped query, and a cached copy in
+    one worker's memory could hide a new alert from staff on another
+    """
+    stats = CrisisAlert.objects.aggregate(
+        new_alerts=Count('id', filter=Q(status='new')),
+        pending_alerts=Count('id', filter=Q(status__in=['new', 'acknowledged'])),
+    )
+    stats['generated_at'] = timezone.now().isoformat()
+    return stats
+
+
+def get_conversation_summary(refresh=False):
+    """Summary statistics shown on the Conversation changelist"""
+    return _cached_snapshot(CONVERSATION_SUMMARY_KEY, _build_conversation_summary, refresh)
+
+
+# ---------------------------------------------------------------------------
+# ChatAnalytics daily rollups
+# ---------------------------------------------------------------------------
+
+ROLLUP_STATE_NAME = 'chat_analytics'
+TOP_INTENTS_LIMIT = 5
+
+# Same definitions the admin summary and feedback view use
+POSITIVE_FEEDBACK = Q(is_helpful=True) | Q(star_rating__gte=4)
+NEGATIVE_FEEDBACK = Q(is_helpful=False) | Q(star_rating__lte=2)
+
+ROLLUP_FIELDS = [
+    'total_conversations', 'successful_responses', 'fallback_responses',
+    'positive_feedback', 'negative_feedback', 'english_conversations',
+    'shona_conversations', 'top_intents',
+]
+
+
+def _rollup_rows(conversations, feedback):
+    """
+    Aggregate the given querysets into one ChatAnalytics row per day.
+    Feedback is attributed to the day of the conversation it rates.
+    """
+    days = {}
+
+    def day_row(day):
+        if day not in days:
+            days[day] = ChatAnalytics(date=day, top_intents={})
+        return days[day]
+
+    conversation_stats = (
+        conversations.annotate(day=TruncDate('timestamp'))
+        .order_by().values('day')
+        .annotate(
+            total=Count('id'),
+            fallbacks=Count('id', filter=Q(is_fallback=True)),
+            english=Count('id', filter=Q(detected_language='en')),
+            shona=Count('id', filter=Q(detected_language='sn')),
+        )
+    )
+    for stats in conversation_stats:
+        row = day_row(stats['day'])
+        row.total_conversations = stats['total']
+        row.fallback_responses = stats['fallbacks']
+        row.successful_responses = stats['total'] - stats['fallbacks']
+        row.english_conversations = stats['english']
+        row.shona_conversations = stats['shona']
+
+    intent_stats = (
+        conversations.exclude(intent__isnull=True).exclude(intent='')
+        .annotate(day=TruncDate('timestamp'))
+        .order_by().values('day', 'intent')
+        .annotate(count=Count('id'))
+        .order_by('day', '-count', 'intent')
+    )
+    for stats in intent_stats:
+        top_intents = day_row(stats['day']).top_intents
+        if len(top_intents) < TOP_INTENTS_LIMIT:
+            top_intents[stats['intent']] = stats['count']
+
+    feedback_stats = (
+        feedback.annotate(day=TruncDate('conversation__timestamp'))
+        .order_by().values('day')
+        .annotate(
+            positive=Count('id', filter=POSITIVE_FEEDBACK),
+            negative=Count('id', filter=NEGATIVE_FEEDBACK),
+        )
+    )
+    for stats in feedback_stats:
+        row = day_row(stats['day'])
+        row.positive_feedback = stats['positive']
+        row.negative_feedback = stats['negative']
+
+    return days
+
+
+def _save_rollups(days):
+    """Upsert the computed rows in one statement keyed on the date"""
+    if not days:
+        return 0
+    ChatAnalytics.objects.bulk_create(
+        list(days.values()),
+        update_conflicts=True,
+        unique_fields=['date'],
+        update_fields=ROLLUP_FIELDS,
+    )
+    return len(days)
+
+
+def rollup_days(days):
+    """Recompute the rollups for an explicit set of dates"""
+    days = set(days)
+    if not days:
+        return 0
+    rows = _rollup_rows(
+        Conversation.objects.filter(timestamp__date__in=days),
+        ChatFeedback.objects.filter(conversation__timestamp__date__in=days),
+    )
+    for day in days:
+        rows.setdefault(day, ChatAnalytics(date=day, top_intents={}))
+    return _save_rollups(rows)
+
+
+def backfill_analytics(start_date, end_date):
+    """
+    Recompute every rollup between start_date and end_date (inclusive).
+    Days in the range that no longer have any data are reset to zero.
+    """
+    rows = _rollup_rows(
+        Conversation.objects.filter(timestamp__date__range=(start_date, end_date)),
+        ChatFeedback.objects.filter(conversation__timestamp__date__range=(start_date, end_date)),
+    )
+    stale_days = ChatAnalytics.objects.filter(
+        date__range=(start_date, end_date)
+    ).values_list('date', flat=True)
+    for day in stale_days:
+        rows.setdefault(day, ChatAnalytics(date=day, top_intents={}))
+    return _save_rollups(rows)
+
+
+def mark_feedback_day_dirty(feedback):
+    """Queue the day of the rated conversation for the next rollup_analytics run"""
+    # Read the timestamp from the database; the cached conversation may be stale
+    timestamp = Conversation.objects.filter(
+        id=feedback.conversation_id
+    ).values_list('timestamp', flat=True).first()
+    if timestamp is not None:
+        AnalyticsDirtyDay.objects.create(date=timezone.localdate(timestamp))
+
+
+def rollup_analytics():
+    """
+    Fold new conversations and any new or changed feedback into ChatAnalytics.
+    Only the days they touch are recomputed. Conversations are found by id;
+    feedback, which is edited in place, by the days its saves marked dirty
+    """
+    with transaction.atomic():
+        state, _ = AnalyticsRollupState.objects.select_for_update().get_or_create(
+            name=ROLLUP_STATE_NAME
+        )
+        last_conversation = Conversation.objects.aggregate(last=Max('id'))['last'] or 0
+
+        new_conversations = Conversation.objects.filter(
+            id__gt=state.last_conversation_id, id__lte=last_conversation
+        )
+        dirty_days = set(
+            new_conversations.annotate(day=TruncDate('timestamp'))
+            .order_by().values_list('day', flat=True).distinct()
+        )
+        # Delete only the marks read here; ones committed meanwhile wait for the next run
+        marks = list(AnalyticsDirtyDay.objects.values_list('id', 'date'))
+        dirty_days.update(date for _, date in marks)
+
+        updated = rollup_days(dirty_days)
+
+        AnalyticsDirtyDay.objects.filter(id__in=[mark_id for mark_id, _ in marks]).delete()
+        state.last_conversation_id = last_conversation
+        state.last_run_at = timezone.now()
+        state.save()
+
+    return updated
+
+
+# ---------------------------------------------------------------------------
+# ChatSession summaries
+# ---------------------------------------------------------------------------
+
+SESSION_FIELDS = [
+    'user', 'first_message_at', 'last_message_at', 'turn_count', 'languages_used',
+    'fallback_count', 'last_is_fallback', 'mental_health_flagged', 'last_intent',
+]
+
+
+def rebuild_chat_sessions(batch_size=1000):
+    """
+    Rebuild every ChatSession row from the Conversation table in one grouped
+    query. New conversations keep the rows current on their own; this is
+    only needed for history written before the table existed.
+    """
+    latest = Conversation.objects.filter(
+        session_id=OuterRef('session_id')
+    ).order_by('-timestamp', '-id')
+
+    sessions = (
+        Conversation.objects.exclude(session_id__isnull=True).exclude(session_id='')
+        .order_by().values('session_id')
+        .annotate(
+            first=Min('timestamp'),
+            last=Max('timestamp'),
+            turns=Count('id'),
+            fallbacks=Count('id', filter=Q(is_fallback=True)),
+            english=Count('id', filter=Q(detected_language='en')),
+            shona=Count('id', filter=Q(detected_language='sn')),
+            mental_health=Count('id', filter=Q(intent='mental_health_support')),
+            any_user=Max('user_id'),
+            final_intent=Subquery(latest.values('intent')[:1]),
+            final_fallback=Subquery(latest.values('is_fallback')[:1]),
+        )
+    )
+
+    batch = []
+    rebuilt = 0
+    for stats in sessions.iterator(chunk_size=batch_size):
+        languages = [
+            code for code, count in (('en', stats['english']), ('sn', stats['shona'])) if count
+        ]
+        batch.append(ChatSession(
+            session_id=stats['session_id'],
+            user_id=stats['any_user'],
+            first_message_at=stats['first'],
+            last_message_at=stats['last'],
+            turn_count=stats['turns'],
+            languages_used=','.join(languages),
+            fallback_count=stats['fallbacks'],
+            last_is_fallback=bool(stats['final_fallback']),
+            mental_health_flagged=stats['mental_health'] > 0,
+            last_intent=stats['final_intent'],
+        ))
+        if len(batch) >= batch_size:
+            rebuilt += _save_sessions(batch)
+            batch = []
+    rebuilt += _save_sessions(batch)
+    return rebuilt
+
+
+def _save_sessions(batch):
+    if not batch:
+        return 0
+    ChatSession.objects.bulk_create(
+        batch,
+        update_conflicts=True,
+        unique_fields=['session_id'],
+        update_fields=SESSION_FIELDS,
+    )
+    return len(batch)
@@ -0,0 +1,305 @@
+import heapq
+import itertools
+import json
+import logging
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db import close_old_connections
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import CrisisAlert
+
+logger = logging.getLogger(__name__)
+
+# Lower number = dispatched first
+CONCERN_PRIORITY = {
+    'crisis': 0,
+    'high': 1,
+    'moderate': 2,
+    'low': 3,
+}
+
+
+class CrisisNotifier(ABC):
+    """Base class for out-of-band crisis alert channels"""
+    name = 'notifier'
+
+    @abstractmethod
+    def notify(self, alert: CrisisAlert, event: Dict):
+        """Send one alert; return False if the channel did not take it"""
+
+
+class EmailCrisisNotifier(CrisisNotifier):
+    """Email the on-call staff listed in CRISIS_ALERT_RECIPIENTS"""
+    name = 'email'
+
+    def notify(self, alert: CrisisAlert, event: Dict):
+        recipients = getattr(settings, 'CRISIS_ALERT_RECIPIENTS', [])
+        if not recipients:
+            return False
+
+        send_mail(
+            subject=f"[CRISIS ALERT] Session {event['session_id']}",
+            message=(
+                f"{alert.alert_message}\n\n"
+                f"Concern level: {event['concern_level']}\n"
+                f"Raised at: {event['created_at']}\n"
+            ),
+            from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', None),
+            recipient_list=recipients,
+        )
+        return True
+
+
+class CrisisDispatcher:
+    """
+    In-process priority queue that pushes new crisis alerts to connected
+    staff dashboards (server-sent events) and to the configured notifiers.
+    A single daemon worker thread drains the queue. Failed deliveries are
+    retried after an increasing delay (CRISIS_DISPATCH_RETRY_SECONDS, doubled
+    per attempt) so a channel that is down gets time to recover.
+    """
+
+    def __init__(self):
+        self._queue = queue.PriorityQueue()
+        self._retries = []  # heap of (not_before, sequence, item)
+        self._sequence = itertools.count()
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._notifiers = None
+
+    # -- staff dashboard subscriptions -------------------------------------
+
+    def subscribe(self) -> queue.Queue:
+        """Register an SSE connection; events for it arrive on the returned queue"""
+        subscriber = queue.Queue(maxsize=100)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    # -- queueing ---------------------------------------------------------
+
+    def enqueue(self, alert_id: int, concern_level: str = 'crisis', attempt: int = 1):
+        priority = CONCERN_PRIORITY.get(concern_level, len(CONCERN_PRIORITY))
+        self._queue.put((priority, next(self._sequence), alert_id, attempt))
+
+        if getattr(settings, 'CRISIS_DISPATCH_ASYNC', True):
+            self._ensure_worker()
+        else:
+            self.drain()
+
+    def drain(self):
+        """
+        Deliver everything queued on the calling thread, including retries,
+        sleeping until each retry is due
+        """
+        while True:
+            self._release_due_retries()
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                wait = self._next_retry_in()
+                if wait is None:
+                    return
+                time.sleep(wait)
+                continue
+            self._process(item)
+
+    def _schedule_retry(self, item, delay):
+        with self._lock:
+            heapq.heappush(self._retries, (time.monotonic() + delay, next(self._sequence), item))
+
+    def _release_due_retries(self):
+        """Move retries whose delay has passed onto the priority queue"""
+        now = time.monotonic()
+        with self._lock:
+            while self._retries and self._retries[0][0] <= now:
+                self._queue.put(heapq.heappop(self._retries)[2])
+
+    def _next_retry_in(self) -> Optional[float]:
+        with self._lock:
+            if not self._retries:
+                return None
+            return max(0.0, self._retries[0][0] - time.monotonic())
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name='crisis-dispatch', daemon=True
+                )
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            self._release_due_retries()
+            try:
+                # Wake up when the next retry is due, if there is one
+                item = self._queue.get(timeout=self._next_retry_in())
+            except queue.Empty:
+                continue
+            close_old_connections()
+            try:
+                self._process(item)
+            finally:
+                close_old_connections()
+
+    # -- delivery ---------------------------------------------------------
+
+    def get_notifiers(self) -> List[CrisisNotifier]:
+        if self._notifiers is None:
+            paths = getattr(settings, 'CRISIS_ALERT_NOTIFIERS', [])
+            self._notifiers = [import_string(path)() for path in paths]
+        return self._notifiers
+
+    def reset_notifiers(self):
+        self._notifiers = None
+
+    def _process(self, item):
+        priority, _, alert_id, attempt = item
+        try:
+            alert = CrisisAlert.objects.select_related('mental_health_interaction').get(id=alert_id)
+        except CrisisAlert.DoesNotExist:
+            return
+
+        delivered = self.deliver(alert)
+        CrisisAlert.objects.filter(id=alert.id).update(delivery_attempts=attempt)
+
+        max_attempts = getattr(settings, 'CRISIS_DISPATCH_MAX_ATTEMPTS', 3)
+        if not delivered and attempt < max_attempts:
+            delay = getattr(settings, 'CRISIS_DISPATCH_RETRY_SECONDS', 2.0) * 2 ** (attempt - 1)
+            logger.error(f"Crisis alert {alert.id} not delivered, retrying in {delay:.1f}s (attempt {attempt})")
+            self._schedule_retry((priority, next(self._sequence), alert_id, attempt + 1), delay)
+        elif not delivered:
+            logger.critical(f"Crisis alert {alert.id} could not be delivered to any channel")
+
+    def deliver(self, alert: CrisisAlert) -> bool:
+        """Push one alert to every channel; True if at least one accepted it"""
+        event = build_alert_event(alert)
+        delivered = False
+
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+                delivered = True
+            except queue.Full:
+                logger.warning("Dropping crisis event for a stalled dashboard connection")
+
+        for notifier in self.get_notifiers():
+            try:
+                if notifier.notify(alert, event) is not False:
+                    delivered = True
+            except Exception as e:
+                logger.error(f"Crisis notifier {notifier.name} failed: {e}")
+
+        if delivered:
+            mark_delivered(alert)
+
+        return delivered
+
+
+def mark_delivered(alert: CrisisAlert) -> bool:
+    """Record when an alert first reached staff (once only) and check the delivery SLO"""
+    delivered_at = timezone.now()
+    updated = CrisisAlert.objects.filter(
+        id=alert.id, delivered_at__isnull=True
+    ).update(delivered_at=delivered_at)
+    if updated:
+        alert.delivered_at = delivered_at
+        check_delivery_slo(alert)
+    return bool(updated)
+
+
+def build_alert_event(alert: CrisisAlert) -> Dict:
+    interaction = alert.mental_health_interaction
+    return {
+        'id': alert.id,
+        'status': alert.status,
+        'session_id': interaction.session_id,
+        'concern_level': interaction.concern_level,
+        'message': alert.alert_message,
+        'created_at': alert.created_at.isoformat(),
+    }
+
+
+def format_sse(event: Dict, event_type: str = 'crisis_alert') -> str:
+    return f"event: {event_type}\nid: {event['id']}\ndata: {json.dumps(event)}\n\n"
+
+
+def check_delivery_slo(alert: CrisisAlert):
+    slo = getattr(settings, 'CRISIS_DELIVERY_SLO_SECONDS', 30)
+    if alert.time_to_delivery and alert.time_to_delivery.total_seconds() > slo:
+        logger.error(
+            f"Crisis alert {alert.id} breached delivery SLO: "
+            f"{alert.time_to_delivery.total_seconds():.1f}s > {slo}s"
+        )
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def crisis_slo_report(since=None) -> Dict:
+    """
+    Time-to-delivery and time-to-acknowledge for crisis alerts, with the
+    number of alerts that breached (or are currently breaching) each SLO
+    """
+    delivery_slo = getattr(settings, 'CRISIS_DELIVERY_SLO_SECONDS', 30)
+    ack_slo = getattr(settings, 'CRISIS_ACK_SLO_SECONDS', 900)
+    now = timezone.now()
+
+    alerts = CrisisAlert.objects.all()
+    if since:
+        alerts = alerts.filter(created_at__gte=since)
+
+    delivery_times, ack_times = [], []
+    total = delivery_breaches = ack_breaches = 0
+    for created_at, delivered_at, acknowledged_at in alerts.values_list(
+        'created_at', 'delivered_at', 'acknowledged_at'
+    ):
+        total += 1
+        # Undelivered / unacknowledged alerts count against the SLO as they age
+        delivery = ((delivered_at or now) - created_at).total_seconds()
+        ack = ((acknowledged_at or now) - created_at).total_seconds()
+        if delivered_at:
+            delivery_times.append(delivery)
+        if acknowledged_at:
+            ack_times.append(ack)
+        if delivery > delivery_slo:
+            delivery_breaches += 1
+        if ack > ack_slo:
+            ack_breaches += 1
+
+    return {
+        'alerts': total,
+        'delivery_slo_seconds': delivery_slo,
+        'acknowledge_slo_seconds': ack_slo,
+        'delivery_p50': _percentile(delivery_times, 50),
+        'delivery_p95': _percentile(delivery_times, 95),
+        'acknowledge_p50': _percentile(ack_times, 50),
+        'acknowledge_p95': _percentile(ack_times, 95),
+        'delivery_breaches': delivery_breaches,
+        'acknowledge_breaches': ack_breaches,
+    }
+
+
+# Global dispatcher instance
+crisis_dispatcher = CrisisDispatcher()
@@ -0,0 +1,90 @@
+"""
+Per-request time budget for the chat endpoint.
+
+multilingual_chat creates one RequestDeadline when a message arrives and
+passes it to every stage. Required stages (language detection, translation
+for Rasa, the Rasa call) get whatever is left of the budget, capped at their
+own timeout. Optional stages (translating the reply, logging unanswered
+questions) are skipped or deferred once less than
+CHAT_OPTIONAL_STAGE_MIN_SECONDS remains, so the worst-case response time
+stays close to CHAT_REQUEST_DEADLINE_SECONDS.
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class RequestDeadline:
+    """Time budget shared by all stages of one chat request"""
+
+    def __init__(self, budget=None, clock=time.monotonic):
+        self.budget = budget if budget is not None else getattr(settings, 'CHAT_REQUEST_DEADLINE_SECONDS', 8.0)
+        self._clock = clock
+        self.started_at = clock()
+        self.expires_at = self.started_at + self.budget
+        self.skipped = []
+
+    def elapsed(self):
+        return self._clock() - self.started_at
+
+    def remaining(self):
+        return max(0.0, self.expires_at - self._clock())
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+    def timeout(self, stage_timeout):
+        """The stage's own timeout, shortened to the budget that is left"""
+        return min(stage_timeout, self.remaining())
+
+    def allows(self, stage, needed=None):
+        """
+        True if at least `needed` seconds (CHAT_OPTIONAL_STAGE_MIN_SECONDS by
+        default) remain for `stage`; otherwise the stage is recorded in `skipped`
+        """
+        if needed is None:
+            needed = getattr(settings, 'CHAT_OPTIONAL_STAGE_MIN_SECONDS', 1.0)
+        remaining = self.remaining()
+        if remaining >= needed:
+            return True
+        self.skipped.append(stage)
+        logger.warning(
+            f"Not running {stage} now: {remaining:.2f}s of the {self.budget}s request budget left "
+            f"(needs {needed}s)"
+        )
+        return False
+
+
+_deferred_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='chat-deferred')
+
+
+def _run_deferred(func, args, kwargs):
+    try:
+        func(*args, **kwargs)
+    except Exception as e:
+        logger.error(f"Deferred {getattr(func, '__name__', func)} failed: {e}")
+    finally:
+        close_old_connections()
+
+
+def defer(func, *args, **kwargs):
+    """
+    Run bookkeeping after the response has been sent. With
+    CHAT_DEFERRED_TASKS_ASYNC off (tests) it runs inline instead
+    """
+    if not getattr(settings, 'CHAT_DEFERRED_TASKS_ASYNC', True):
+        return func(*args, **kwargs)
+    return _deferred_executor.submit(_run_deferred, func, args, kwargs)
+
+
+def run_or_defer(deadline, stage, func, *args, **kwargs):
+    """Run an optional stage now if the budget allows, otherwise after the response"""
+    if deadline.allows(stage):
+        return func(*args, **kwargs)
+    return defer(func, *args, **kwargs)
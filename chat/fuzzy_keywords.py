@@ -0,0 +1,186 @@
+"""
+Misspelling-tolerant keyword lookup for mental-health screening.
+
+A SymSpell-style deletion index: every keyword token is stored under each
+string obtained by deleting up to N of its characters. A message token is
+looked up the same way, so "suicde" and "suicide" meet at "suicde" without
+computing an edit distance against every keyword. Candidates are then
+confirmed with a real (Damerau-Levenshtein) distance.
+
+Fuzzy matches stay conservative because a false crisis match pages staff:
+- the allowed distance depends on the concern level (MENTAL_HEALTH_FUZZY_MAX_DISTANCE)
+  and on keyword length, so short single words like "pills" only match exactly
+- a typo must keep the first letter ("cutting" never matches "putting")
+- tokens that are ordinary known words are never treated as typos
+"""
+import threading
+import time
+from itertools import combinations
+from typing import Dict, List, NamedTuple, Optional
+
+from django.conf import settings
+
+from .language_spans import ENGLISH_LEXICON, SHONA_LEXICON
+from .normalization import NormalizedMessage, phrase_key
+
+DEFAULT_MAX_DISTANCE = {'crisis': 2, 'high': 1, 'moderate': 1, 'low': 0}
+
+# Common words one edit away from a keyword ("along"/"alone", "bills"/"pills")
+KNOWN_WORDS = ENGLISH_LEXICON | SHONA_LEXICON | frozenset({
+    'along', 'bills', 'putting', 'jumps', 'tried', 'tires', 'timed', 'tiled', 'upsets', 'angle',
+    'empties', 'panics', 'sadly', 'said', 'fill', 'will', 'mill', 'hill', 'skill', 'lonely',
+    'wife', 'knife', 'live', 'love', 'dies', 'died', 'diet', 'banging', 'changing', 'drug',
+})
+
+
+def max_distance_for(word, level_distance, in_phrase=False):
+    """
+    Allowed edits for a keyword token: none under 5 letters (4 inside a
+    multi-word phrase, where the other words give context), 2 only from 8
+    """
+    if len(word) < (4 if in_phrase else 5):
+        return 0
+    if len(word) < 8:
+        return min(level_distance, 1)
+    return level_distance
+
+
+def deletes(word, distance):
+    """Every string reachable from word by deleting up to `distance` characters"""
+    variants = {word}
+    for n in range(1, min(distance, len(word) - 1) + 1):
+        for positions in combinations(range(len(word)), n):
+            variants.add(''.join(c for i, c in enumerate(word) if i not in positions))
+    return variants
+
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance, or limit + 1 once it is exceeded"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]
+                    and previous_previous is not None):
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+class Keyword(NamedTuple):
+    phrase: str
+    level: str
+    trigger_id: Optional[int] = None  # set for MentalHealthTrigger rows
+
+
+class FuzzyMatch(NamedTuple):
+    keyword: Keyword
+    matched: str
+    distance: int
+
+
+class KeywordIndex:
+    """Deletion index over keyword phrases, each with its concern level"""
+
+    def __init__(self, keywords: List[Keyword], max_distance: Dict[str, int] = None):
+        self.max_distance = max_distance or DEFAULT_MAX_DISTANCE
+        self.keywords = []
+        self._deletes = {}
+        self._max_token_distance = 0
+        for keyword in keywords:
+            words = tuple(phrase_key(keyword.phrase).split())
+            if not words:
+                continue
+            index = len(self.keywords)
+            self.keywords.append((keyword, words))
+            level_distance = self.max_distance.get(keyword.level, 0)
+            for position, word in enumerate(words):
+                distance = max_distance_for(word, level_distance, len(words) > 1)
+                self._max_token_distance = max(self._max_token_distance, distance)
+                for variant in deletes(word, distance):
+                    self._deletes.setdefault(variant, []).append((index, position, distance))
+
+    def _token_candidates(self, token):
+        """{(keyword index, position): distance} for keyword tokens near `token`"""
+        found = {}
+        # A real word is only ever an exact match, never somebody's typo
+        exact_only = token in KNOWN_WORDS or len(token) < 3
+        for variant in deletes(token, 0 if exact_only else self._max_token_distance):
+            for index, position, allowed in self._deletes.get(variant, ()):
+                word = self.keywords[index][1][position]
+                if (index, position) in found or word[0] != token[0] or (exact_only and word != token):
+                    continue
+                distance = 0 if word == token else edit_distance(token, word, allowed)
+                if distance <= allowed:
+                    found[(index, position)] = distance
+        return found
+
+    def search(self, message: NormalizedMessage) -> List[FuzzyMatch]:
+        """Keyword phrases matched with at least one typo, closest first"""
+        tokens = message.tokens
+        # Long messages repeat words, so look each distinct token up once
+        seen = {}
+        candidates = []
+        for token in tokens:
+            if token not in seen:
+                seen[token] = self._token_candidates(token)
+            candidates.append(seen[token])
+
+        matches = {}
+        for start, first in enumerate(candidates):
+            for (index, position), distance in first.items():
+                if position != 0:
+                    continue
+                keyword, words = self.keywords[index]
+                total = distance
+                for offset in range(1, len(words)):
+                    if start + offset >= len(tokens):
+                        total = None
+                        break
+                    step = candidates[start + offset].get((index, offset))
+                    if step is None:
+                        total = None
+                        break
+                    total += step
+                limit = self.max_distance.get(keyword.level, 0)
+                if total is None or total == 0 or total > limit:
+                    continue
+                if index not in matches or total < matches[index].distance:
+                    matched = ' '.join(tokens[start:start + len(words)])
+                    matches[index] = FuzzyMatch(keyword, matched, total)
+        return sorted(matches.values(), key=lambda match: match.distance)
+
+
+_lock = threading.Lock()
+_indexes = {}
+
+
+def get_keyword_index(language, build):
+    """
+    Cached index per language. `build()` returns its keywords. Rebuilt when
+    invalidated (trigger saved or deleted in this process) and at least every
+    MENTAL_HEALTH_FUZZY_INDEX_TTL seconds, so other workers catch up too
+    """
+    ttl = getattr(settings, 'MENTAL_HEALTH_FUZZY_INDEX_TTL', 60)
+    entry = _indexes.get(language)
+    now = time.monotonic()
+    if entry is None or now - entry[1] > ttl:
+        with _lock:
+            entry = _indexes.get(language)
+            if entry is None or now - entry[1] > ttl:
+                max_distance = getattr(settings, 'MENTAL_HEALTH_FUZZY_MAX_DISTANCE', DEFAULT_MAX_DISTANCE)
+                entry = (KeywordIndex(build(), max_distance), now)
+                _indexes[language] = entry
+    return entry[0]
+
+
+def invalidate_keyword_indexes():
+    with _lock:
+        _indexes.clear()
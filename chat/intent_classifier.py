@@ -0,0 +1,260 @@
+"""
+Lightweight in-process intent classifier used to answer trivial intents
+(greet, thank_you, goodbye) without a round trip to the Rasa server.
+
+Messages are turned into hashed word and character n-gram features and
+scored by a softmax linear model trained from rasachat/data/nlu.yml with
+`python manage.py train_intent_classifier`. Only confident predictions for
+the configured intents are answered here; everything else goes to Rasa.
+"""
+import logging
+import os
+import re
+import threading
+import zlib
+from pathlib import Path
+
+from django.conf import settings
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+try:
+    import yaml
+except ImportError:  # pragma: no cover - optional dependency
+    yaml = None
+
+logger = logging.getLogger(__name__)
+
+RASA_DIR = Path(settings.BASE_DIR) / 'rasachat'
+DEFAULT_MODEL_PATH = Path(settings.BASE_DIR) / 'intent_classifier.npz'
+FEATURE_BUCKETS = 2 ** 14
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+_ENTITY_RE = re.compile(r'\[([^\]]+)\](\([^)]*\)|\{[^}]*\})?')
+
+
+def extract_features(text, buckets=FEATURE_BUCKETS):
+    """Hashed bag of word unigrams, word bigrams and character 3-4 grams"""
+    words = _WORD_RE.findall((text or '').lower())
+    grams = list(words)
+    grams.extend(f'{a} {b}' for a, b in zip(words, words[1:]))
+    for word in words:
+        padded = f'<{word}>'
+        for n in (3, 4):
+            grams.extend(f'#{padded[i:i + n]}' for i in range(len(padded) - n + 1))
+
+    counts = {}
+    for gram in grams:
+        index = zlib.crc32(gram.encode('utf-8')) % buckets
+        counts[index] = counts.get(index, 0) + 1
+    return counts
+
+
+def vectorize(texts, buckets=FEATURE_BUCKETS):
+    matrix = np.zeros((len(texts), buckets), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for index, count in extract_features(text, buckets).items():
+            matrix[row, index] = count
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-9)
+
+
+def _softmax(scores):
+    scores = scores - scores.max(axis=1, keepdims=True)
+    exp = np.exp(scores)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class IntentClassifier:
+    """Softmax regression over hashed n-gram features"""
+
+    def __init__(self, intents, weights, bias, responses=None, buckets=FEATURE_BUCKETS):
+        self.intents = list(intents)
+        self.weights = weights
+        self.bias = bias
+        self.responses = dict(responses or {})
+        self.buckets = buckets
+
+    @classmethod
+    def train(cls, texts, labels, responses=None, epochs=300, learning_rate=20.0, l2=1e-5,
+              buckets=FEATURE_BUCKETS):
+        if np is None:
+            raise ImportError('numpy is required to train the intent classifier')
+        intents = sorted(set(labels))
+        features = vectorize(texts, buckets)
+        targets = np.zeros((len(labels), len(intents)), dtype=np.float32)
+        for row, label in enumerate(labels):
+            targets[row, intents.index(label)] = 1.0
+
+        weights = np.zeros((buckets, len(intents)), dtype=np.float32)
+        bias = np.zeros(len(intents), dtype=np.float32)
+        for _ in range(epochs):
+            gradient = (_softmax(features @ weights + bias) - targets) / len(texts)
+            weights -= learning_rate * (features.T @ gradient + l2 * weights)
+            bias -= learning_rate * gradient.sum(axis=0)
+        return cls(intents, weights, bias, responses, buckets)
+
+    def predict_proba(self, text):
+        scores = np.array(self.bias, dtype=np.float32)
+        for index, count in self._normalized_features(text).items():
+            scores = scores + count * self.weights[index]
+        return _softmax(scores[np.newaxis, :])[0]
+
+    def predict(self, text):
+        """Return (intent, confidence)"""
+        probabilities = self.predict_proba(text)
+        best = int(probabilities.argmax())
+        return self.intents[best], float(probabilities[best])
+
+    def _normalized_features(self, text):
+        # Sparse equivalent of vectorize() for a single message
+        counts = extract_features(text, self.buckets)
+        norm = sum(c * c for c in counts.values()) ** 0.5 or 1.0
+        return {index: count / norm for index, count in counts.items()}
+
+    def save(self, path):
+        tmp_path = f'{path}.tmp.npz'
+        np.savez_compressed(
+            tmp_path,
+            intents=np.array(self.intents),
+            weights=self.weights,
+            bias=self.bias,
+            response_intents=np.array(list(self.responses.keys()), dtype=str),
+            response_texts=np.array(list(self.responses.values()), dtype=str),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            responses = dict(zip(data['response_intents'].tolist(), data['response_texts'].tolist()))
+            return cls(data['intents'].tolist(), data['weights'], data['bias'], responses,
+                       data['weights'].shape[0])
+
+
+# ---------------------------------------------------------------------------
+# Training data from the Rasa project
+# ---------------------------------------------------------------------------
+
+def _load_yaml(path):
+    if yaml is None:
+        raise ImportError('PyYAML is required to read the Rasa training data')
+    with open(path, encoding='utf-8') as f:
+        return yaml.safe_load(f) or {}
+
+
+def load_nlu_examples(path=None):
+    """Return (texts, labels) from an nlu.yml file, entity markup stripped"""
+    data = _load_yaml(path or RASA_DIR / 'data' / 'nlu.yml')
+    texts, labels = [], []
+    for block in data.get('nlu', []):
+        intent = block.get('intent')
+        if not intent:
+            continue
+        for line in (block.get('examples') or '').splitlines():
+            example = line.strip().lstrip('-').strip()
+            example = _ENTITY_RE.sub(r'\1', example).strip()
+            if example:
+                texts.append(example)
+                labels.append(intent)
+    return texts, labels
+
+
+def load_direct_responses(domain_path=None, rules_path=None):
+    """
+    Map intents to their fixed response text, using the rules that answer
+    an intent with a single utter_* action and the texts in domain.yml
+    """
+    domain = _load_yaml(domain_path or RASA_DIR / 'domain.yml')
+    rules = _load_yaml(rules_path or RASA_DIR / 'data' / 'rules.yml')
+    texts = {
+        name: variants[0]['text']
+        for name, variants in (domain.get('responses') or {}).items()
+        if variants and 'text' in variants[0]
+    }
+    responses = {}
+    for rule in rules.get('rules', []):
+        steps = rule.get('steps') or []
+        if len(steps) == 2 and 'intent' in steps[0] and steps[1].get('action', '') in texts:
+            responses[steps[0]['intent']] = texts[steps[1]['action']]
+    return responses
+
+
+# ---------------------------------------------------------------------------
+# Runtime
+# ---------------------------------------------------------------------------
+
+_lock = threading.Lock()
+_loaded = {'path': None, 'mtime': None, 'model': None}
+
+
+def get_intent_classifier():
+    """Return the trained classifier, reloading it if the model file changed"""
+    if np is None or not getattr(settings, 'INTENT_CLASSIFIER_ENABLED', True):
+        return None
+    path = str(getattr(settings, 'INTENT_CLASSIFIER_PATH', DEFAULT_MODEL_PATH))
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+
+    if _loaded['path'] != path or _loaded['mtime'] != mtime:
+        with _lock:
+            if _loaded['path'] != path or _loaded['mtime'] != mtime:
+                try:
+                    model = IntentClassifier.load(path)
+                except Exception as e:
+                    logger.error(f"Could not load intent classifier {path}: {e}")
+                    model = None
+                _loaded.update(path=path, mtime=mtime, model=model)
+    return _loaded['model']
+
+
+def predict_intent(message):
+    """
+    Classify the message once for the in-process checks below. Returns
+    (intent, confidence, trained response or None), or None when there is no
+    model or the message is longer than INTENT_CLASSIFIER_MAX_WORDS
+    """
+    model = get_intent_classifier()
+    if model is None:
+        return None
+    if len(_WORD_RE.findall(message.lower())) > getattr(settings, 'INTENT_CLASSIFIER_MAX_WORDS', 6):
+        return None
+
+    intent, confidence = model.predict(message)
+    return intent, confidence, model.responses.get(intent)
+
+
+def classify_direct_response(prediction):
+    """
+    Return (intent, confidence, response) when the predicted message can be
+    answered without Rasa, otherwise None
+    """
+    if prediction is None:
+        return None
+    intent, confidence, response = prediction
+    allowed = getattr(settings, 'INTENT_CLASSIFIER_INTENTS', ['greet', 'thank_you', 'goodbye'])
+    threshold = getattr(settings, 'INTENT_CLASSIFIER_THRESHOLD', 0.85)
+    if intent not in allowed or confidence < threshold or response is None:
+        return None
+    return prediction
+
+
+def session_independent_intent(prediction):
+    """
+    The predicted intent when the classifier is confident it is one whose Rasa
+    reply does not depend on the conversation (CHAT_SINGLEFLIGHT_RASA_INTENTS),
+    so identical concurrent messages can share one Rasa call. Otherwise None
+    """
+    if prediction is None:
+        return None
+    intent, confidence, _ = prediction
+    allowed = getattr(settings, 'CHAT_SINGLEFLIGHT_RASA_INTENTS', [])
+    threshold = getattr(settings, 'INTENT_CLASSIFIER_THRESHOLD', 0.85)
+    if intent not in allowed or confidence < threshold:
+        return None
+    return intent
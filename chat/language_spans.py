@@ -0,0 +1,214 @@
+"""
+Span-level English/Shona tagging for code-switched messages.
+
+Students often write "ndinoda kuziva about the ICT201 exam timetable": only
+the Shona run needs translating, and sending the English run through the
+translator wastes quota and garbles course codes and technical terms.
+
+Each word is tagged from the lexicons first, then from a character trigram
+model trained on the seed text below, with the fact that Shona words end in
+a vowel as a strong cue. Numbers, codes, punctuation and proper nouns are
+neutral and join the neighbouring run. tag_spans() returns runs that
+concatenate back to the original text exactly.
+"""
+import math
+import re
+from typing import List, NamedTuple, Optional
+
+SHONA_LEXICON = frozenset({
+    # Greetings and courtesy
+    'mhoro', 'mhoroi', 'mangwanani', 'masikati', 'manheru', 'ndeipi', 'zvakanaka',
+    'tinotenda', 'ndatenda', 'pamusoroi', 'ndapota', 'maita', 'makadii', 'ndiripo',
+    'tiripo', 'wakadii', 'hongu', 'kwete', 'chisarai', 'fambai', 'zvakanakai',
+    # Question words
+    'sei', 'rinhi', 'ripi', 'chii', 'chei', 'kupi', 'papi', 'nei', 'ndiani', 'vanaani',
+    'zvinei', 'ndezvei', 'mangani', 'marii',
+    # Pronouns and function words (not "here" or two-letter particles such as
+    # "na", "mu", "pa": English text is full of them)
+    'ini', 'iwe', 'isu', 'imi', 'ivo', 'iye', 'uye', 'asi', 'kana', 'nekuti', 'zvino',
+    'izvozvi', 'izvi', 'izvo', 'ichi', 'icho', 'uyu', 'uyo', 'ava', 'avo', 'pano',
+    'apo', 'kuti', 'ndi', 'nge', 'futi', 'chete',
+    # Common verbs and nouns
+    'zita', 'renyu', 'rangu', 'yangu', 'wangu', 'zvangu', 'ndiri', 'ndinoda', 'ndoda',
+    'handina', 'handizivi', 'ndinoziva', 'ndingawana', 'ndingaite', 'ndinonzi',
+    'ndokumbirawo', 'ndibatsireiwo', 'ndibatsirei', 'batsira', 'rubatsiro', 'ndakanaka',
+    'kuziva', 'kubhadhara', 'kunyoresa', 'kunyoreswa', 'kuverenga', 'kudzidza',
+    'kuenda', 'kuuya', 'kutaura', 'kubvunza', 'nhasi', 'mangwana', 'nezuro', 'svondo',
+    'vhiki', 'mwedzi', 'nguva', 'mari', 'basa', 'chikoro', 'makosi', 'kosi',
+    'mudzidzi', 'vadzidzi', 'mudzidzisi', 'vadzidzisi', 'bvunzo', 'mibvunzo',
+    'raibhurari', 'imba', 'kirasi', 'mukoma', 'hanzvadzi', 'amai', 'baba', 'mwana',
+    'mukomana', 'musikana', 'shamwari', 'munhu', 'vanhu', 'zvakaoma', 'ndakaneta',
+})
+
+ENGLISH_LEXICON = frozenset({
+    'the', 'a', 'an', 'is', 'are', 'was', 'were', 'be', 'been', 'am', 'what', 'how',
+    'when', 'where', 'who', 'why', 'which', 'i', 'you', 'my', 'your', 'me', 'we',
+    'our', 'they', 'their', 'he', 'she', 'it', 'this', 'that', 'these', 'those',
+    'to', 'of', 'and', 'or', 'but', 'in', 'on', 'at', 'for', 'with', 'from', 'by',
+    'about', 'into', 'can', 'do', 'does', 'did', 'have', 'has', 'had', 'will',
+    'would', 'could', 'should', 'may', 'might', 'must', 'not', 'please', 'hello',
+    'hi', 'thanks', 'thank', 'want', 'need', 'know', 'tell', 'help', 'get', 'find',
+    'there', 'time', 'open', 'close', 'apply', 'good', 'morning', 'yes', 'no',
+    'course', 'courses', 'fees', 'fee', 'register', 'registration', 'library',
+    'university', 'student', 'students', 'exam', 'exams', 'timetable', 'schedule',
+    'lecture', 'lecturer', 'results', 'grades', 'assignment', 'assignments',
+    'deadline', 'semester', 'hostel', 'accommodation', 'portal', 'password',
+    'email', 'online', 'payment', 'office', 'room', 'today', 'tomorrow', 'hours',
+})
+
+# Shona verb/noun class prefixes followed by a vowel-final stem
+SHONA_MORPHOLOGY = re.compile(
+    r"^(ndi|nda|ndo|ndino|ndaka|ku|mu|zvi|zva|chi|cha|va|ma|ri|ti|ta|ha|dzi|ru|hu)[a-z]{3,}[aeiou]$"
+)
+
+# Seed text for the character model, in addition to the lexicons
+_SHONA_SEED = """
+ndinoda kuziva kuti bvunzo dzinotanga rinhi ndingabhadhara sei mari yechikoro
+ndibatsireiwo kunyoresa makosi emwaka uno raibhurari inovhurwa nguva dzipi
+pamusoroi handina kunzwisisa izvozvo mungandipindure muimwe nzira here
+edza zvakare ndiri kunetsa kubatana izvozvi ndinzwisisa kuti unogona kutambudzika
+heano zvinokubatsira rangarira kuti kutsvaga rubatsiro hakusi urombo una simba
+unokosheswa uye uko kusina wega rubatsiro ruripo inoshanda mazuva ose nguva dzose
+kukurumidzira kana uri munzvimbo yenjodzi fona uende kuchipatara zvimwe
+ndinokurudzira kuti utaure nemunhu waunoda kana mushandi weutano
+kushushikana kusuruvara kutya kurwara mupfungwa kushaiwa tariro kusurukirwa
+kushungurudzika kunetseka kushatirwa kutsamwa kukanganisika kuneta matambudziko emhuri
+mudzidzisi wangu akati tiende kukirasi mangwana masikati ndakaneta nezvidzidzo
+ndeupi mubhadharo wekugara muhostela vadzidzi vanofanira kunyoresa pamberi pevhiki
+"""
+
+_ENGLISH_SEED = """
+i want to know when the exams start and how to pay my school fees
+please help me register for courses this semester when does the library open
+i am sorry i could not understand that could you please rephrase your question
+try again i am having trouble connecting right now i understand you might be struggling
+here are some resources that can help remember seeking help is a sign of strength
+you matter and you are not alone help is available open every day at all hours
+if you are in immediate danger call emergency services or go to the nearest hospital
+my lecturer said we should attend the class tomorrow afternoon i am tired of studying
+what is the accommodation fee for the hostel students should register before the deadline
+where can i find the timetable for the computer science department assignment results
+"""
+
+_VOWELS = frozenset('aeiou')
+_TOKEN_RE = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)?|\S")
+
+
+class Span(NamedTuple):
+    text: str
+    language: Optional[str]  # 'en', 'sn', or None for a neutral-only run
+
+
+class CharNgramModel:
+    """Two-class naive Bayes over padded character trigrams"""
+
+    def __init__(self, corpora, n=3):
+        self.n = n
+        self.counts = {}
+        self.totals = {}
+        vocabulary = set()
+        for language, words in corpora.items():
+            counts = {}
+            for word in words:
+                for gram in self._grams(word):
+                    counts[gram] = counts.get(gram, 0) + 1
+                    vocabulary.add(gram)
+            self.counts[language] = counts
+            self.totals[language] = sum(counts.values())
+        self.vocabulary_size = len(vocabulary) + 1
+
+    def _grams(self, word):
+        padded = f'<{word}>'
+        return [padded[i:i + self.n] for i in range(len(padded) - self.n + 1)]
+
+    def score(self, word, language):
+        counts = self.counts[language]
+        denominator = self.totals[language] + self.vocabulary_size
+        return sum(math.log((counts.get(gram, 0) + 1) / denominator) for gram in self._grams(word))
+
+    def shona_margin(self, word):
+        """Per-trigram log-likelihood ratio; positive leans Shona"""
+        grams = len(self._grams(word)) or 1
+        return (self.score(word, 'sn') - self.score(word, 'en')) / grams
+
+
+_model = CharNgramModel({
+    'sn': list(SHONA_LEXICON) + _SHONA_SEED.split(),
+    'en': list(ENGLISH_LEXICON) + _ENGLISH_SEED.split(),
+})
+
+# Margin the n-gram model needs before it overrides the "ends in a vowel" cue
+NGRAM_MARGIN = 0.4
+
+
+def tag_word(word):
+    """'en', 'sn' or None (neutral) for one token"""
+    lower = word.lower()
+    if not lower.isalpha():
+        return None
+    if lower in SHONA_LEXICON:
+        return 'sn'
+    if lower in ENGLISH_LEXICON:
+        return 'en'
+    if len(lower) < 3:
+        return None
+    if lower[-1] not in _VOWELS:
+        # Shona words end in a vowel, so a consonant ending is English
+        return 'en'
+    if SHONA_MORPHOLOGY.match(lower):
+        return 'sn'
+    margin = _model.shona_margin(lower)
+    if margin > NGRAM_MARGIN:
+        return 'sn'
+    if margin < -NGRAM_MARGIN:
+        return 'en'
+    return None
+
+
+def looks_shona(words):
+    """
+    Whether words are Shona enough to change a message's language: one from
+    the lexicon, or more tagged Shona than English. A lone word the character
+    model leans Shona on ("rude", "change") is not enough
+    """
+    words = [word.lower() for word in words]
+    if any(word in SHONA_LEXICON for word in words):
+        return True
+    tags = [tag_word(word) for word in words]
+    return tags.count('sn') > tags.count('en')
+
+
+def tag_spans(text) -> List[Span]:
+    """
+    Split text into maximal single-language runs. Whitespace, punctuation,
+    numbers and unknown words join the run before them (or after, at the start)
+    """
+    tokens = []
+    position = 0
+    for match in _TOKEN_RE.finditer(text or ''):
+        word = match.group()
+        language = tag_word(word)
+        # A capitalised word inside a sentence is usually a name, not Shona
+        if language == 'sn' and word[0].isupper() and tokens and word.lower() not in SHONA_LEXICON:
+            language = None
+        tokens.append([text[position:match.end()], language])
+        position = match.end()
+    if position < len(text or ''):
+        tokens.append([text[position:], None])
+
+    # Neutral tokens take the language of the run they sit in
+    current = next((language for _, language in tokens if language), None)
+    for token in tokens:
+        if token[1] is None:
+            token[1] = current
+        else:
+            current = token[1]
+
+    spans = []
+    for chunk, language in tokens:
+        if spans and spans[-1].language == language:
+            spans[-1] = Span(spans[-1].text + chunk, language)
+        else:
+            spans.append(Span(chunk, language))
+    return spans
+
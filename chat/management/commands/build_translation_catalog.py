@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from chat.translation_catalog import (
+    DEFAULT_CATALOG_PATH, DEFAULT_OVERRIDES_PATH, compile_catalog, extract_messages, load_json,
+    save_catalog
+)
+from chat.translator import translator
+
+
+class Command(BaseCommand):
+    help = 'Extract static bot strings, pre-translate them and compile the translation catalog'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--language', action='append', dest='languages',
+            help='Target language code (repeatable, defaults to every non-English language in LANGUAGES)'
+        )
+        parser.add_argument('--output', help='Catalog path (defaults to TRANSLATION_CATALOG_PATH)')
+        parser.add_argument(
+            '--no-translate', action='store_true',
+            help='Only compile overrides and existing translations, without calling the translator'
+        )
+        parser.add_argument('--list', action='store_true', help='Print the extracted strings and exit')
+
+    def handle(self, *args, **options):
+        try:
+            messages = extract_messages()
+        except ImportError as e:
+            raise CommandError(f'{e}. Install PyYAML to read domain.yml.')
+        except (OSError, SyntaxError, ValueError) as e:
+            raise CommandError(f'Could not extract bot strings: {e}')
+
+        if options['list']:
+            for text in messages:
+                self.stdout.write(repr(text))
+            return
+
+        languages = options['languages'] or [
+            code for code, _ in getattr(settings, 'LANGUAGES', []) if code != 'en'
+        ]
+        output = options['output'] or getattr(settings, 'TRANSLATION_CATALOG_PATH', DEFAULT_CATALOG_PATH)
+
+        def translate(text, language):
+            return translator.client.call('translate', text, src='en', dest=language).text
+
+        catalog, translated = compile_catalog(
+            messages, languages,
+            translate=None if options['no_translate'] else translate,
+            previous=load_json(output, {}),
+            overrides=load_json(DEFAULT_OVERRIDES_PATH, {}),
+        )
+        save_catalog(catalog, output)
+
+        for language, entries in catalog['languages'].items():
+            missing = len(messages) - sum(1 for text in messages if text in entries)
+            self.stdout.write(f'{language}: {len(entries)} entries, {missing} untranslated')
+        self.stdout.write(self.style.SUCCESS(
+            f'Catalog version {catalog["version"]}: {len(messages)} strings, '
+            f'{translated} newly translated -> {output}'
+        ))
@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from chat.crisis_dispatch import crisis_slo_report
+
+
+class Command(BaseCommand):
+    help = 'Report crisis alert delivery/acknowledgement latency and fail on SLO breaches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours', type=int, default=24,
+            help='Only include alerts raised in the last N hours (default 24)'
+        )
+
+    def handle(self, *args, **options):
+        report = crisis_slo_report(since=timezone.now() - timedelta(hours=options['hours']))
+
+        def seconds(value):
+            return f"{value:.1f}s" if value is not None else "n/a"
+
+        self.stdout.write(f"Crisis alerts in the last {options['hours']}h: {report['alerts']}")
+        self.stdout.write(
+            f"Time to delivery    p50 {seconds(report['delivery_p50'])}  "
+            f"p95 {seconds(report['delivery_p95'])}  "
+            f"(SLO {report['delivery_slo_seconds']}s, {report['delivery_breaches']} breaches)"
+        )
+        self.stdout.write(
+            f"Time to acknowledge p50 {seconds(report['acknowledge_p50'])}  "
+            f"p95 {seconds(report['acknowledge_p95'])}  "
+            f"(SLO {report['acknowledge_slo_seconds']}s, {report['acknowledge_breaches']} breaches)"
+        )
+
+        if report['delivery_breaches'] or report['acknowledge_breaches']:
+            raise CommandError('Crisis response SLO breached')
+        self.stdout.write(self.style.SUCCESS('Crisis response SLO met'))
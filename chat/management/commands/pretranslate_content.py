@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from chat.pretranslation import (
+    RESOURCE_DESCRIPTION_LANGUAGES, pretranslate_faqs, pretranslate_resources, stale_faq_translations,
+    untranslated_faqs, untranslated_resources
+)
+
+
+class Command(BaseCommand):
+    help = 'Machine-translate FAQs and mental-health resource descriptions ahead of time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--language', default='sn', help='Target language code (default sn)')
+        parser.add_argument(
+            '--only', choices=['faqs', 'resources'],
+            help='Translate only FAQs or only resource descriptions'
+        )
+        parser.add_argument('--batch-size', type=int, default=100, help='Rows written per bulk write')
+        parser.add_argument('--workers', type=int, default=4, help='Concurrent translation requests')
+        parser.add_argument('--limit', type=int, help='Stop after this many items of each kind')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be translated')
+
+    def handle(self, *args, **options):
+        language = options['language']
+        if language == 'en':
+            raise CommandError('Content is written in English; choose another --language')
+        if options['batch_size'] < 1 or options['workers'] < 1:
+            raise CommandError('--batch-size and --workers must be at least 1')
+
+        do_faqs = options['only'] in (None, 'faqs')
+        do_resources = options['only'] in (None, 'resources')
+        if do_resources and language not in RESOURCE_DESCRIPTION_LANGUAGES:
+            if options['only'] == 'resources':
+                raise CommandError(f'MentalHealthResource has no description_{language} field')
+            do_resources = False
+
+        if options['dry_run']:
+            if do_faqs:
+                self.stdout.write(
+                    f'FAQs: {untranslated_faqs(language).count()} untranslated, '
+                    f'{stale_faq_translations(language).count()} stale'
+                )
+            if do_resources:
+                self.stdout.write(f'Resources: {untranslated_resources(language).count()} untranslated or stale')
+            return
+
+        batching = {'batch_size': options['batch_size'], 'workers': options['workers'], 'limit': options['limit']}
+        failed = 0
+        if do_faqs:
+            created, updated, faq_failures = pretranslate_faqs(language, **batching)
+            failed += faq_failures
+            self.stdout.write(f'FAQs: {created} translated, {updated} refreshed, {faq_failures} failed')
+        if do_resources:
+            updated, resource_failures = pretranslate_resources(language, **batching)
+            failed += resource_failures
+            self.stdout.write(f'Resources: {updated} translated, {resource_failures} failed')
+
+        if failed:
+            self.stdout.write(self.style.WARNING(f'{failed} item(s) left untranslated; re-run to retry them'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Pre-translation complete'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from chat.analytics import rebuild_chat_sessions
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-session ChatSession summaries from existing conversations'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding chat session summaries...')
+        rebuilt = rebuild_chat_sessions()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rebuilt} chat sessions'))
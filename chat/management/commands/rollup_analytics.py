@@ -0,0 +1,51 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from chat.analytics import backfill_analytics, rollup_analytics
+from chat.models import Conversation
+
+
+class Command(BaseCommand):
+    help = 'Aggregate conversations and feedback into daily ChatAnalytics rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='Backfill from this date (YYYY-MM-DD)')
+        parser.add_argument('--end', help='Backfill up to this date (YYYY-MM-DD), defaults to today')
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Backfill every day that has conversations'
+        )
+
+    def handle(self, *args, **options):
+        if options['full']:
+            bounds = Conversation.objects.aggregate(first=Min('timestamp'), last=Max('timestamp'))
+            if not bounds['first']:
+                self.stdout.write('No conversations to roll up')
+                return
+            start = timezone.localdate(bounds['first'])
+            end = timezone.localdate(bounds['last'])
+        elif options['start'] or options['end']:
+            start = self._parse_date(options['start']) if options['start'] else None
+            end = self._parse_date(options['end']) if options['end'] else timezone.localdate()
+            if start is None:
+                raise CommandError('--end requires --start')
+            if start > end:
+                raise CommandError('--start must not be after --end')
+        else:
+            updated = rollup_analytics()
+            self.stdout.write(self.style.SUCCESS(f'Incremental rollup updated {updated} day(s)'))
+            return
+
+        updated = backfill_analytics(start, end)
+        self.stdout.write(
+            self.style.SUCCESS(f'Backfilled {updated} day(s) between {start} and {end}')
+        )
+
+    def _parse_date(self, value):
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f'Invalid date: {value}')
@@ -0,0 +1,73 @@
+import random
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from chat.intent_classifier import (
+    DEFAULT_MODEL_PATH, IntentClassifier, load_direct_responses, load_nlu_examples
+)
+
+
+class Command(BaseCommand):
+    help = 'Train the in-process intent classifier from the Rasa NLU data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--nlu', help='Path to nlu.yml (defaults to rasachat/data/nlu.yml)')
+        parser.add_argument('--domain', help='Path to domain.yml (defaults to rasachat/domain.yml)')
+        parser.add_argument('--rules', help='Path to rules.yml (defaults to rasachat/data/rules.yml)')
+        parser.add_argument('--output', help='Where to write the model (defaults to INTENT_CLASSIFIER_PATH)')
+        parser.add_argument('--epochs', type=int, default=300)
+        parser.add_argument(
+            '--folds', type=int, default=5,
+            help='Cross-validation folds used to report accuracy (0 to skip)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            texts, labels = load_nlu_examples(options['nlu'])
+            responses = load_direct_responses(options['domain'], options['rules'])
+            model = IntentClassifier.train(texts, labels, responses, epochs=options['epochs'])
+        except ImportError as e:
+            raise CommandError(f'{e}. Install numpy and PyYAML to train the classifier.')
+        except OSError as e:
+            raise CommandError(f'Could not read training data: {e}')
+
+        if not texts:
+            raise CommandError('No NLU examples found')
+
+        if options['folds'] > 1:
+            self._cross_validate(texts, labels, responses, options['folds'], options['epochs'])
+
+        output = options['output'] or str(getattr(settings, 'INTENT_CLASSIFIER_PATH', DEFAULT_MODEL_PATH))
+        model.save(output)
+        self.stdout.write(self.style.SUCCESS(
+            f'Trained on {len(texts)} examples across {len(model.intents)} intents -> {output}'
+        ))
+
+    def _cross_validate(self, texts, labels, responses, folds, epochs):
+        """Report overall accuracy and how the short-circuit would behave"""
+        allowed = getattr(settings, 'INTENT_CLASSIFIER_INTENTS', ['greet', 'thank_you', 'goodbye'])
+        threshold = getattr(settings, 'INTENT_CLASSIFIER_THRESHOLD', 0.85)
+        order = list(range(len(texts)))
+        random.Random(0).shuffle(order)
+
+        correct = answered = answered_correct = 0
+        for fold in range(folds):
+            held_out = set(order[fold::folds])
+            train = [i for i in order if i not in held_out]
+            model = IntentClassifier.train(
+                [texts[i] for i in train], [labels[i] for i in train], responses, epochs=epochs
+            )
+            for i in held_out:
+                intent, confidence = model.predict(texts[i])
+                correct += intent == labels[i]
+                if intent in allowed and confidence >= threshold:
+                    answered += 1
+                    answered_correct += intent == labels[i]
+
+        self.stdout.write(f'{folds}-fold accuracy: {correct / len(texts):.1%}')
+        precision = f'{answered_correct / answered:.1%}' if answered else 'n/a'
+        self.stdout.write(
+            f'Short-circuit at threshold {threshold}: {answered} of {len(texts)} examples, '
+            f'precision {precision}'
+        )
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from chat.rate_limiter import translation_rate_limiter
+
+
+class Command(BaseCommand):
+    help = 'Report how saturated the shared translation rate limit is'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after reporting')
+        parser.add_argument(
+            '--max-saturation', type=float, default=None,
+            help='Fail if more than this share of requests (0-1) were delayed or rejected'
+        )
+
+    def handle(self, *args, **options):
+        limiter = translation_rate_limiter()
+        if limiter is None:
+            self.stdout.write('Translation rate limiting is disabled (TRANSLATOR_RATE_LIMIT_ENABLED)')
+            return
+
+        stats = limiter.stats()
+        self.stdout.write(
+            f"Limit {stats['rate']:g}/s, burst {stats['capacity']:g}, "
+            f"{stats['tokens']:.1f} tokens available"
+        )
+        self.stdout.write(
+            f"Requests {stats['requests']}: {stats['acquired']} immediate, "
+            f"{stats['delayed']} delayed, {stats['rejected']} rejected"
+        )
+        self.stdout.write(
+            f"Saturation {stats['saturation']:.1%}, rejection rate {stats['rejection_rate']:.1%}, "
+            f"average wait {stats['average_wait']:.2f}s"
+        )
+
+        if options['reset']:
+            limiter.reset_stats()
+            self.stdout.write('Counters reset')
+        if options['max_saturation'] is not None and stats['saturation'] > options['max_saturation']:
+            raise CommandError('Translation quota is saturated')
+        self.stdout.write(self.style.SUCCESS('Translation quota OK'))
@@ -1,11 +1,20 @@
-import re
 import logging
 from typing import List, Dict, Tuple, Optional
+from django.conf import settings
+from django.db import transaction
 from django.db.models import Q
 from .models import MentalHealthTrigger, MentalHealthResource, MentalHealthInteraction, CrisisAlert
+from .crisis_dispatch import crisis_dispatcher
+from .fuzzy_keywords import Keyword, get_keyword_index
+from .normalization import NormalizedMessage, normalize
 
 logger = logging.getLogger(__name__)
 
+CONCERN_ORDER = {'crisis': 0, 'high': 1, 'moderate': 2, 'low': 3}
+# Tokens shared by neighbouring scan windows: keyword and trigger phrases of
+# up to this many + 1 words are always wholly inside one window
+SCAN_WINDOW_OVERLAP = 11
+
 class MentalHealthDetectionService:
     """Service for detecting mental health concerns and providing appropriate resources"""
     
@@ -47,7 +56,7 @@ class MentalHealthDetectionService:
             ]
         }
 
-    def analyze_message(self, message: str, language: str = 'en') -> Dict:
+    def analyze_message(self, message, language: str = 'en') -> Dict:
         """
         Analyze a message for mental health concerns
         Returns: {
@@ -57,7 +66,28 @@ class MentalHealthDetectionService:
             'recommended_resources': List[MentalHealthResource]
         }
         """
-        message_lower = message.lower()
+        message = normalize(message)
+        window = getattr(settings, 'MENTAL_HEALTH_SCAN_WINDOW_TOKENS', 200)
+        if len(message.tokens) <= window:
+            return self._analyze(message, language)
+
+        # Long message: screen overlapping windows so a phrase anywhere is
+        # caught while each pass stays small. Stop at the first crisis,
+        # otherwise keep the most serious window's result
+        triggers = self._active_triggers(language)
+        best = None
+        for part in message.windows(window, SCAN_WINDOW_OVERLAP):
+            result = self._analyze(part, language, triggers)
+            if result['concern_level'] == 'crisis':
+                return result
+            if best is None or (
+                CONCERN_ORDER.get(result['concern_level'], 9) < CONCERN_ORDER.get(best['concern_level'], 9)
+            ):
+                best = result
+        return best
+
+    def _analyze(self, message: NormalizedMessage, language: str, triggers=None) -> Dict:
+        """analyze_message() for one window; `triggers` saves re-querying per window"""
         result = {
             'concern_level': 'none',
             'triggers_found': [],
@@ -66,7 +96,10 @@ class MentalHealthDetectionService:
         }
         
         # Check for crisis keywords first (highest priority)
-        crisis_matches = self._check_keywords(message_lower, self.crisis_keywords.get(language, []))
+        crisis_matches = self._check_keywords(message, self.crisis_keywords.get(language, []))
+        # Misspelled keywords and triggers ("suicde", "kil myself"), looked up once
+        fuzzy = {} if crisis_matches else self._fuzzy_matches(message, language)
+        crisis_matches = crisis_matches or fuzzy.get('crisis', [])
         if crisis_matches:
             result['concern_level'] = 'crisis'
             result['triggers_found'].extend(crisis_matches)
@@ -75,7 +108,7 @@ class MentalHealthDetectionService:
             return result
         
         # Check database triggers
-        db_trigger = self._check_database_triggers(message, language)
+        db_trigger = self._check_database_triggers(message, language, triggers) or self._fuzzy_trigger(fuzzy)
         if db_trigger:
             result['concern_level'] = db_trigger.concern_level
             result['triggers_found'].append(db_trigger.trigger_phrase)
@@ -84,7 +117,8 @@ class MentalHealthDetectionService:
             return result
         
         # Check high concern keywords
-        high_matches = self._check_keywords(message_lower, self.high_concern_keywords.get(language, []))
+        high_matches = self._check_keywords(message, self.high_concern_keywords.get(language, []))
+        high_matches = high_matches or fuzzy.get('high', [])
         if high_matches:
             result['concern_level'] = 'high'
             result['triggers_found'].extend(high_matches)
@@ -93,7 +127,8 @@ class MentalHealthDetectionService:
             return result
         
         # Check moderate concern keywords
-        moderate_matches = self._check_keywords(message_lower, self.moderate_concern_keywords.get(language, []))
+        moderate_matches = self._check_keywords(message, self.moderate_concern_keywords.get(language, []))
+        moderate_matches = moderate_matches or fuzzy.get('moderate', [])
         if moderate_matches:
             result['concern_level'] = 'moderate'
             result['triggers_found'].extend(moderate_matches)
@@ -103,28 +138,77 @@ class MentalHealthDetectionService:
         
         return result
     
-    def _check_keywords(self, message: str, keywords: List[str]) -> List[str]:
+    def _check_keywords(self, message: NormalizedMessage, keywords: List[str]) -> List[str]:
         """Check if any keywords are present in the message"""
-        found = []
-        for keyword in keywords:
-            if re.search(r'\b' + re.escape(keyword) + r'\b', message, re.IGNORECASE):
-                found.append(keyword)
-        return found
+        message = normalize(message)
+        return [keyword for keyword in keywords if message.has_phrase(keyword)]
     
-    def _check_database_triggers(self, message: str, language: str) -> Optional[MentalHealthTrigger]:
-        """Check message against database triggers"""
-        triggers = MentalHealthTrigger.objects.filter(
+    def _active_triggers(self, language: str) -> List[MentalHealthTrigger]:
+        return list(MentalHealthTrigger.objects.filter(
             language=language, 
             is_active=True
-        ).order_by('concern_level')  # Crisis first
+        ).order_by('concern_level'))  # Crisis first
+
+    def _check_database_triggers(self, message: NormalizedMessage, language: str,
+                                 triggers=None) -> Optional[MentalHealthTrigger]:
+        """Check message against database triggers"""
+        if triggers is None:
+            triggers = self._active_triggers(language)
         
-        message_lower = message.lower()
+        message = normalize(message)
         for trigger in triggers:
-            if re.search(r'\b' + re.escape(trigger.trigger_phrase.lower()) + r'\b', message_lower):
+            if message.has_phrase(trigger.trigger_phrase):
                 return trigger
         
         return None
     
+    def _fuzzy_keywords(self, language: str) -> List[Keyword]:
+        """Everything the fuzzy index covers: built-in keywords and active DB triggers"""
+        keywords = []
+        for level, keyword_lists in (
+            ('crisis', self.crisis_keywords),
+            ('high', self.high_concern_keywords),
+            ('moderate', self.moderate_concern_keywords),
+        ):
+            keywords.extend(Keyword(phrase, level) for phrase in keyword_lists.get(language, []))
+        for pk, phrase, level in MentalHealthTrigger.objects.filter(
+            language=language, is_active=True
+        ).values_list('pk', 'trigger_phrase', 'concern_level'):
+            keywords.append(Keyword(phrase, level, pk))
+        return keywords
+
+    def _fuzzy_matches(self, message: NormalizedMessage, language: str) -> Dict:
+        """
+        Keywords the message contains with a typo, as {level: [phrase, ...]},
+        plus 'triggers': [trigger id, ...] most serious first
+        """
+        if not getattr(settings, 'MENTAL_HEALTH_FUZZY_MATCHING', True):
+            return {}
+        index = get_keyword_index(language, lambda: self._fuzzy_keywords(language))
+        found = {}
+        triggers = []
+        for match in index.search(message):
+            keyword = match.keyword
+            logger.info(f"Fuzzy {keyword.level} keyword '{keyword.phrase}' matched '{match.matched}'")
+            if keyword.trigger_id:
+                triggers.append((CONCERN_ORDER.get(keyword.level, 9), match.distance, keyword.trigger_id))
+            else:
+                found.setdefault(keyword.level, []).append(keyword.phrase)
+        if triggers:
+            found['triggers'] = [trigger_id for _, _, trigger_id in sorted(triggers)]
+        return found
+
+    def _fuzzy_trigger(self, fuzzy: Dict) -> Optional[MentalHealthTrigger]:
+        """The most serious matched trigger that is still active, in one query"""
+        trigger_ids = fuzzy.get('triggers', [])
+        if not trigger_ids:
+            return None
+        active = MentalHealthTrigger.objects.filter(is_active=True).in_bulk(trigger_ids)
+        for trigger_id in trigger_ids:
+            if trigger_id in active:
+                return active[trigger_id]
+        return None
+
     def _get_crisis_resources(self, language: str) -> List[MentalHealthResource]:
         """Get immediate crisis resources"""
         return list(MentalHealthResource.objects.filter(
@@ -182,13 +266,19 @@ class MentalHealthDetectionService:
             f"Immediate intervention may be required."
         )
         
-        CrisisAlert.objects.create(
+        alert = CrisisAlert.objects.create(
             mental_health_interaction=interaction,
             alert_message=alert_message
         )
         
         # Log for immediate attention
         logger.critical(f"CRISIS ALERT CREATED: Session {interaction.session_id}")
+        
+        # Push to staff dashboards and notifiers once the alert is committed
+        transaction.on_commit(
+            lambda: crisis_dispatcher.enqueue(alert.id, interaction.concern_level)
+        )
+        return alert
     
     def format_resource_response(self, resources: List[MentalHealthResource], language: str = 'en') -> str:
         """Format mental health resources into a user-friendly response"""
@@ -260,8 +350,10 @@ class MentalHealthDetectionService:
             else:
                 resource_text += f"   ⏰ Hours: {resource.hours_of_operation}\n"
         
-        if resource.description:
-            resource_text += f"   ℹ️ {resource.description}\n"
+        # An out-of-date translation is never shown: crisis instructions change
+        description = resource.localized_description(language)
+        if description:
+            resource_text += f"   ℹ️ {description}\n"
         
         if resource.website_url:
             resource_text += f"   🌐 {resource.website_url}\n"
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:34
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0007_remove_notification_target_group_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AnalyticsRollupState",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("name", models.CharField(max_length=50, unique=True)),
+                ("last_conversation_id", models.BigIntegerField(default=0)),
+                ("last_feedback_id", models.BigIntegerField(default=0)),
+                ("last_run_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name="chatanalytics",
+            name="date",
+            field=models.DateField(default=django.utils.timezone.localdate),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0008_chatanalytics_rollup"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="conversation",
+            name="session_id",
+            field=models.CharField(blank=True, db_index=True, max_length=100, null=True),
+        ),
+        migrations.CreateModel(
+            name="ChatSession",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("session_id", models.CharField(max_length=100, unique=True)),
+                ("first_message_at", models.DateTimeField()),
+                ("last_message_at", models.DateTimeField()),
+                ("turn_count", models.IntegerField(default=0)),
+                ("languages_used", models.CharField(blank=True, help_text="Comma-separated language codes seen in this session", max_length=20)),
+                ("fallback_count", models.IntegerField(default=0)),
+                ("last_is_fallback", models.BooleanField(default=False, help_text="Did the session end on a fallback?")),
+                ("mental_health_flagged", models.BooleanField(default=False)),
+                ("last_intent", models.CharField(blank=True, max_length=100, null=True)),
+                ("user", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                "ordering": ["-last_message_at"],
+            },
+        ),
+    ]
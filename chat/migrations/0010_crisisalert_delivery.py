@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0009_chatsession"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="crisisalert",
+            name="delivered_at",
+            field=models.DateTimeField(blank=True, help_text="When staff were first notified", null=True),
+        ),
+        migrations.AddField(
+            model_name="crisisalert",
+            name="delivery_attempts",
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0010_crisisalert_delivery"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="faq",
+            name="translated_from",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="The English FAQ this one was machine-translated from (pretranslate_content)",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="translations",
+                to="chat.faq",
+            ),
+        ),
+        migrations.AddField(
+            model_name="mentalhealthresource",
+            name="description_sn",
+            field=models.TextField(
+                blank=True, help_text="Shona description (filled in by pretranslate_content)"
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0011_pretranslated_content"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mentalhealthresource",
+            name="description_sn_source",
+            field=models.CharField(
+                blank=True,
+                help_text="SHA-1 of the English description the Shona one was made from; stale once they differ",
+                max_length=40,
+            ),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0012_mentalhealthresource_description_sn_source"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AnalyticsDirtyDay",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RemoveField(
+            model_name="analyticsrollupstate",
+            name="last_feedback_id",
+        ),
+    ]
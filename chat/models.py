@@ -1,9 +1,16 @@
-from django.db import models
+import hashlib
+
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 
 
+def text_hash(text):
+    """Fingerprint of a source text, to tell when its translation has gone stale"""
+    return hashlib.sha1((text or '').encode('utf-8')).hexdigest()
+
+
 class Notification(models.Model):
     title = models.CharField(max_length=200)
     message = models.TextField()
@@ -22,7 +29,7 @@ class Conversation(models.Model):
     ]
     
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
-    session_id = models.CharField(max_length=100, null=True, blank=True)
+    session_id = models.CharField(max_length=100, null=True, blank=True, db_index=True)
     user_message = models.TextField()
     bot_response = models.TextField()
     detected_language = models.CharField(max_length=2, choices=LANGUAGE_CHOICES, default='en')
@@ -39,6 +46,71 @@ class Conversation(models.Model):
     def __str__(self):
         return f"Conversation ({self.detected_language}) - {self.timestamp}"
 
+class ChatSession(models.Model):
+    """One summary row per chat session, updated as each conversation is written"""
+    session_id = models.CharField(max_length=100, unique=True)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    
+    first_message_at = models.DateTimeField()
+    last_message_at = models.DateTimeField()
+    turn_count = models.IntegerField(default=0)
+    languages_used = models.CharField(
+        max_length=20, 
+        blank=True, 
+        help_text="Comma-separated language codes seen in this session"
+    )
+    fallback_count = models.IntegerField(default=0)
+    last_is_fallback = models.BooleanField(default=False, help_text="Did the session end on a fallback?")
+    mental_health_flagged = models.BooleanField(default=False)
+    last_intent = models.CharField(max_length=100, null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-last_message_at']
+    
+    def __str__(self):
+        return f"Session {self.session_id} ({self.turn_count} turns)"
+    
+    def get_languages_list(self):
+        return [lang for lang in self.languages_used.split(',') if lang]
+    
+    @property
+    def switched_language(self):
+        return len(self.get_languages_list()) > 1
+    
+    @classmethod
+    def record_conversation(cls, conversation):
+        """Fold a newly written conversation into its session summary"""
+        if not conversation.session_id:
+            return None
+        
+        with transaction.atomic():
+            session, created = cls.objects.select_for_update().get_or_create(
+                session_id=conversation.session_id,
+                defaults={
+                    'user': conversation.user,
+                    'first_message_at': conversation.timestamp,
+                    'last_message_at': conversation.timestamp,
+                }
+            )
+            languages = session.get_languages_list()
+            if conversation.detected_language not in languages:
+                languages.append(conversation.detected_language)
+            
+            session.languages_used = ','.join(languages)
+            session.turn_count += 1
+            session.fallback_count += 1 if conversation.is_fallback else 0
+            if conversation.timestamp >= session.last_message_at:
+                session.last_is_fallback = conversation.is_fallback
+                session.last_intent = conversation.intent
+                session.last_message_at = conversation.timestamp
+            if conversation.intent == 'mental_health_support':
+                session.mental_health_flagged = True
+            if session.user_id is None:
+                session.user = conversation.user
+            session.save()
+        
+        return session
+
 class ChatFeedback(models.Model):
     """Store user feedback on bot responses"""
     RATING_CHOICES = [
@@ -131,6 +203,13 @@ class FAQ(models.Model):
         help_text="If this FAQ was created from an unanswered question"
     )
     usage_count = models.IntegerField(default=0, help_text="How many times this FAQ was served")
+    translated_from = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True, blank=True,
+        related_name='translations',
+        help_text="The English FAQ this one was machine-translated from (pretranslate_content)"
+    )
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -157,8 +236,8 @@ class UserLanguagePreference(models.Model):
         return f"{self.user.username} - {self.preferred_language}"
 
 class ChatAnalytics(models.Model):
-    """Store analytics data for admin dashboard"""
-    date = models.DateField(auto_now_add=True)
+    """Store analytics data for admin dashboard (filled by the rollup_analytics command)"""
+    date = models.DateField(default=timezone.localdate)
     total_conversations = models.IntegerField(default=0)
     successful_responses = models.IntegerField(default=0)
     fallback_responses = models.IntegerField(default=0)
@@ -178,6 +257,27 @@ class ChatAnalytics(models.Model):
     
     def __str__(self):
         return f"Analytics for {self.date}"
+
+class AnalyticsRollupState(models.Model):
+    """High-water mark of the conversations already folded into ChatAnalytics"""
+    name = models.CharField(max_length=50, unique=True)
+    last_conversation_id = models.BigIntegerField(default=0)
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"Rollup state {self.name} (conversation #{self.last_conversation_id})"
+
+class AnalyticsDirtyDay(models.Model):
+    """
+    A day whose ChatAnalytics row needs recomputing because feedback on one of
+    its conversations was saved. Written in the same transaction as the
+    feedback, so edits and late commits are never missed
+    """
+    date = models.DateField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Analytics for {self.date} need recomputing"
     
 class MentalHealthResource(models.Model):
     """Store mental health resources and emergency contacts"""
@@ -203,6 +303,11 @@ class MentalHealthResource(models.Model):
     
     title = models.CharField(max_length=200)
     description = models.TextField()
+    description_sn = models.TextField(blank=True, help_text="Shona description (filled in by pretranslate_content)")
+    description_sn_source = models.CharField(
+        max_length=40, blank=True,
+        help_text="SHA-1 of the English description the Shona one was made from; stale once they differ"
+    )
     resource_type = models.CharField(max_length=20, choices=RESOURCE_TYPES)
     urgency_level = models.CharField(max_length=20, choices=URGENCY_LEVELS, default='general')
     
@@ -249,6 +354,15 @@ class MentalHealthResource(models.Model):
     
     def get_languages_list(self):
         return [lang.strip() for lang in self.languages_supported.split(',')]
+    
+    def description_hash(self):
+        return text_hash(self.description)
+    
+    def localized_description(self, language):
+        """The Shona description while it still matches the English one, else the English"""
+        if language == 'sn' and self.description_sn and self.description_sn_source == self.description_hash():
+            return self.description_sn
+        return self.description
 
 class MentalHealthTrigger(models.Model):
     """Keywords and phrases that indicate mental health concerns"""
@@ -333,8 +447,24 @@ class CrisisAlert(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     resolved_at = models.DateTimeField(null=True, blank=True)
     
+    # Dispatch tracking (see chat.crisis_dispatch)
+    delivered_at = models.DateTimeField(null=True, blank=True, help_text="When staff were first notified")
+    delivery_attempts = models.IntegerField(default=0)
+    
     class Meta:
         ordering = ['-created_at']
     
     def __str__(self):
-        return f"Crisis Alert - {self.status} - {self.created_at}"
\ No newline at end of file
+        return f"Crisis Alert - {self.status} - {self.created_at}"
+    
+    @property
+    def time_to_delivery(self):
+        if self.delivered_at:
+            return self.delivered_at - self.created_at
+        return None
+    
+    @property
+    def time_to_acknowledge(self):
+        if self.acknowledged_at:
+            return self.acknowledged_at - self.created_at
+        return None
\ No newline at end of file
@@ -0,0 +1,101 @@
+"""
+Canonical form of a chat message, computed once per request.
+
+multilingual_chat builds a NormalizedMessage as soon as the message arrives
+and hands it to language detection, mental-health screening and FAQ
+matching, instead of each stage lowercasing, stripping and splitting the
+text again. Caches key on its fingerprint, so "Library hours?" and
+"library  hours" share an entry.
+"""
+import hashlib
+import re
+import unicodedata
+from functools import cached_property, lru_cache
+
+_TOKEN_RE = re.compile(r"[^\W_]+(?:'[^\W_]+)*")
+# Typographic quotes and dashes that NFKC leaves alone
+_PUNCTUATION_FOLD = str.maketrans({
+    '‘': "'", '’': "'", 'ʼ': "'", '“': '"', '”': '"',
+    '–': '-', '—': '-',
+})
+
+
+def fold(text):
+    """NFKC-normalise, casefold, drop accents and collapse whitespace"""
+    text = unicodedata.normalize('NFKC', text or '').translate(_PUNCTUATION_FOLD).casefold()
+    text = ''.join(
+        c for c in unicodedata.normalize('NFD', text) if not unicodedata.combining(c)
+    )
+    return ' '.join(text.split())
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(fold(text))
+
+
+@lru_cache(maxsize=4096)
+def phrase_key(phrase):
+    """Normalised form of a keyword or trigger phrase (they repeat every request)"""
+    return ' '.join(tokenize(phrase))
+
+
+class NormalizedMessage:
+    """The folded text, tokens and fingerprint of one message"""
+
+    def __init__(self, original):
+        self.original = original or ''
+        self.text = fold(self.original)
+        self.tokens = tuple(_TOKEN_RE.findall(self.text))
+        self.token_set = frozenset(self.tokens)
+        # Space-delimited token sequence for whole-word phrase checks
+        self._padded = f" {' '.join(self.tokens)} "
+
+    @classmethod
+    def from_tokens(cls, tokens):
+        """A message made of already-normalised tokens (no folding again)"""
+        message = cls.__new__(cls)
+        message.tokens = tuple(tokens)
+        message.original = message.text = ' '.join(message.tokens)
+        message.token_set = frozenset(message.tokens)
+        message._padded = f' {message.text} '
+        return message
+
+    def windows(self, size, overlap):
+        """
+        Overlapping token windows covering the whole message. A phrase of up
+        to overlap + 1 tokens is always wholly inside at least one window
+        """
+        step = max(1, size - overlap)
+        for start in range(0, max(1, len(self.tokens) - overlap), step):
+            yield NormalizedMessage.from_tokens(self.tokens[start:start + size])
+
+    def __str__(self):
+        return self.original
+
+    def __len__(self):
+        return len(self.original)
+
+    @cached_property
+    def char_ngrams(self):
+        """Character trigrams of the folded text"""
+        return frozenset(self.text[i:i + 3] for i in range(len(self.text) - 2))
+
+    @cached_property
+    def fingerprint(self):
+        return hashlib.sha1(' '.join(self.tokens).encode('utf-8')).hexdigest()
+
+    def has_phrase(self, phrase):
+        """Whole-word match of a phrase (itself normalised), e.g. 'kill myself'"""
+        key = phrase_key(phrase)
+        if not key:
+            return False
+        if ' ' not in key:
+            return key in self.token_set
+        return f' {key} ' in self._padded
+
+
+def normalize(message):
+    """Return message as a NormalizedMessage, building one only if needed"""
+    if isinstance(message, NormalizedMessage):
+        return message
+    return NormalizedMessage(message)
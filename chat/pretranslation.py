@@ -0,0 +1,171 @@
+"""
+Offline machine translation of FAQs and mental-health resource descriptions.
+
+`python manage.py pretranslate_content` finds English content with no
+translation yet, or whose translation is older than its last edit, and
+translates it on a bounded thread pool, batch by batch.
+Each batch is written with one bulk_create / bulk_update inside a
+transaction, so an interrupted run loses at most the batch in flight and the
+next run picks up where it stopped. Every call goes through the shared
+translation rate limiter; a rate-limited call waits and retries instead of
+failing the item.
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+
+from .models import FAQ, MentalHealthResource, text_hash
+from .translator import TranslationRateLimited, translator
+
+logger = logging.getLogger(__name__)
+
+# Languages with a description_<code> column on MentalHealthResource
+RESOURCE_DESCRIPTION_LANGUAGES = ('sn',)
+
+
+def translate_text(text, language, max_retries=5):
+    """Translate one English string, waiting out the rate limiter. None on failure"""
+    for attempt in range(max_retries + 1):
+        try:
+            return translator.client.call('translate', text, src='en', dest=language).text
+        except TranslationRateLimited:
+            time.sleep(min(0.5 * 2 ** attempt, 10))
+        except Exception as e:
+            logger.error(f"Pre-translation failed for {text[:40]!r}: {type(e).__name__}: {e}")
+            return None
+    logger.error(f"Pre-translation gave up on {text[:40]!r}: translation quota exhausted")
+    return None
+
+
+def translate_all(texts, language, workers, translate=translate_text):
+    """Translate texts concurrently on at most `workers` threads, preserving order"""
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='pretranslate') as executor:
+        return list(executor.map(lambda text: translate(text, language), texts))
+
+
+def batches(queryset, batch_size, limit=None):
+    """Walk a queryset in primary-key order, batch_size rows at a time"""
+    done = 0
+    last_pk = 0
+    while limit is None or done < limit:
+        size = batch_size if limit is None else min(batch_size, limit - done)
+        batch = list(queryset.filter(pk__gt=last_pk).order_by('pk')[:size])
+        if not batch:
+            return
+        yield batch
+        done += len(batch)
+        last_pk = batch[-1].pk
+
+
+# ---------------------------------------------------------------------------
+# FAQs
+# ---------------------------------------------------------------------------
+
+def untranslated_faqs(language):
+    """Active English FAQs with no translation into `language` yet"""
+    return FAQ.objects.filter(language='en', is_active=True).exclude(
+        Exists(FAQ.objects.filter(translated_from=OuterRef('pk'), language=language))
+    )
+
+
+def stale_faq_translations(language):
+    """Machine translations whose English source was edited after they were made"""
+    return FAQ.objects.filter(
+        language=language, translated_from__isnull=False,
+        updated_at__lt=F('translated_from__updated_at'),
+    ).select_related('translated_from')
+
+
+def pretranslate_faqs(language, batch_size=100, workers=4, limit=None, translate=translate_text):
+    """
+    Create a translated FAQ for every untranslated English one and refresh
+    stale translations. Returns (created, updated, failed)
+    """
+    created = updated = failed = 0
+
+    for batch in batches(untranslated_faqs(language), batch_size, limit):
+        texts = translate_all(
+            [text for faq in batch for text in (faq.question, faq.answer)], language, workers, translate
+        )
+        new_faqs = []
+        for faq, question, answer in zip(batch, texts[0::2], texts[1::2]):
+            if not question or not answer:
+                failed += 1
+                continue
+            new_faqs.append(FAQ(
+                question=question, answer=answer, language=language, category=faq.category,
+                keywords=faq.keywords, is_active=True, translated_from=faq, created_by=faq.created_by,
+            ))
+        with transaction.atomic():
+            FAQ.objects.bulk_create(new_faqs)
+        created += len(new_faqs)
+
+    for batch in batches(stale_faq_translations(language), batch_size, limit):
+        texts = translate_all(
+            [text for faq in batch for text in (faq.translated_from.question, faq.translated_from.answer)],
+            language, workers, translate
+        )
+        changed = []
+        now = timezone.now()
+        for faq, question, answer in zip(batch, texts[0::2], texts[1::2]):
+            if not question or not answer:
+                failed += 1
+                continue
+            # bulk_update() skips auto_now, so stamp updated_at explicitly
+            faq.question, faq.answer, faq.updated_at = question, answer, now
+            faq.keywords, faq.is_active = faq.translated_from.keywords, faq.translated_from.is_active
+            changed.append(faq)
+        with transaction.atomic():
+            FAQ.objects.bulk_update(changed, ['question', 'answer', 'keywords', 'is_active', 'updated_at'])
+        updated += len(changed)
+
+    return created, updated, failed
+
+
+# ---------------------------------------------------------------------------
+# Mental-health resources
+# ---------------------------------------------------------------------------
+
+def untranslated_resources(language):
+    """
+    Active resources with no description_<language>, or one translated from
+    an English description that has since been edited
+    """
+    field = f'description_{language}'
+    resources = MentalHealthResource.objects.filter(is_active=True).exclude(description='')
+    # Resources are few, so the hashes are compared here rather than in SQL
+    needed = [
+        pk for pk, description, translated, source in resources.values_list(
+            'pk', 'description', field, f'{field}_source'
+        )
+        if not translated or source != text_hash(description)
+    ]
+    return resources.filter(pk__in=needed)
+
+
+def pretranslate_resources(language, batch_size=100, workers=4, limit=None, translate=translate_text):
+    """Fill in or refresh description_<language> for active resources. Returns (updated, failed)"""
+    if language not in RESOURCE_DESCRIPTION_LANGUAGES:
+        raise ValueError(f"MentalHealthResource has no description_{language} field")
+    field = f'description_{language}'
+    updated = failed = 0
+
+    for batch in batches(untranslated_resources(language), batch_size, limit):
+        texts = translate_all([resource.description for resource in batch], language, workers, translate)
+        changed = []
+        for resource, text in zip(batch, texts):
+            if not text:
+                failed += 1
+                continue
+            setattr(resource, field, text)
+            setattr(resource, f'{field}_source', resource.description_hash())
+            changed.append(resource)
+        with transaction.atomic():
+            MentalHealthResource.objects.bulk_update(changed, [field, f'{field}_source'])
+        updated += len(changed)
+
+    return updated, failed
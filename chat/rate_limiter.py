@@ -0,0 +1,187 @@
+"""
+Token bucket shared by every worker process on the host.
+
+The bucket lives in a small SQLite file. Each attempt to take a token
+refills the bucket, takes the token and updates the counters in one BEGIN
+IMMEDIATE transaction, and SQLite's file lock serializes those transactions
+across processes, so the whole fleet stays under one global rate. Callers
+that find the bucket empty wait for the next token, up to their own
+deadline. The same file counts acquired, delayed and rejected requests so
+saturation can be reported with `python manage.py translation_quota`.
+"""
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Longest wait for another process's write lock, further capped by the caller's deadline
+LOCK_TIMEOUT = 5.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    name TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    acquired INTEGER NOT NULL DEFAULT 0,
+    delayed INTEGER NOT NULL DEFAULT 0,
+    rejected INTEGER NOT NULL DEFAULT 0,
+    wait_seconds REAL NOT NULL DEFAULT 0,
+    since REAL NOT NULL
+)
+"""
+
+
+class TokenBucketLimiter:
+    """
+    `rate` tokens per second with bursts up to `capacity`, shared through
+    the SQLite file at `path`. Wall-clock time is used because it is the
+    only clock all processes agree on
+    """
+
+    def __init__(self, path, rate, capacity, name='translation', clock=time.time, sleep=time.sleep):
+        self.path = str(path)
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.name = name
+        self._clock = clock
+        self._sleep = sleep
+        self._local = threading.local()
+
+    def _connection(self):
+        # sqlite3 connections cannot be shared between threads
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=LOCK_TIMEOUT, isolation_level=None)
+            connection.execute(_SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def _take(self, lock_timeout, started, give_up_at, slept, optional):
+        """
+        Refill the bucket, take a token if there is one and count the outcome,
+        all in one transaction. Returns 0 if a token was taken, the seconds to
+        sleep before trying again, or None when the caller should give up
+        """
+        connection = self._connection()
+        connection.execute(f'PRAGMA busy_timeout = {int(max(0.0, lock_timeout) * 1000)}')
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            now = self._clock()
+            row = connection.execute(
+                'SELECT tokens, updated_at FROM buckets WHERE name = ?', (self.name,)
+            ).fetchone()
+            if row is None:
+                connection.execute(
+                    'INSERT INTO buckets (name, tokens, updated_at, since) VALUES (?, ?, ?, ?)',
+                    (self.name, self.capacity, now, now)
+                )
+                tokens = self.capacity
+            else:
+                tokens = min(self.capacity, row[0] + max(0.0, now - row[1]) * self.rate)
+
+            column = None
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+                # Only a request that had to sleep for its token was delayed
+                column = 'delayed' if slept else 'acquired'
+            else:
+                wait = (1 - tokens) / self.rate
+                if now + wait > give_up_at:
+                    wait = None
+                    if not optional:
+                        column = 'rejected'
+            connection.execute(
+                'UPDATE buckets SET tokens = ?, updated_at = ? WHERE name = ?', (tokens, now, self.name)
+            )
+            if column is not None:
+                waited = now - started if column != 'acquired' else 0.0
+                connection.execute(
+                    f'UPDATE buckets SET {column} = {column} + 1, wait_seconds = wait_seconds + ? '
+                    'WHERE name = ?', (waited, self.name)
+                )
+            connection.execute('COMMIT')
+            return wait
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+
+    def acquire(self, timeout=0.0, optional=False, lock_timeout=None):
+        """
+        Take a token, waiting at most `timeout` seconds for one.
+        Returns False (and counts a rejection) if none became available.
+        An `optional` request (a hedge) that gets no token is not a rejection.
+        `lock_timeout` is what is left of the caller's deadline: waiting for
+        another process's lock never takes longer than that, or LOCK_TIMEOUT
+        """
+        started = self._clock()
+        give_up_at = started + max(0.0, timeout)
+        lock_give_up_at = started + (LOCK_TIMEOUT if lock_timeout is None else lock_timeout)
+        slept = False
+        while True:
+            try:
+                wait = self._take(
+                    min(LOCK_TIMEOUT, lock_give_up_at - self._clock()), started, give_up_at, slept, optional
+                )
+            except sqlite3.OperationalError as e:
+                if 'locked' not in str(e):
+                    raise
+                # Still locked when the caller's deadline ran out
+                logger.warning(f"Gave up waiting for the {self.name} quota lock: {e}")
+                return False
+            if wait is None:
+                return False
+            if wait == 0:
+                return True
+            self._sleep(wait)
+            slept = True
+
+    def stats(self):
+        """Counters since the last reset, with the share of requests that were delayed or rejected"""
+        row = self._connection().execute(
+            'SELECT tokens, updated_at, acquired, delayed, rejected, wait_seconds, since '
+            'FROM buckets WHERE name = ?', (self.name,)
+        ).fetchone()
+        if row is None:
+            return {'rate': self.rate, 'capacity': self.capacity, 'requests': 0, 'acquired': 0,
+                    'delayed': 0, 'rejected': 0, 'tokens': self.capacity, 'saturation': 0.0,
+                    'rejection_rate': 0.0, 'average_wait': 0.0, 'since': None}
+
+        tokens, updated_at, acquired, delayed, rejected, wait_seconds, since = row
+        requests = acquired + delayed + rejected
+        return {
+            'rate': self.rate,
+            'capacity': self.capacity,
+            'requests': requests,
+            'acquired': acquired,
+            'delayed': delayed,
+            'rejected': rejected,
+            'tokens': min(self.capacity, tokens + max(0.0, self._clock() - updated_at) * self.rate),
+            'saturation': (delayed + rejected) / requests if requests else 0.0,
+            'rejection_rate': rejected / requests if requests else 0.0,
+            'average_wait': wait_seconds / (delayed + rejected) if delayed + rejected else 0.0,
+            'since': since,
+        }
+
+    def reset_stats(self):
+        self._connection().execute(
+            'UPDATE buckets SET acquired = 0, delayed = 0, rejected = 0, wait_seconds = 0, since = ? '
+            'WHERE name = ?', (self._clock(), self.name)
+        )
+
+
+def translation_rate_limiter():
+    """The fleet-wide googletrans limiter configured in settings, or None when disabled"""
+    if not getattr(settings, 'TRANSLATOR_RATE_LIMIT_ENABLED', True):
+        return None
+    return TokenBucketLimiter(
+        getattr(settings, 'TRANSLATOR_RATE_LIMIT_PATH', Path(settings.BASE_DIR) / 'translator_quota.sqlite3'),
+        rate=getattr(settings, 'TRANSLATOR_RATE_LIMIT_PER_SECOND', 5.0),
+        capacity=getattr(settings, 'TRANSLATOR_RATE_LIMIT_BURST', 10),
+    )
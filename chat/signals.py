@@ -0,0 +1,37 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import FAQ, ChatFeedback, ChatSession, Conversation, MentalHealthTrigger
+from .analytics import mark_feedback_day_dirty
+from .fuzzy_keywords import invalidate_keyword_indexes
+
+
+@receiver(post_save, sender=Conversation)
+def update_chat_session(sender, instance, created, raw=False, **kwargs):
+    """Keep the per-session summary row in step with every new conversation"""
+    if created and not raw:
+        ChatSession.record_conversation(instance)
+
+
+@receiver(post_save, sender=ChatFeedback)
+def mark_analytics_day_dirty(sender, instance, raw=False, **kwargs):
+    """New and edited ratings both reach the next analytics rollup"""
+    if not raw:
+        mark_feedback_day_dirty(instance)
+
+
+@receiver(post_save, sender=MentalHealthTrigger)
+@receiver(post_delete, sender=MentalHealthTrigger)
+def refresh_keyword_indexes(sender, **kwargs):
+    """Rebuild the fuzzy crisis keyword index with the changed trigger phrases"""
+    invalidate_keyword_indexes()
+
+
+@receiver(post_save, sender=FAQ)
+def sync_faq_translations(sender, instance, raw=False, **kwargs):
+    """Machine-translated copies follow their English FAQ's status and keywords"""
+    if raw or instance.translated_from_id is not None:
+        return
+    # update() leaves updated_at alone, so edited text still shows up as stale
+    FAQ.objects.filter(translated_from=instance).update(
+        is_active=instance.is_active, keywords=instance.keywords
+    )
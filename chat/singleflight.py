@@ -0,0 +1,95 @@
+"""
+Single-flight coalescing of identical concurrent work.
+
+At a lecture break many students ask "what are the library hours" within the
+same few seconds. While one request is computing a result for a key, the
+others asking for the same key wait for it and share the result (or the
+exception) instead of repeating the translation, FAQ scan or Rasa call.
+Nothing is cached: the key is forgotten as soon as the call finishes, so the
+next request computes afresh.
+
+multilingual_chat keys its stages on the normalized message and language.
+Coalescing is per process; each worker process still makes its own calls.
+"""
+import logging
+import threading
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlightTimeout(TimeoutError):
+    """A waiting caller gave up before the shared call finished"""
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; concurrent callers share it"""
+
+    def __init__(self, name='singleflight'):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key, func, timeout=None):
+        """
+        Return (result, shared). The first caller for `key` runs func(); callers
+        arriving while it runs wait up to `timeout` seconds for its outcome,
+        then raise SingleFlightTimeout
+        """
+        if not getattr(settings, 'CHAT_SINGLEFLIGHT_ENABLED', True):
+            return func(), False
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                call.waiters += 1
+                self.shared += 1
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise SingleFlightTimeout(f"{self.name}: gave up waiting for {key!r} after {timeout}s")
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+            if call.waiters:
+                logger.info(f"{self.name}: {call.waiters} request(s) shared the call for {key!r}")
+        return call.result, False
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+def flight_key(stage, message, language):
+    """Key for a chat stage: the normalized message's fingerprint and the language"""
+    return stage, message.fingerprint, language
+
+
+chat_flight = SingleFlight('chat')
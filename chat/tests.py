@@ -1,3 +1,1136 @@
-from django.test import TestCase
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .analytics import (
+    backfill_analytics, get_conversation_summary, get_crisis_summary, rollup_analytics
+)
+from . import views
+from .crisis_dispatch import CrisisNotifier, crisis_dispatcher, crisis_slo_report
+from .deadline import RequestDeadline
+from .fuzzy_keywords import get_keyword_index, invalidate_keyword_indexes
+from .intent_classifier import IntentClassifier, load_direct_responses, load_nlu_examples
+from .language_spans import tag_spans
+from .mental_health_service import MentalHealthDetectionService
+from .normalization import NormalizedMessage
+from .pretranslation import pretranslate_faqs, pretranslate_resources
+from .rate_limiter import TokenBucketLimiter
+from .singleflight import SingleFlight, SingleFlightTimeout
+from .translator import (
+    DeadlineTranslatorClient, MultilingualTranslator, TranslationRateLimited, TranslationTimeout, split_chunks
+)
+from .translation_catalog import (
+    CONNECTION_ERROR_MESSAGE, TranslationCatalog, compile_catalog, extract_messages, save_catalog
+)
+from .models import (
+    Conversation, ChatAnalytics, ChatFeedback, ChatSession, CrisisAlert, FAQ, MentalHealthInteraction,
+    MentalHealthResource, MentalHealthTrigger, UnansweredQuestion
+)
+
+
+class AdminSummaryCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(self.admin)
+
+    def _conversation(self, **kwargs):
+        return Conversation.objects.create(
+            session_id='s1', user_message='hello', bot_response='hi', **kwargs
+        )
+
+    def test_conversation_summary_is_served_from_cache_until_refreshed(self):
+        self._conversation(is_fallback=True)
+        self.assertEqual(get_conversation_summary()['total_conversations'], 1)
+
+        self._conversation()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_conversation_summary()['total_conversations'], 1)
+
+        summary = get_conversation_summary(refresh=True)
+        self.assertEqual(summary['total_conversations'], 2)
+        self.assertEqual(summary['fallback_rate'], "50.0%")
+
+    def test_refresh_summary_admin_url(self):
+        get_conversation_summary()
+        self._conversation()
+        response = self.client.get(reverse('admin:chat_conversation_refresh_summary'))
+        self.assertRedirects(response, reverse('admin:chat_conversation_changelist'))
+        self.assertEqual(get_conversation_summary()['total_conversations'], 1)
+
+    def test_crisis_summary_is_never_cached(self):
+        self.assertEqual(get_crisis_summary()['new_alerts'], 0)
+        interaction = MentalHealthInteraction.objects.create(
+            conversation=self._conversation(), session_id='s1', concern_level='crisis'
+        )
+        alert = CrisisAlert.objects.create(mental_health_interaction=interaction, alert_message='alert')
+        summary = get_crisis_summary()
+        self.assertEqual(summary['new_alerts'], 1)
+        self.assertEqual(summary['pending_alerts'], 1)
+
+        # update() sends no signals; the counts must still be current
+        CrisisAlert.objects.filter(pk=alert.pk).update(status='resolved')
+        summary = get_crisis_summary()
+        self.assertEqual(summary['new_alerts'], 0)
+        self.assertEqual(summary['pending_alerts'], 0)
+
+    def test_changelists_include_summaries(self):
+        response = self.client.get(reverse('admin:chat_conversation_changelist'))
+        self.assertIn('summary', response.context_data)
+        response = self.client.get(reverse('admin:chat_crisisalert_changelist'))
+        self.assertIn('crisis_summary', response.context_data)
+
+
+class AdminChangelistQueryCountTests(TestCase):
+    """Changelist pages must not issue per-row queries"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(self.admin)
+
+    def _populate(self, rows):
+        resources = [
+            MentalHealthResource.objects.create(
+                title=f'Resource {i}', description='help', resource_type='hotline'
+            )
+            for i in range(3)
+        ]
+        for i in range(rows):
+            user = User.objects.create_user(f'student{i}')
+            conversation = Conversation.objects.create(
+                user=user, session_id=f'session-{i}', user_message='hello', bot_response='hi'
+            )
+            ChatFeedback.objects.create(conversation=conversation, feedback_type='thumbs', is_helpful=True)
+            trigger = MentalHealthTrigger.objects.create(trigger_phrase=f'phrase {i}', concern_level='high')
+            trigger.suggested_resources.set(resources)
+            interaction = MentalHealthInteraction.objects.create(
+                conversation=conversation, user=user, session_id=f'session-{i}', concern_level='crisis'
+            )
+            CrisisAlert.objects.create(
+                mental_health_interaction=interaction, alert_message='alert', acknowledged_by=self.admin
+            )
+            FAQ.objects.create(question=f'Question {i}?', answer='Answer', created_by=user)
+
+    def _count_queries(self, model, per_page):
+        model_admin = admin.site._registry[model]
+        original = model_admin.list_per_page
+        model_admin.list_per_page = per_page
+        url = reverse(f'admin:chat_{model._meta.model_name}_changelist')
+        try:
+            self.client.get(url)  # warm cached summaries and session
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            return len(ctx.captured_queries)
+        finally:
+            model_admin.list_per_page = original
+
+    def test_query_count_is_independent_of_page_size(self):
+        self._populate(12)
+        for model in [Conversation, ChatSession, MentalHealthTrigger, MentalHealthInteraction, CrisisAlert, FAQ]:
+            with self.subTest(model=model.__name__):
+                self.assertEqual(self._count_queries(model, 2), self._count_queries(model, 12))
+
+
+class AnalyticsRollupTests(TestCase):
+    def _conversation(self, when, **kwargs):
+        conversation = Conversation.objects.create(
+            session_id='s1', user_message='hello', bot_response='hi', **kwargs
+        )
+        Conversation.objects.filter(id=conversation.id).update(timestamp=when)
+        return conversation
+
+    def test_incremental_rollup_only_recomputes_new_days(self):
+        day_one = timezone.now() - timedelta(days=2)
+        day_two = timezone.now() - timedelta(days=1)
+        first = self._conversation(day_one, intent='greet', detected_language='en')
+        self._conversation(day_one, intent='greet', detected_language='sn', is_fallback=True)
+        ChatFeedback.objects.create(conversation=first, feedback_type='thumbs', is_helpful=True)
+
+        self.assertEqual(rollup_analytics(), 1)
+        row = ChatAnalytics.objects.get(date=timezone.localdate(day_one))
+        self.assertEqual(row.total_conversations, 2)
+        self.assertEqual(row.fallback_responses, 1)
+        self.assertEqual(row.successful_responses, 1)
+        self.assertEqual(row.shona_conversations, 1)
+        self.assertEqual(row.positive_feedback, 1)
+        self.assertEqual(row.top_intents, {'greet': 2})
+
+        self._conversation(day_two, intent='ask_admission')
+        self.assertEqual(rollup_analytics(), 1)
+        self.assertEqual(rollup_analytics(), 0)
+        self.assertEqual(ChatAnalytics.objects.count(), 2)
+
+    def test_changed_feedback_is_rolled_up(self):
+        day = timezone.now() - timedelta(days=2)
+        conversation = self._conversation(day)
+        feedback = ChatFeedback.objects.create(conversation=conversation, feedback_type='thumbs', is_helpful=True)
+        rollup_analytics()
+
+        # The student changes their mind: same row, same id
+        feedback.is_helpful = False
+        feedback.save()
+        self.assertEqual(rollup_analytics(), 1)
+        row = ChatAnalytics.objects.get(date=timezone.localdate(day))
+        self.assertEqual((row.positive_feedback, row.negative_feedback), (0, 1))
+        self.assertEqual(rollup_analytics(), 0)
+
+    def test_backfill_recomputes_range(self):
+        when = timezone.now() - timedelta(days=3)
+        self._conversation(when)
+        call_command('rollup_analytics', '--full', stdout=StringIO())
+        row = ChatAnalytics.objects.get(date=timezone.localdate(when))
+        self.assertEqual(row.total_conversations, 1)
+
+        Conversation.objects.all().delete()
+        backfill_analytics(timezone.localdate(when), timezone.localdate())
+        row.refresh_from_db()
+        self.assertEqual(row.total_conversations, 0)
+
+
+class ChatSessionTests(TestCase):
+    def _conversation(self, session_id='s1', **kwargs):
+        return Conversation.objects.create(
+            session_id=session_id, user_message='hello', bot_response='hi', **kwargs
+        )
+
+    def test_session_summary_is_maintained_on_write(self):
+        self._conversation(intent='greet', detected_language='en')
+        self._conversation(intent='mental_health_support', detected_language='sn')
+        self._conversation(intent='nlu_fallback', is_fallback=True)
+
+        session = ChatSession.objects.get(session_id='s1')
+        self.assertEqual(session.turn_count, 3)
+        self.assertEqual(session.fallback_count, 1)
+        self.assertTrue(session.last_is_fallback)
+        self.assertTrue(session.mental_health_flagged)
+        self.assertTrue(session.switched_language)
+        self.assertEqual(session.last_intent, 'nlu_fallback')
+
+    def test_rebuild_matches_incremental_summary(self):
+        self._conversation(intent='greet')
+        self._conversation(intent='ask_admission', detected_language='sn', is_fallback=True)
+        self._conversation(session_id='s2', intent='goodbye')
+        expected = {
+            s.session_id: (s.turn_count, s.languages_used, s.fallback_count, s.last_is_fallback, s.last_intent)
+            for s in ChatSession.objects.all()
+        }
+
+        ChatSession.objects.all().delete()
+        call_command('rebuild_chat_sessions', stdout=StringIO())
+        rebuilt = {
+            s.session_id: (s.turn_count, s.languages_used, s.fallback_count, s.last_is_fallback, s.last_intent)
+            for s in ChatSession.objects.all()
+        }
+        self.assertEqual(rebuilt, expected)
+
+
+class FailingNotifier(CrisisNotifier):
+    attempted_at = []
+
+    def notify(self, alert, event):
+        self.attempted_at.append(time.monotonic())
+        return False
+
+
+@override_settings(
+    CRISIS_DISPATCH_ASYNC=False,
+    CRISIS_DISPATCH_RETRY_SECONDS=0.01,
+    CRISIS_ALERT_RECIPIENTS=['oncall@example.com'],
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+)
+class CrisisDispatchTests(TestCase):
+    def setUp(self):
+        crisis_dispatcher.reset_notifiers()
+        self.conversation = Conversation.objects.create(
+            session_id='crisis-session', user_message='I want to die', bot_response='help'
+        )
+
+    def _raise_alert(self):
+        service = MentalHealthDetectionService()
+        analysis = {
+            'concern_level': 'crisis', 'triggers_found': ['want to die'],
+            'confidence': 0.9, 'recommended_resources': []
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            interaction = service.create_mental_health_interaction(
+                self.conversation, None, 'crisis-session', analysis
+            )
+        return CrisisAlert.objects.get(mental_health_interaction=interaction)
+
+    def test_alert_is_pushed_to_dashboards_and_notifier(self):
+        subscriber = crisis_dispatcher.subscribe()
+        try:
+            alert = self._raise_alert()
+        finally:
+            crisis_dispatcher.unsubscribe(subscriber)
+
+        event = subscriber.get_nowait()
+        self.assertEqual(event['id'], alert.id)
+        self.assertEqual(event['session_id'], 'crisis-session')
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('crisis-session', mail.outbox[0].subject)
+        self.assertIsNotNone(alert.delivered_at)
+        self.assertEqual(alert.delivery_attempts, 1)
+
+    def test_acknowledge_records_time_to_acknowledge(self):
+        alert = self._raise_alert()
+        staff = User.objects.create_user('counselor', is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.post(reverse('acknowledge_crisis_alert', args=[alert.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.json()['time_to_acknowledge'])
+
+        report = crisis_slo_report()
+        self.assertEqual(report['alerts'], 1)
+        self.assertEqual(report['delivery_breaches'], 0)
+        self.assertEqual(report['acknowledge_breaches'], 0)
+
+    @override_settings(CRISIS_ALERT_RECIPIENTS=[])
+    def test_undelivered_alert_is_retried_then_left_undelivered(self):
+        alert = self._raise_alert()
+        self.assertIsNone(alert.delivered_at)
+        self.assertEqual(alert.delivery_attempts, 3)
+
+    @override_settings(CRISIS_ALERT_NOTIFIERS=['chat.tests.FailingNotifier'], CRISIS_DISPATCH_RETRY_SECONDS=0.05)
+    def test_retries_back_off(self):
+        crisis_dispatcher.reset_notifiers()
+        self.addCleanup(crisis_dispatcher.reset_notifiers)
+        FailingNotifier.attempted_at = []
+        self._raise_alert()
+        first, second, third = FailingNotifier.attempted_at
+        self.assertGreaterEqual(second - first, 0.05)
+        self.assertGreaterEqual(third - second, 0.1)
+
+    def test_notifiers_must_implement_notify(self):
+        with self.assertRaises(TypeError):
+            CrisisNotifier()
+
+    @override_settings(CRISIS_ALERT_RECIPIENTS=[], CRISIS_STREAM_HEARTBEAT_SECONDS=0.01)
+    def test_replayed_alert_counts_as_delivered(self):
+        alert = self._raise_alert()
+        self.assertIsNone(alert.delivered_at)
+        self.client.force_login(User.objects.create_user('counselor', is_staff=True))
+        response = self.client.get(reverse('crisis_alert_stream'))
+        self.addCleanup(response.close)  # unsubscribes the dashboard
+        stream = iter(response.streaming_content)
+        next(stream)  # retry interval
+        self.assertIn(f'id: {alert.id}', next(stream).decode())
+        next(stream, None)  # resume past the replayed event
+        alert.refresh_from_db()
+        self.assertIsNotNone(alert.delivered_at)
+        self.assertEqual(crisis_slo_report()['delivery_breaches'], 0)
+
+    def _connect_with_alert(self, alert_after_subscribing):
+        """Open the stream, raising an alert just before or after it subscribes"""
+        subscribe = crisis_dispatcher.subscribe
+        raised = []
+
+        def subscribe_with_alert():
+            if not alert_after_subscribing:
+                raised.append(self._raise_alert())
+            subscriber = subscribe()
+            if alert_after_subscribing:
+                raised.append(self._raise_alert())  # lands in the queue and in the backlog
+            return subscriber
+
+        self.client.force_login(User.objects.create_user('counselor', is_staff=True))
+        with mock.patch.object(crisis_dispatcher, 'subscribe', side_effect=subscribe_with_alert):
+            response = self.client.get(reverse('crisis_alert_stream'))
+        self.addCleanup(response.close)
+        stream = iter(response.streaming_content)
+        return raised[0], [next(stream).decode() for _ in range(3)]
+
+    @override_settings(CRISIS_STREAM_HEARTBEAT_SECONDS=0.01)
+    def test_alert_raised_while_connecting_is_shown(self):
+        alert, events = self._connect_with_alert(alert_after_subscribing=False)
+        self.assertIn(f'id: {alert.id}', events[1])
+
+    @override_settings(CRISIS_STREAM_HEARTBEAT_SECONDS=0.01)
+    def test_alert_in_backlog_and_queue_is_shown_once(self):
+        alert, events = self._connect_with_alert(alert_after_subscribing=True)
+        self.assertIn(f'id: {alert.id}', events[1])
+        self.assertEqual(events[2], ': keep-alive\n\n')
+
+
+class FAQSearchTests(TestCase):
+    def setUp(self):
+        self.faq = FAQ.objects.create(
+            question='When does registration close?', answer='Registration closes on 30 January.',
+            keywords='registration, deadline'
+        )
+
+    def test_returns_best_match_with_score(self):
+        response = self.client.get(reverse('faq_search'), {'q': 'when does registration close'})
+        data = response.json()
+        self.assertEqual(data['faq_id'], self.faq.id)
+        self.assertGreater(data['score'], 0.7)
+
+        # Searching does not count as serving the FAQ
+        self.faq.refresh_from_db()
+        self.assertEqual(self.faq.usage_count, 0)
+
+    def test_keyword_match_and_miss(self):
+        data = self.client.get(reverse('faq_search'), {'q': 'what is the registration fee'}).json()
+        self.assertEqual(data['faq_id'], self.faq.id)
+        data = self.client.get(reverse('faq_search'), {'q': 'library hours'}).json()
+        self.assertIsNone(data['answer'])
+        self.assertEqual(self.client.get(reverse('faq_search')).status_code, 400)
+
+
+class IntentClassifierTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.model_path = os.path.join(cls.tmp.name, 'intent_classifier.npz')
+        texts, labels = load_nlu_examples()
+        IntentClassifier.train(texts, labels, load_direct_responses()).save(cls.model_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+        super().tearDownClass()
+
+    def _chat(self, message):
+        with override_settings(INTENT_CLASSIFIER_PATH=self.model_path), \
+                mock.patch.object(views.translator, 'detect_language_with_status', return_value=('en', False)), \
+                mock.patch.object(views.requests, 'post', side_effect=views.requests.ConnectionError) as rasa:
+            response = self.client.post(
+                reverse('multilingual_chat'), {'message': message}, content_type='application/json'
+            )
+        return response.json(), rasa
+
+    def test_greeting_is_answered_without_rasa(self):
+        data, rasa = self._chat('hello')
+        rasa.assert_not_called()
+        self.assertEqual(data['source'], 'intent_classifier')
+        self.assertEqual(data['intent'], 'greet')
+        self.assertEqual(data['response'], 'Hello! How can I assist you today at WUA?')
+        self.assertEqual(Conversation.objects.get().intent, 'greet')
+
+    def test_other_intents_still_go_to_rasa(self):
+        _, rasa = self._chat('what are the tuition fees for this semester')
+        rasa.assert_called_once()
+
+    def test_message_is_classified_once(self):
+        with mock.patch.object(IntentClassifier, 'predict', autospec=True,
+                               side_effect=IntentClassifier.predict) as predict:
+            _, rasa = self._chat('how much are the fees')
+            rasa.assert_called_once()
+            self.assertEqual(predict.call_count, 1)
+
+            # Past INTENT_CLASSIFIER_MAX_WORDS neither check runs the model
+            predict.reset_mock()
+            self._chat('could you please tell me how much the fees are for this semester')
+            predict.assert_not_called()
+
+    def test_trains_from_rasa_data(self):
+        texts, labels = load_nlu_examples()
+        self.assertIn('hello', texts)
+        self.assertIn('my name is student name', texts)
+        self.assertEqual(load_direct_responses()['thank_you'], "You're welcome! Happy to help.")
+        self.assertEqual(len(texts), len(labels))
+
+
+class TranslationCatalogTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'catalog.json')
+        self.calls = []
+
+    def translate(self, text, language):
+        self.calls.append(text)
+        return f'[{language}] {text}'
+
+    def test_extracts_domain_action_and_system_strings(self):
+        messages = extract_messages()
+        self.assertIn('Hello! How can I assist you today at WUA?', messages)
+        self.assertIn('Admissions Office: admissions@wua.ac.zw', messages)
+        self.assertTrue(any(m.startswith('**Fees & Payment**') for m in messages))
+        self.assertIn(CONNECTION_ERROR_MESSAGE, messages)
+
+    def test_compile_only_translates_new_strings_and_applies_overrides(self):
+        overrides = {'sn': {'Goodbye!': 'Chisarai!'}}
+        first, translated = compile_catalog(['Hello', 'Goodbye!'], ['sn'], self.translate, overrides=overrides)
+        self.assertEqual((translated, self.calls), (1, ['Hello']))
+
+        second, translated = compile_catalog(
+            ['Hello', 'Goodbye!', 'Thanks'], ['sn'], self.translate, previous=first, overrides=overrides
+        )
+        self.assertEqual((translated, self.calls), (1, ['Hello', 'Thanks']))
+        self.assertEqual(second['version'], 2)
+        self.assertEqual(second['languages']['sn']['Goodbye!']['text'], 'Chisarai!')
+
+    def test_cataloged_rasa_reply_skips_the_translator(self):
+        catalog, _ = compile_catalog(['Hello! How can I assist you today at WUA?'], ['sn'], self.translate)
+        save_catalog(catalog, self.path)
+
+        rasa_reply = mock.Mock(status_code=200)
+        rasa_reply.json.return_value = [{'text': 'Hello! How can I assist you today at WUA?'}]
+        with mock.patch.object(views, 'translation_catalog', TranslationCatalog(self.path)), \
+                mock.patch.object(views.translator, 'detect_language_with_status', return_value=('sn', False)), \
+                mock.patch.object(views.translator, 'translate_with_status', return_value=('mhoro', False)) as translate_text, \
+                mock.patch.object(views.requests, 'post', return_value=rasa_reply):
+            response = self.client.post(
+                reverse('multilingual_chat'), {'message': 'mhoro'}, content_type='application/json'
+            )
+
+        self.assertEqual(response.json()['response'], '[sn] Hello! How can I assist you today at WUA?')
+        # Only the inbound message was machine-translated
+        translate_text.assert_called_once_with('mhoro', 'en', timeout=mock.ANY)
+
+
+class StubTranslation:
+    def __init__(self, text, src='sn'):
+        self.text = text
+        self.src = src
+
+
+@override_settings(TRANSLATOR_RATE_LIMIT_ENABLED=False)
+class TranslatorDeadlineTests(TestCase):
+    def _client(self, delays, timeout=0.2):
+        """Client whose successive calls take the given number of seconds"""
+        client = DeadlineTranslatorClient(timeout=timeout, max_workers=4, hedge_min_samples=5)
+        delays = iter(delays)
+        calls = []
+
+        def translate(text, dest='en', src='auto'):
+            calls.append(text)
+            time.sleep(next(delays))
+            return StubTranslation(f'{dest}:{text}')
+
+        def detect(text):
+            time.sleep(next(delays))
+            return mock.Mock(lang='sn')
+
+        client._translator = lambda: mock.Mock(translate=translate, detect=detect)
+        return client, calls
+
+    def test_hard_deadline(self):
+        client, _ = self._client([1.0])
+        started = time.monotonic()
+        with self.assertRaises(TranslationTimeout):
+            client.call('translate', 'mhoro', dest='en')
+        self.assertLess(time.monotonic() - started, 0.5)
+
+    def test_slow_call_is_hedged_after_p95(self):
+        client, calls = self._client([1.0, 0.0], timeout=0.5)
+        for _ in range(5):
+            client.latency.record(0.02)
+
+        started = time.monotonic()
+        result = client.call('translate', 'mhoro', dest='en')
+        self.assertEqual(result.text, 'en:mhoro')
+        self.assertEqual(len(calls), 2)
+        self.assertLess(time.monotonic() - started, 0.3)
+
+    def test_timeouts_degrade_to_the_original_text(self):
+        client, _ = self._client([1.0, 1.0])
+        multilingual = MultilingualTranslator()
+        multilingual.client = client
+        self.assertEqual(multilingual.translate_with_status('Hello', 'sn'), ('Hello', True))
+        self.assertEqual(multilingual.detect_language_with_status('mhoro shamwari'), ('sn', True))
+
+
+class CodeSwitchedTranslationTests(TestCase):
+    def setUp(self):
+        self.translator = MultilingualTranslator()
+        self.calls = []
+
+        def translate(text, language, timeout=None):
+            self.calls.append(text)
+            return text.replace('ndinoda kuziva', 'I want to know').replace('ndapota', 'please'), False
+
+        patcher = mock.patch.object(self.translator, 'translate_with_status', side_effect=translate)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_spans_cover_the_message(self):
+        message = 'ndinoda kuziva about the ICT201 exam timetable'
+        spans = tag_spans(message)
+        self.assertEqual([span.language for span in spans], ['sn', 'en'])
+        self.assertEqual(''.join(span.text for span in spans), message)
+
+    def test_only_shona_runs_are_translated(self):
+        text, degraded = self.translator.translate_to_english_with_status(
+            'ndinoda kuziva about the ICT201 exam, ndapota', 'sn'
+        )
+        self.assertEqual(text, 'I want to know about the ICT201 exam, please')
+        self.assertFalse(degraded)
+        # One request carrying just the Shona runs
+        self.assertEqual(self.calls, ['ndinoda kuziva\nndapota'])
+
+    def test_english_sentences_stay_english(self):
+        sentences = ['Is anyone here?', 'My lecturer was rude to me',
+                     'I want to change my major to finance', 'Can I take a make up exam']
+        with mock.patch.object(self.translator.client, 'call', side_effect=TranslationTimeout):
+            for sentence in sentences:
+                with self.subTest(sentence=sentence):
+                    self.assertFalse(self.translator._is_likely_shona(sentence))
+                    # The degraded path falls back to the local check
+                    self.assertEqual(self.translator.detect_language_with_status(sentence), ('en', True))
+                    self.assertEqual(
+                        self.translator.translate_to_english_with_status(sentence, 'en'), (sentence, False)
+                    )
+        self.assertEqual(self.calls, [])
+        self.assertTrue(self.translator._is_likely_shona('ndinoda kuziva nezve bvunzo'))
+
+    def test_english_message_is_not_sent(self):
+        text, _ = self.translator.translate_to_english_with_status('When does the library open?', 'en')
+        self.assertEqual(text, 'When does the library open?')
+        self.assertEqual(self.calls, [])
+
+
+@override_settings(TRANSLATOR_CHUNK_MAX_CHARS=40)
+class ChunkedTranslationTests(TestCase):
+    reply = (
+        '1. Library opening hours\nMonday to Friday\n\n'
+        '2. Fees office\nPay at the bursary\n\n'
+        '3. Student portal\nReset your password online'
+    )
+
+    def setUp(self):
+        cache.clear()
+        self.translator = MultilingualTranslator()
+        self.calls = []
+
+        def translate(text, language, timeout=None):
+            self.calls.append(text)
+            time.sleep(0.2)
+            return text.upper(), False
+
+        patcher = mock.patch.object(self.translator, 'translate_with_status', side_effect=translate)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_split_merges_short_paragraphs_and_round_trips(self):
+        chunks = split_chunks('Hi\n\nThere\n\n' + 'x' * 50, 40)
+        self.assertEqual([chunk for chunk, _ in chunks], ['Hi\n\nThere', 'x' * 50])
+        self.assertEqual(''.join(c + sep for c, sep in chunks), 'Hi\n\nThere\n\n' + 'x' * 50)
+
+    def test_chunks_are_translated_concurrently_in_order(self):
+        started = time.monotonic()
+        (text,), degraded = self.translator.translate_many_with_status([self.reply], 'sn')
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(text, self.reply.upper())
+        self.assertFalse(degraded)
+        self.assertEqual(len(self.calls), 3)
+
+    def test_chunks_are_cached_independently(self):
+        self.translator.translate_many_with_status([self.reply], 'sn')
+        changed = self.reply.replace('online', 'at the help desk')
+        (text,), _ = self.translator.translate_many_with_status([changed], 'sn')
+        self.assertEqual(text, changed.upper())
+        self.assertEqual(self.calls[3:], ['3. Student portal\nReset your password at the help desk'])
+
+
+class PretranslationTests(TestCase):
+    def setUp(self):
+        self.faqs = [
+            FAQ.objects.create(question=f'Question {i}?', answer=f'Answer {i}.', category='General')
+            for i in range(5)
+        ]
+        self.resource = MentalHealthResource.objects.create(
+            title='Campus Counselling', description='Free counselling for students', resource_type='campus'
+        )
+        self.calls = []
+
+    def translate(self, text, language):
+        self.calls.append(text)
+        # The second FAQ's answer fails, as if the service timed out
+        return None if text == 'Answer 1.' else f'[{language}] {text}'
+
+    def test_translates_in_batches_and_resumes(self):
+        created, updated, failed = pretranslate_faqs('sn', batch_size=2, workers=3, translate=self.translate)
+        self.assertEqual((created, updated, failed), (4, 0, 1))
+        translation = FAQ.objects.get(translated_from=self.faqs[0])
+        self.assertEqual((translation.language, translation.question), ('sn', '[sn] Question 0?'))
+
+        # A re-run only retries what is still missing
+        self.calls.clear()
+        created, _, failed = pretranslate_faqs('sn', translate=self.translate)
+        self.assertEqual((created, failed), (0, 1))
+        self.assertEqual(self.calls, ['Question 1?', 'Answer 1.'])
+
+    def test_edited_source_refreshes_its_translation(self):
+        pretranslate_faqs('sn', translate=self.translate)
+        FAQ.objects.filter(pk=self.faqs[0].pk).update(answer='New answer.', updated_at=timezone.now())
+        _, updated, _ = pretranslate_faqs('sn', translate=self.translate)
+        self.assertEqual(updated, 1)
+        self.assertEqual(FAQ.objects.get(translated_from=self.faqs[0]).answer, '[sn] New answer.')
+
+    def test_resource_descriptions(self):
+        self.assertEqual(pretranslate_resources('sn', translate=self.translate), (1, 0))
+        self.resource.refresh_from_db()
+        self.assertEqual(self.resource.description_sn, '[sn] Free counselling for students')
+        text = MentalHealthDetectionService()._format_single_resource(self.resource, 'sn')
+        self.assertIn('[sn] Free counselling for students', text)
+
+    def test_edited_resource_description_is_retranslated(self):
+        pretranslate_resources('sn', translate=self.translate)
+        self.resource.refresh_from_db()
+        self.resource.description = 'Call 0800 123 456 for counselling'
+        self.resource.save()
+        # The old Shona text is not shown while it is out of date
+        text = MentalHealthDetectionService()._format_single_resource(self.resource, 'sn')
+        self.assertIn('Call 0800 123 456', text)
+        self.assertNotIn('Free counselling', text)
+
+        self.assertEqual(pretranslate_resources('sn', translate=self.translate), (1, 0))
+        self.resource.refresh_from_db()
+        self.assertEqual(self.resource.localized_description('sn'), '[sn] Call 0800 123 456 for counselling')
+        self.assertEqual(pretranslate_resources('sn', translate=self.translate), (0, 0))
+
+    def test_translations_follow_their_source(self):
+        source = self.faqs[0]
+        source.keywords = 'question, zero'
+        source.save()
+        pretranslate_faqs('sn', translate=self.translate)
+        translation = FAQ.objects.get(translated_from=source)
+        self.assertEqual(translation.keywords, 'question, zero')
+
+        source.is_active = False
+        source.keywords = 'question'
+        source.save()
+        translation.refresh_from_db()
+        self.assertEqual((translation.is_active, translation.keywords), (False, 'question'))
+        # Even when the source is switched off without signals
+        FAQ.objects.filter(pk=source.pk).update(is_active=True)
+        FAQ.objects.filter(pk=translation.pk).update(is_active=True)
+        FAQ.objects.filter(pk=source.pk).update(is_active=False)
+        self.assertNotEqual(views.find_faq_match(translation.question, 'sn')[0], translation)
+
+
+class NormalizedMessageTests(TestCase):
+    def test_variants_share_a_fingerprint(self):
+        a = NormalizedMessage('  Library   HOURS?')
+        b = NormalizedMessage('library hours')
+        self.assertEqual(a.tokens, ('library', 'hours'))
+        self.assertEqual(a.fingerprint, b.fingerprint)
+        self.assertIn('lib', a.char_ngrams)
+        self.assertEqual(NormalizedMessage('Ｃａｆé’s').text, "cafe's")
+
+    def test_phrases_match_whole_words(self):
+        message = NormalizedMessage("I've been thinking about self-harm, I can't cope")
+        self.assertTrue(message.has_phrase('self harm'))
+        self.assertTrue(message.has_phrase("can't"))
+        self.assertFalse(message.has_phrase('harm myself'))
+        self.assertFalse(NormalizedMessage('pillsbury').has_phrase('pills'))
+
+    def test_chat_stages_share_one_normalized_message(self):
+        analyze = mock.Mock(return_value={'concern_level': 'none'})
+        with mock.patch.object(MentalHealthDetectionService, 'analyze_message', analyze), \
+                mock.patch.object(views, 'check_faq_match', return_value='Open 8am to 8pm') as faq, \
+                mock.patch.object(views.translator, 'detect_language_with_status',
+                                  return_value=('en', False)) as detect:
+            self.client.post(
+                reverse('multilingual_chat'), {'message': 'Library hours?'}, content_type='application/json'
+            )
+        message = detect.call_args.args[0]
+        self.assertIsInstance(message, NormalizedMessage)
+        self.assertIs(analyze.call_args.args[0], message)
+        self.assertIs(faq.call_args.args[0], message)
+
+
+class FuzzyCrisisKeywordTests(TestCase):
+    def setUp(self):
+        invalidate_keyword_indexes()
+        self.addCleanup(invalidate_keyword_indexes)
+        self.service = MentalHealthDetectionService()
+
+    def test_misspelled_crisis_phrases_are_caught(self):
+        for message in ['I want to kil myself', 'thinking about suicde', 'wnat to die']:
+            with self.subTest(message=message):
+                self.assertEqual(self.service.analyze_message(message)['concern_level'], 'crisis')
+        self.assertEqual(self.service.analyze_message('ndoda kuzviurya', 'sn')['concern_level'], 'crisis')
+        self.assertEqual(self.service.analyze_message('so depresed lately')['concern_level'], 'high')
+
+    def test_ordinary_words_are_not_typos(self):
+        for message in ['I keep putting my bills along the shelf', 'fill the form yourself',
+                        'I feel hopeful about the exams']:
+            with self.subTest(message=message):
+                self.assertEqual(self.service.analyze_message(message)['concern_level'], 'none')
+
+    def test_new_trigger_is_indexed_immediately(self):
+        self.assertEqual(self.service.analyze_message('I am failng all my exams')['concern_level'], 'none')
+        MentalHealthTrigger.objects.create(trigger_phrase='failing all my exams', concern_level='high')
+        result = self.service.analyze_message('I am failng all my exams')
+        self.assertEqual(result['concern_level'], 'high')
+        self.assertEqual(result['triggers_found'], ['failing all my exams'])
+
+    def test_matched_triggers_are_fetched_in_one_query(self):
+        retired, second, third = [
+            MentalHealthTrigger.objects.create(trigger_phrase=phrase, concern_level='high', is_active=active)
+            for phrase, active in [('failing all my exams', False), ('cannot cope', True), ('so alone', True)]
+        ]
+        with self.assertNumQueries(1):
+            trigger = self.service._fuzzy_trigger({'triggers': [retired.pk, third.pk, second.pk]})
+        self.assertEqual(trigger, third)
+        with self.assertNumQueries(0):
+            self.assertIsNone(self.service._fuzzy_trigger({}))
+
+    def test_lookup_stays_under_a_millisecond(self):
+        index = get_keyword_index('en', lambda: self.service._fuzzy_keywords('en'))
+        message = NormalizedMessage(
+            'hello I have been feeling really down lately and I cannot focus on my studies at the '
+            'university library, sometimes I think about suicde and I do not know who to talk to'
+        )
+        runs = 200
+        started = time.perf_counter()
+        for _ in range(runs):
+            matches = index.search(message)
+        self.assertLess((time.perf_counter() - started) / runs, 0.001)
+        self.assertEqual([match.keyword.phrase for match in matches], ['suicide'])
+
+
+class LongMessageTests(TestCase):
+    FILLER = 'the lecture notes for week {} cover databases and networking topics '
+
+    def setUp(self):
+        invalidate_keyword_indexes()
+        self.addCleanup(invalidate_keyword_indexes)
+        self.service = MentalHealthDetectionService()
+
+    def _filler(self, chars):
+        text, week = '', 0
+        while len(text) < chars:
+            text += self.FILLER.format(week)
+            week += 1
+        return text[:chars].rsplit(' ', 1)[0]
+
+    def _post(self, message):
+        with mock.patch.object(views.translator, 'detect_language_with_status', return_value=('en', False)), \
+                mock.patch.object(views.requests, 'post', side_effect=views.requests.ConnectionError) as rasa:
+            response = self.client.post(
+                reverse('multilingual_chat'), {'message': message}, content_type='application/json'
+            )
+        return response, rasa
+
+    @override_settings(MENTAL_HEALTH_SCAN_WINDOW_TOKENS=20)
+    def test_phrase_across_a_window_boundary_is_caught(self):
+        words = ['notes'] * 60
+        words[19:21] = ['kill', 'myself']  # last token of the first window, first of the next
+        self.assertEqual(self.service.analyze_message(' '.join(words))['concern_level'], 'crisis')
+        self.assertEqual(self.service.analyze_message(' '.join(['notes'] * 60))['concern_level'], 'none')
+
+    @override_settings(CHAT_MAX_MESSAGE_CHARS=500)
+    def test_overlong_message_is_screened_then_rejected(self):
+        response, rasa = self._post(self._filler(3000))
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(response.json()['max_length'], 500)
+        rasa.assert_not_called()
+
+        # A crisis phrase past the limit is still answered with support
+        response, _ = self._post(self._filler(3000) + ' and I want to end my life')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['concern_level'], 'crisis')
+
+    @override_settings(CHAT_MAX_MESSAGE_CHARS=500)
+    def test_overlong_message_language_is_detected_locally(self):
+        for message, language in [(self._filler(3000), 'en'), ('ndinoda kubatsirwa nekosi ' * 40, 'sn')]:
+            with mock.patch.object(views.translator, 'detect_language_with_status') as detect:
+                response = self.client.post(
+                    reverse('multilingual_chat'), {'message': message}, content_type='application/json'
+                )
+            self.assertEqual(response.status_code, 413)
+            self.assertEqual(response.json()['detected_language'], language)
+            detect.assert_not_called()
+
+    @override_settings(CHAT_MAX_MESSAGE_CHARS=500)
+    def test_chat_input_shows_the_limit(self):
+        self.assertContains(self.client.get(reverse('chatbot')), 'maxlength="500"')
+
+    def test_long_message_skips_faq_similarity(self):
+        for i in range(50):
+            FAQ.objects.create(question=f'When is the week {i} lecture?', answer='Mondays')
+        with mock.patch.object(views, 'SequenceMatcher', wraps=views.SequenceMatcher) as matcher:
+            self.assertEqual(views.find_faq_match(self._filler(1500), 'en'), (None, 0.0))
+        matcher.assert_not_called()
+        with mock.patch.object(views, 'SequenceMatcher', wraps=views.SequenceMatcher) as matcher:
+            faq, _ = views.find_faq_match('When is the week 7 lecture', 'en')
+        self.assertEqual(faq.question, 'When is the week 7 lecture?')
+        self.assertLess(matcher.call_count, 50)
+
+    def test_cpu_time_stops_growing_past_the_scan_limit(self):
+        self._post('warm up')  # keyword index, sessions and templates
+
+        def cpu_time(chars):
+            message = self._filler(chars)
+            started = time.process_time()
+            response, _ = self._post(message)
+            self.assertEqual(response.status_code, 413)
+            return time.process_time() - started
+
+        at_limit = cpu_time(20000)
+        ten_times_over = cpu_time(200000)
+        self.assertLess(ten_times_over, 2 * at_limit + 0.05)
+
+
+class SingleFlightTests(TestCase):
+    def _start(self, flight, key, func, results, timeout=None):
+        def run():
+            try:
+                results.append(flight.do(key, func, timeout))
+            except Exception as e:
+                results.append(e)
+        thread = threading.Thread(target=run)
+        thread.start()
+        self.addCleanup(thread.join, 5)
+        return thread
+
+    def _wait_for_waiters(self, flight, count):
+        for _ in range(500):
+            if flight.shared >= count:
+                return
+            time.sleep(0.01)
+        self.fail('callers never joined the flight')
+
+    def test_concurrent_callers_share_one_call(self):
+        flight, release, calls, results = SingleFlight(), threading.Event(), [], []
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return 'Open 8am to 10pm'
+
+        threads = [self._start(flight, 'library hours', compute, results)]
+        while not calls:
+            time.sleep(0.01)
+        threads += [self._start(flight, 'library hours', compute, results) for _ in range(3)]
+        self._wait_for_waiters(flight, 3)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(results), [('Open 8am to 10pm', False)] + [('Open 8am to 10pm', True)] * 3)
+        self.assertEqual(flight.in_flight(), 0)
+        # Finished calls are not cached
+        self.assertEqual(flight.do('library hours', lambda: 'changed'), ('changed', False))
+
+    def test_errors_and_timeouts_reach_waiters(self):
+        flight, release, results = SingleFlight(), threading.Event(), []
+
+        def fail():
+            release.wait(5)
+            raise ConnectionError('rasa down')
+
+        leader = self._start(flight, 'key', fail, results)
+        while not flight.in_flight():
+            time.sleep(0.01)
+        with self.assertRaises(SingleFlightTimeout):
+            flight.do('key', fail, timeout=0.01)
+        waiter = self._start(flight, 'key', fail, results)
+        self._wait_for_waiters(flight, 2)
+        release.set()
+        leader.join(5)
+        waiter.join(5)
+        self.assertEqual([type(result) for result in results], [ConnectionError, ConnectionError])
+
+
+class SingleFlightChatTests(TransactionTestCase):
+    def test_identical_questions_share_one_rasa_call(self):
+        flight = SingleFlight()
+        arrived, release = threading.Semaphore(0), threading.Event()
+        rasa_reply = mock.Mock(status_code=200)
+        rasa_reply.json.return_value = [{'text': 'The fees are listed on the bursary page.'}]
+
+        def post(*args, **kwargs):
+            arrived.release()
+            release.wait(5)
+            return rasa_reply
+
+        responses = []
+
+        def ask():
+            responses.append(Client().post(
+                reverse('multilingual_chat'), {'message': 'How much are the fees?'},
+                content_type='application/json'
+            ))
+
+        # The in-memory SQLite test database cannot take concurrent writes
+        write_lock, create = threading.Lock(), Conversation.objects.create
+
+        def create_one_at_a_time(**kwargs):
+            with write_lock:
+                return create(**kwargs)
+
+        with mock.patch.object(views, 'chat_flight', flight), \
+                mock.patch.object(Conversation.objects, 'create', side_effect=create_one_at_a_time), \
+                mock.patch.object(views, 'predict_intent', return_value=('ask_fees_payment', 0.95, None)), \
+                mock.patch.object(views.translator, 'detect_language_with_status', return_value=('en', False)), \
+                mock.patch.object(views.requests, 'post', side_effect=post) as rasa:
+            threads = [threading.Thread(target=ask) for _ in range(3)]
+            threads[0].start()
+            self.assertTrue(arrived.acquire(timeout=5))
+            for thread in threads[1:]:
+                thread.start()
+            for _ in range(500):
+                if flight.shared >= 2:
+                    break
+                time.sleep(0.01)
+            release.set()
+            for thread in threads:
+                thread.join(5)
+
+        self.assertEqual(rasa.call_count, 1)
+        self.assertEqual(
+            [response.json()['response'] for response in responses],
+            ['The fees are listed on the bursary page.'] * 3
+        )
+        # Every asker still has their own conversation record
+        self.assertEqual(Conversation.objects.filter(user_message='How much are the fees?').count(), 3)
+
+
+class TranslationRateLimiterTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'quota.sqlite3')
+        self.now = [1000.0]
+
+    def _limiter(self, rate=2, capacity=2):
+        def sleep(seconds):
+            self.now[0] += seconds
+        return TokenBucketLimiter(self.path, rate, capacity, clock=lambda: self.now[0], sleep=sleep)
+
+    def test_bucket_is_shared_through_the_file(self):
+        # Two limiters on one file behave like two worker processes
+        first, second = self._limiter(), self._limiter()
+        self.assertTrue(first.acquire())
+        self.assertTrue(second.acquire())
+        self.assertFalse(first.acquire(timeout=0))
+        self.assertTrue(second.acquire(timeout=1))
+        self.assertAlmostEqual(self.now[0], 1000.5)
+
+        stats = first.stats()
+        self.assertEqual((stats['acquired'], stats['delayed'], stats['rejected']), (2, 1, 1))
+        self.assertEqual(stats['saturation'], 0.5)
+        first.reset_stats()
+        self.assertEqual(second.stats()['requests'], 0)
+
+    def test_real_clock_counts_only_waits_as_delays(self):
+        limiter = TokenBucketLimiter(self.path, rate=5, capacity=5, clock=time.monotonic)
+        for _ in range(5):
+            self.assertTrue(limiter.acquire())
+        stats = limiter.stats()
+        self.assertEqual((stats['acquired'], stats['delayed'], stats['saturation']), (5, 0, 0.0))
+
+        # The bucket is empty: this one sleeps for its token
+        self.assertTrue(limiter.acquire(timeout=1))
+        # A hedge finding no token is not a rejected request
+        self.assertFalse(limiter.acquire(0, optional=True))
+        stats = limiter.stats()
+        self.assertEqual((stats['acquired'], stats['delayed'], stats['rejected']), (5, 1, 0))
+
+    def test_each_attempt_is_one_transaction(self):
+        limiter = self._limiter(rate=2, capacity=1)
+        statements = []
+        limiter._connection().set_trace_callback(statements.append)
+        self.assertTrue(limiter.acquire())
+        self.assertTrue(limiter.acquire(timeout=1))
+        self.assertFalse(limiter.acquire(timeout=0))
+        # Two attempts for the delayed request, one each for the others
+        self.assertEqual(statements.count('BEGIN IMMEDIATE'), 4)
+        self.assertEqual(statements[-1], 'COMMIT')
+        stats = limiter.stats()
+        self.assertEqual((stats['acquired'], stats['delayed'], stats['rejected']), (1, 1, 1))
+
+    def test_lock_wait_is_capped_by_the_caller_deadline(self):
+        limiter = TokenBucketLimiter(self.path, rate=5, capacity=5)
+        limiter.acquire()
+        # Another worker process holding the write lock
+        other = sqlite3.connect(self.path, isolation_level=None)
+        self.addCleanup(other.close)
+        other.execute('BEGIN IMMEDIATE')
+        started = time.monotonic()
+        self.assertFalse(limiter.acquire(timeout=1, lock_timeout=0.1))
+        self.assertLess(time.monotonic() - started, 1.0)
+        other.execute('ROLLBACK')
+        self.assertTrue(limiter.acquire(timeout=1, lock_timeout=0.1))
+
+    def test_exhausted_quota_degrades_translation(self):
+        limiter = TokenBucketLimiter(self.path, rate=0.01, capacity=1)
+        client = DeadlineTranslatorClient(timeout=0.2, rate_limiter=limiter)
+        client._translator = lambda: mock.Mock(translate=lambda text, dest='en': StubTranslation(text))
+        client.call('translate', 'mhoro', dest='en')
+
+        started = time.monotonic()
+        with self.assertRaises(TranslationRateLimited):
+            client.call('translate', 'mhoro', dest='en')
+        self.assertLess(time.monotonic() - started, 0.1)
+        self.assertEqual(limiter.stats()['rejected'], 1)
+
+
+@override_settings(
+    CHAT_REQUEST_DEADLINE_SECONDS=0.3,
+    CHAT_OPTIONAL_STAGE_MIN_SECONDS=0.2,
+    CHAT_RASA_MIN_SECONDS=0.05,
+    CHAT_DEFERRED_TASKS_ASYNC=False,
+    INTENT_CLASSIFIER_ENABLED=False,
+)
+class RequestDeadlineTests(TestCase):
+    def test_budget_accounting(self):
+        now = [100.0]
+        deadline = RequestDeadline(budget=5, clock=lambda: now[0])
+        now[0] += 4
+        self.assertEqual(deadline.remaining(), 1)
+        self.assertEqual(deadline.timeout(10), 1)
+        self.assertEqual(deadline.timeout(0.5), 0.5)
+        self.assertTrue(deadline.allows('reply_translation', 1))
+        now[0] += 2
+        self.assertTrue(deadline.expired)
+        self.assertFalse(deadline.allows('reply_translation', 1))
+        self.assertEqual(deadline.skipped, ['reply_translation'])
+
+    def _chat(self, translate_delay, rasa_reply=None):
+        def translate(text, language, timeout=None):
+            time.sleep(translate_delay)
+            return 'hello', False
+
+        rasa_response = mock.Mock(status_code=200)
+        rasa_response.json.return_value = rasa_reply or []
+        with mock.patch.object(views.translator, 'detect_language_with_status', return_value=('sn', False)), \
+                mock.patch.object(views.translator, 'translate_with_status', side_effect=translate) as translate_text, \
+                mock.patch.object(views.requests, 'post', return_value=rasa_response) as rasa:
+            response = self.client.post(
+                reverse('multilingual_chat'), {'message': 'mhoro'}, content_type='application/json'
+            )
+        return response.json(), translate_text, rasa
+
+    def test_low_budget_skips_reply_translation(self):
+        data, translate_text, rasa = self._chat(0.15, [{'text': 'Sorry, I did not understand.'}])
+
+        self.assertLessEqual(rasa.call_args.kwargs['timeout'], 0.15)
+        # Only the inbound message was translated; the reply goes out in English
+        translate_text.assert_called_once()
+        self.assertEqual(data['response'], 'Sorry, I did not understand.')
+        self.assertTrue(data['translation_degraded'])
+        # Unanswered logging was deferred, not dropped
+        self.assertEqual(UnansweredQuestion.objects.get().user_message, 'mhoro')
+
+    def test_exhausted_budget_skips_rasa(self):
+        started = time.monotonic()
+        data, _, rasa = self._chat(0.3)
+        rasa.assert_not_called()
+        self.assertEqual(data['error'], 'rasa_connection_error')
+        self.assertLess(time.monotonic() - started, 1.0)
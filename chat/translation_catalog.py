@@ -0,0 +1,226 @@
+"""
+Pre-translated catalog of the bot's static strings.
+
+`python manage.py build_translation_catalog` extracts every fixed reply
+(domain.yml responses, literal texts in the Rasa custom actions and the
+system messages below), machine-translates the ones it has not seen before,
+applies the human overrides in chat/catalog/overrides.json and compiles the
+result into chat/catalog/catalog.json. At runtime a reply is looked up in
+that table before anything is sent to the translator.
+"""
+import ast
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CATALOG_DIR = Path(__file__).resolve().parent / 'catalog'
+DEFAULT_CATALOG_PATH = CATALOG_DIR / 'catalog.json'
+DEFAULT_OVERRIDES_PATH = CATALOG_DIR / 'overrides.json'
+RASA_DIR = Path(settings.BASE_DIR) / 'rasachat'
+
+# System messages produced by the Django views themselves
+FALLBACK_MESSAGE = "I'm sorry, I couldn't understand that. Could you please rephrase your question?"
+CONNECTION_ERROR_MESSAGE = "I'm sorry, I'm having trouble connecting right now. Please try again."
+SYSTEM_MESSAGES = [FALLBACK_MESSAGE, CONNECTION_ERROR_MESSAGE]
+
+
+def catalog_key(text):
+    return (text or '').strip()
+
+
+def source_hash(text):
+    return hashlib.sha1(catalog_key(text).encode('utf-8')).hexdigest()[:12]
+
+
+# ---------------------------------------------------------------------------
+# Extraction
+# ---------------------------------------------------------------------------
+
+def extract_domain_responses(path=None):
+    import yaml
+    with open(path or RASA_DIR / 'domain.yml', encoding='utf-8') as f:
+        domain = yaml.safe_load(f) or {}
+    return [
+        variant['text']
+        for variants in (domain.get('responses') or {}).values()
+        for variant in variants or []
+        if variant.get('text')
+    ]
+
+
+def extract_action_strings(path=None):
+    """
+    Literal reply texts in the custom actions: every constant `text=`
+    argument and the values of the `trained_responses` dict
+    """
+    with open(path or RASA_DIR / 'actions' / 'actions.py', encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+
+    strings = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call):
+            for keyword in node.keywords:
+                if keyword.arg == 'text' and isinstance(keyword.value, ast.Constant) \
+                        and isinstance(keyword.value.value, str):
+                    strings.append(keyword.value.value)
+        elif isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id == 'trained_responses' for target in node.targets
+        ):
+            strings.extend(v for v in ast.literal_eval(node.value).values() if isinstance(v, str))
+    return strings
+
+
+def extract_messages():
+    """Every static bot string, de-duplicated in first-seen order"""
+    seen = {}
+    for text in extract_domain_responses() + extract_action_strings() + SYSTEM_MESSAGES:
+        key = catalog_key(text)
+        if key and key not in seen:
+            seen[key] = None
+    return list(seen)
+
+
+# ---------------------------------------------------------------------------
+# Compiled catalog
+# ---------------------------------------------------------------------------
+
+def load_json(path, default):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+
+def compile_catalog(messages, languages, translate, previous=None, overrides=None):
+    """
+    Build the catalog dict. Entries already in `previous` for an unchanged
+    source string are reused, so only new strings reach `translate(text, lang)`.
+    Overrides always win. Returns (catalog, number of machine translations)
+    """
+    previous = previous or {}
+    overrides = overrides or {}
+    translated_count = 0
+    compiled = {}
+    for language in languages:
+        old_entries = previous.get('languages', {}).get(language, {})
+        language_overrides = overrides.get(language, {})
+        entries = {}
+        for text in messages:
+            if text in language_overrides:
+                entries[text] = {'text': language_overrides[text], 'source': 'override',
+                                 'hash': source_hash(text)}
+                continue
+            old = old_entries.get(text)
+            if old and old.get('source') == 'machine' and old.get('hash') == source_hash(text):
+                entries[text] = old
+                continue
+            if translate is None:
+                continue
+            try:
+                result = translate(text, language)
+            except Exception as e:
+                logger.error(f"Catalog translation failed for {text[:40]!r}: {e}")
+                continue
+            if result:
+                entries[text] = {'text': result, 'source': 'machine', 'hash': source_hash(text)}
+                translated_count += 1
+        # Overrides for strings no longer extracted are still honoured
+        for text, value in language_overrides.items():
+            entries.setdefault(catalog_key(text), {'text': value, 'source': 'override',
+                                                   'hash': source_hash(text)})
+        compiled[language] = entries
+
+    return {
+        'version': previous.get('version', 0) + 1,
+        'messages': len(messages),
+        'languages': compiled,
+    }, translated_count
+
+
+def save_catalog(catalog, path=DEFAULT_CATALOG_PATH):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(catalog, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+# ---------------------------------------------------------------------------
+# Runtime lookup
+# ---------------------------------------------------------------------------
+
+class TranslationCatalog:
+    """O(1) lookup of pre-translated strings, reloaded when the files change"""
+
+    def __init__(self, catalog_path=None, overrides_path=None, check_interval=5.0):
+        self.catalog_path = catalog_path
+        self.overrides_path = overrides_path
+        self.check_interval = check_interval
+        self.version = 0
+        self._table = {}
+        self._state = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def _paths(self):
+        return (
+            str(self.catalog_path or getattr(settings, 'TRANSLATION_CATALOG_PATH', DEFAULT_CATALOG_PATH)),
+            str(self.overrides_path or DEFAULT_OVERRIDES_PATH),
+        )
+
+    def _current(self):
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return self._table
+
+        paths = self._paths()
+        mtimes = []
+        for path in paths:
+            try:
+                mtimes.append(os.path.getmtime(path))
+            except OSError:
+                mtimes.append(None)
+        state = (paths, tuple(mtimes))
+        if state != self._state:
+            with self._lock:
+                if state != self._state:
+                    self._table, self.version = self._load(*paths)
+                    self._state = state
+        self._checked_at = now
+        return self._table
+
+    def _load(self, catalog_path, overrides_path):
+        try:
+            catalog = load_json(catalog_path, {})
+            overrides = load_json(overrides_path, {})
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not load translation catalog: {e}")
+            return self._table, self.version
+
+        table = {}
+        for language, entries in catalog.get('languages', {}).items():
+            for text, entry in entries.items():
+                table[(text, language)] = entry['text']
+        for language, entries in overrides.items():
+            for text, value in entries.items():
+                table[(catalog_key(text), language)] = value
+        return table, catalog.get('version', 0)
+
+    def lookup(self, text, language):
+        """Pre-translated text, or None if the string is not in the catalog"""
+        if language == 'en':
+            return text
+        return self._current().get((catalog_key(text), language))
+
+
+translation_catalog = TranslationCatalog()
@@ -1,12 +1,178 @@
 from googletrans import Translator, LANGUAGES
 from django.conf import settings
+from django.core.cache import cache
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import hashlib
 import logging
+import re
+import threading
+import time
+
+from .language_spans import looks_shona, tag_spans
+from .normalization import normalize
+from .rate_limiter import translation_rate_limiter
 
 logger = logging.getLogger(__name__)
 
+
+class TranslationTimeout(Exception):
+    """The translation service did not answer within the deadline"""
+
+
+class TranslationRateLimited(TranslationTimeout):
+    """The shared translation quota had no token free within the deadline"""
+
+
+_PARAGRAPH_BREAK_RE = re.compile(r'(\n\s*\n)')
+
+
+def split_chunks(text, max_chars):
+    """
+    Split text at blank lines into (chunk, separator) pairs, merging short
+    neighbouring paragraphs up to max_chars. Joining chunk + separator for
+    every pair gives back the original text
+    """
+    pieces = _PARAGRAPH_BREAK_RE.split(text)
+    paragraphs = list(zip(pieces[0::2], pieces[1::2] + ['']))
+    chunks = []
+    for paragraph, separator in paragraphs:
+        if chunks and chunks[-1][0].strip() and len(chunks[-1][0]) + len(paragraph) <= max_chars:
+            previous, previous_separator = chunks[-1]
+            chunks[-1] = (previous + previous_separator + paragraph, separator)
+        else:
+            chunks.append((paragraph, separator))
+    return chunks
+
+
+def chunk_cache_key(chunk, language):
+    return f"translation:{language}:{hashlib.sha1(chunk.encode('utf-8')).hexdigest()}"
+
+
+class LatencyTracker:
+    """Rolling window of call latencies with percentile lookups"""
+
+    def __init__(self, size=200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+    def __len__(self):
+        return len(self._samples)
+
+
+class DeadlineTranslatorClient:
+    """
+    Runs googletrans calls on a worker pool with a hard deadline. When the
+    first attempt is still running after the observed p95 latency a second,
+    hedged attempt is started and whichever finishes first wins. Every
+    attempt, hedges included, spends a token from the fleet-wide rate limiter.
+    """
+
+    def __init__(self, timeout=None, max_workers=None, hedge_min_samples=None, rate_limiter=None):
+        self.timeout = timeout if timeout is not None else getattr(settings, 'TRANSLATOR_TIMEOUT_SECONDS', 3.0)
+        self.hedge_min_samples = (
+            hedge_min_samples if hedge_min_samples is not None
+            else getattr(settings, 'TRANSLATOR_HEDGE_MIN_SAMPLES', 20)
+        )
+        self.latency = LatencyTracker()
+        self.rate_limiter = rate_limiter or translation_rate_limiter()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or getattr(settings, 'TRANSLATOR_MAX_WORKERS', 8),
+            thread_name_prefix='translator',
+        )
+        self._local = threading.local()
+
+    def _translator(self):
+        # googletrans keeps an HTTP client per Translator, so one per worker thread
+        if not hasattr(self._local, 'translator'):
+            self._local.translator = Translator()
+        return self._local.translator
+
+    def _timed(self, method, *args, **kwargs):
+        started = time.monotonic()
+        result = getattr(self._translator(), method)(*args, **kwargs)
+        self.latency.record(time.monotonic() - started)
+        return result
+
+    def _acquire(self, timeout, deadline, optional=False):
+        if self.rate_limiter is None:
+            return True
+        try:
+            return self.rate_limiter.acquire(
+                timeout, optional=optional, lock_timeout=deadline - time.monotonic()
+            )
+        except Exception as e:
+            # A broken quota file must not take translation down with it
+            logger.error(f"Translation rate limiter unavailable: {e}")
+            return True
+
+    def hedge_after(self):
+        """Seconds to wait before hedging, or None while there is too little history"""
+        if not getattr(settings, 'TRANSLATOR_HEDGING_ENABLED', True) or len(self.latency) < self.hedge_min_samples:
+            return None
+        return self.latency.percentile(95)
+
+    def call(self, method, *args, timeout=None, **kwargs):
+        """
+        Call Translator.<method> with a deadline; raises TranslationTimeout.
+        `timeout` shortens the client's own limit, e.g. to a request's remaining budget
+        """
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        if timeout <= 0:
+            raise TranslationTimeout(f"no time left for translator {method}")
+        deadline = time.monotonic() + timeout
+        # Queue briefly for quota; the wait counts against the deadline
+        max_queue = getattr(settings, 'TRANSLATOR_RATE_LIMIT_MAX_QUEUE_SECONDS', 1.0)
+        if not self._acquire(min(max_queue, timeout), deadline):
+            raise TranslationRateLimited(f"translation quota exhausted for {method}")
+        futures = {self._executor.submit(self._timed, method, *args, **kwargs)}
+
+        hedge_after = self.hedge_after()
+        remaining = deadline - time.monotonic()
+        if hedge_after is not None and hedge_after < remaining:
+            done, _ = wait(futures, timeout=hedge_after)
+            # A hedge is only worth a token if one is free right now
+            if not done and self._acquire(0, deadline, optional=True):
+                logger.info(f"Hedging translator {method} after {hedge_after:.2f}s")
+                futures.add(self._executor.submit(self._timed, method, *args, **kwargs))
+
+        error = None
+        while futures:
+            done, futures = wait(futures, timeout=max(0.0, deadline - time.monotonic()),
+                                 return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                try:
+                    return future.result()
+                except Exception as e:
+                    error = e
+        for future in futures:
+            future.cancel()
+        if error is not None and not futures:
+            raise error
+        raise TranslationTimeout(f"translator {method} exceeded {timeout:.2f}s")
+
+
 class MultilingualTranslator:
     def __init__(self):
-        self.translator = Translator()
+        self.client = DeadlineTranslatorClient()
+        # Separate from the client's pool: chunk tasks block on client calls
+        self._chunk_executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'TRANSLATOR_CHUNK_WORKERS', 4),
+            thread_name_prefix='translator-chunk',
+        )
         self.supported_languages = {
             'en': 'english',
             'sn': 'shona'
@@ -17,68 +183,162 @@ class MultilingualTranslator:
         Detect the language of input text
         Returns 'en' for English, 'sn' for Shona, 'en' as default
         """
+        return self.detect_language_with_status(text)[0]
+
+    def detect_language_with_status(self, text, timeout=None):
+        """
+        Return (language, degraded), where degraded means the service timed out
+        or failed. `text` may be a string or a NormalizedMessage
+        """
+        message = normalize(text)
         try:
             # Clean text for better detection
-            cleaned_text = text.strip()
+            cleaned_text = message.original.strip()
             if not cleaned_text:
-                return 'en'
+                return 'en', False
             
-            detection = self.translator.detect(cleaned_text)
+            detection = self.client.call('detect', cleaned_text, timeout=timeout)
             detected_lang = detection.lang
             
             # Map detected language to our supported languages
             if detected_lang == 'en':
-                return 'en'
+                return 'en', False
             elif detected_lang == 'sn':
-                return 'sn'
+                return 'sn', False
             else:
                 # Check if text contains common Shona words/patterns
-                if self._is_likely_shona(cleaned_text):
-                    return 'sn'
-                return 'en'  # Default to English
+                if self._is_likely_shona(message):
+                    return 'sn', False
+                return 'en', False  # Default to English
                 
         except Exception as e:
-            logger.error(f"Language detection error: {e}")
-            return 'en'  # Default fallback
+            logger.error(f"Language detection error: {type(e).__name__}: {e}")
+            # Degrade to the local word list
+            return ('sn' if self._is_likely_shona(message) else 'en'), True
     
     def _is_likely_shona(self, text):
         """
-        Check for common Shona words/patterns as fallback
-        """
-        shona_indicators = [
-            'mhoro', 'mangwanani', 'masikati', 'manheru', 'ndeipi', 'zvakanaka',
-            'tinotenda', 'pamusoroi', 'hongu', 'kwete', 'sei', 'rinhi', 'ripi',
-            'makadii', 'zita', 'renyu', 'ndiani', 'ndiri', 'ndinoda', 'handina',
-            'mukoma', 'hanzvadzi', 'amai', 'baba', 'mwana', 'mukomana', 'musikana'
-        ]
-        
-        text_lower = text.lower()
-        return any(indicator in text_lower for indicator in shona_indicators)
+        Fallback Shona check: a lexicon word, or a Shona majority of tagged words
+        """
+        return looks_shona(normalize(text).tokens)
     
     def translate_text(self, text, target_language):
         """
         Translate text to target language
         """
+        return self.translate_with_status(text, target_language)[0]
+
+    def translate_with_status(self, text, target_language, timeout=None):
+        """
+        Return (translated text, degraded). On a timeout or error the original
+        text is returned with degraded=True
+        """
         try:
             if not text.strip():
-                return text
+                return text, False
             
-            # Don't translate if already in target language
-            detected_lang = self.detect_language(text)
-            if detected_lang == target_language:
-                return text
-            
-            result = self.translator.translate(
-                text, 
-                src=detected_lang, 
-                dest=target_language
-            )
-            return result.text
+            # One round trip: the service detects the source language itself,
+            # and text already in the target language comes back unchanged
+            result = self.client.call('translate', text, dest=target_language, timeout=timeout)
+            if result.src == target_language:
+                return text, False
+            return result.text, False
             
         except Exception as e:
-            logger.error(f"Translation error: {e}")
-            return text  # Return original text if translation fails
+            logger.error(f"Translation error: {type(e).__name__}: {e}")
+            return text, True  # Return original text if translation fails
     
+    def translate_many_with_status(self, texts, target_language, timeout=None):
+        """
+        Translate several replies paragraph by paragraph. Chunks are cached
+        independently and the uncached ones are translated concurrently, so a
+        long reply costs about as much as its longest chunk. Returns
+        (translated texts in order, degraded)
+        """
+        max_chars = getattr(settings, 'TRANSLATOR_CHUNK_MAX_CHARS', 600)
+        ttl = getattr(settings, 'TRANSLATION_CHUNK_CACHE_TTL', 24 * 60 * 60)
+        split = [split_chunks(text, max_chars) for text in texts]
+
+        translated = {}
+        pending = set()
+        for chunks in split:
+            for chunk, _ in chunks:
+                if not chunk.strip() or chunk in translated or chunk in pending:
+                    continue
+                cached = cache.get(chunk_cache_key(chunk, target_language))
+                if cached is not None:
+                    translated[chunk] = cached
+                else:
+                    pending.add(chunk)
+
+        degraded = False
+        if len(pending) == 1:
+            chunk = pending.pop()
+            translated[chunk], degraded = self.translate_with_status(chunk, target_language, timeout=timeout)
+            if not degraded:
+                cache.set(chunk_cache_key(chunk, target_language), translated[chunk], ttl)
+        elif pending:
+            futures = {
+                self._chunk_executor.submit(self.translate_with_status, chunk, target_language, timeout=timeout): chunk
+                for chunk in pending
+            }
+            done, not_done = wait(futures, timeout=timeout)
+            for future in not_done:
+                future.cancel()
+                degraded = True
+            for future in done:
+                chunk = futures[future]
+                translated[chunk], chunk_degraded = future.result()
+                if chunk_degraded:
+                    degraded = True
+                else:
+                    cache.set(chunk_cache_key(chunk, target_language), translated[chunk], ttl)
+
+        return [
+            ''.join(translated.get(chunk, chunk) + separator for chunk, separator in chunks)
+            for chunks in split
+        ], degraded
+
+    def translate_to_english_with_status(self, text, source_language=None, timeout=None):
+        """
+        Translate only the Shona runs of a possibly code-switched message;
+        English runs pass through untouched. All Shona runs go out in one
+        request, one per line. Returns (text, degraded)
+        """
+        spans = tag_spans(text)
+        shona = [span for span in spans if span.language == 'sn']
+        if shona and not looks_shona(normalize(text).tokens):
+            # Stray Shona-looking words in an English message ("rude", "change")
+            shona = []
+        if not shona:
+            # Nothing the tagger recognises; trust the detector's verdict
+            if source_language in (None, 'en'):
+                return text, False
+            return self.translate_with_status(text, 'en', timeout=timeout)
+        if len(shona) == len(spans):
+            return self.translate_with_status(text, 'en', timeout=timeout)
+
+        translated, degraded = self.translate_with_status(
+            '\n'.join(span.text.strip() for span in shona), 'en', timeout=timeout
+        )
+        if degraded:
+            return text, True
+        lines = translated.split('\n')
+        if len(lines) != len(shona):
+            # Line breaks lost in translation: fall back to the whole message
+            return self.translate_with_status(text, 'en', timeout=timeout)
+
+        lines = iter(lines)
+        parts = []
+        for span in spans:
+            if span.language != 'sn':
+                parts.append(span.text)
+                continue
+            core = span.text.strip()
+            start = span.text.index(core)
+            parts.append(span.text[:start] + next(lines).strip() + span.text[start + len(core):])
+        return ''.join(parts), False
+
     def translate_to_user_language(self, text, user_input):
         """
         Translate response text to match user's input language
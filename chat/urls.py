@@ -7,5 +7,8 @@ urlpatterns = [
     path('multilingual-chat/', views.multilingual_chat, name='multilingual_chat'),
     path('submit-feedback/', views.submit_feedback, name='submit_feedback'),
     path('notifications/', views.fetch_notifications, name='notifications'),
+    path('faq-search/', views.faq_search, name='faq_search'),
+    path('crisis-alerts/stream/', views.crisis_alert_stream, name='crisis_alert_stream'),
+    path('crisis-alerts/<int:alert_id>/acknowledge/', views.acknowledge_crisis_alert, name='acknowledge_crisis_alert'),
 
 ]
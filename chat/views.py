@@ -7,22 +7,35 @@ from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.views.decorators.http import require_http_methods
 from django.db.models import Q, F
+from django.http import StreamingHttpResponse
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 import requests
 import json
 import logging
+import queue
 from difflib import SequenceMatcher
 
 from .translator import translator
 from .mental_health_service import MentalHealthDetectionService
+from .crisis_dispatch import crisis_dispatcher, build_alert_event, format_sse, mark_delivered
+from .deadline import RequestDeadline, run_or_defer
+from .intent_classifier import classify_direct_response, predict_intent, session_independent_intent
+from .language_spans import looks_shona
+from .normalization import fold, normalize
+from .singleflight import SingleFlightTimeout, chat_flight, flight_key
+from .translation_catalog import CONNECTION_ERROR_MESSAGE, FALLBACK_MESSAGE, translation_catalog
 from .models import (
     Conversation, ChatFeedback, UnansweredQuestion, FAQ, 
-    MentalHealthResource, MentalHealthInteraction
+    MentalHealthResource, MentalHealthInteraction, CrisisAlert
 )
 
 logger = logging.getLogger(__name__)
 
 def chatbot(request):
-    return render(request, "chat/index.html")
+    return render(request, "chat/index.html", {
+        "max_message_chars": getattr(settings, 'CHAT_MAX_MESSAGE_CHARS', 2000),
+    })
 
 @csrf_exempt
 def multilingual_chat(request):
@@ -30,6 +43,8 @@ def multilingual_chat(request):
     Enhanced multilingual chat endpoint with mental health detection and feedback tracking
     """
     if request.method == "POST":
+        # Time budget shared by every stage of this request
+        deadline = RequestDeadline()
         try:
             # Handle both JSON and form data
             if request.content_type == 'application/json':
@@ -41,18 +56,33 @@ def multilingual_chat(request):
             if not user_message:
                 return JsonResponse({"error": "No message provided"}, status=400)
             
+            # Over-long messages are still screened for mental-health concerns
+            # (up to MENTAL_HEALTH_SCAN_MAX_CHARS) but not translated, matched or sent to Rasa
+            max_chars = getattr(settings, 'CHAT_MAX_MESSAGE_CHARS', 2000)
+            too_long = len(user_message) > max_chars
+            
+            # Canonical form shared by detection, screening and FAQ matching
+            normalized = normalize(user_message[:getattr(settings, 'MENTAL_HEALTH_SCAN_MAX_CHARS', 20000)])
+            
             # Get session ID and user info for tracking
             session_id = request.session.session_key or f"anon_{request.META.get('REMOTE_ADDR', 'unknown')}"
             user = request.user if request.user.is_authenticated else None
             client_ip = get_client_ip(request)
             
             # Detect user's language
-            user_language = translator.detect_language(user_message)
+            if too_long:
+                # Rejected unless it raises a concern: the local word check is enough
+                user_language = 'sn' if looks_shona(normalized.tokens) else 'en'
+                translation_degraded = False
+            else:
+                user_language, translation_degraded = translator.detect_language_with_status(
+                    normalized, timeout=deadline.remaining()
+                )
             logger.info(f"Detected language: {user_language} for message: {user_message}")
             
             # MENTAL HEALTH CHECK - Priority 1 (Highest Priority)
             mental_health_service = MentalHealthDetectionService()
-            mental_health_analysis = mental_health_service.analyze_message(user_message, user_language)
+            mental_health_analysis = mental_health_service.analyze_message(normalized, user_language)
             
             if mental_health_analysis['concern_level'] != 'none':
                 logger.info(f"Mental health concern detected: {mental_health_analysis['concern_level']}")
@@ -92,11 +122,20 @@ def multilingual_chat(request):
                     'mental_health_detected': True,
                     'concern_level': mental_health_analysis['concern_level'],
                     'confidence_score': mental_health_analysis['confidence'],
-                    'source': 'mental_health_support'
+                    'source': 'mental_health_support',
+                    'translation_degraded': translation_degraded
                 })
             
+            if too_long:
+                logger.info(f"Rejected a {len(user_message)}-character message (limit {max_chars})")
+                return JsonResponse({
+                    "error": f"Message too long. Please keep it under {max_chars} characters.",
+                    "max_length": max_chars,
+                    "detected_language": user_language,
+                }, status=413)
+            
             # Check if this is a similar question to existing FAQs - Priority 2
-            faq_response = check_faq_match(user_message, user_language)
+            faq_response = check_faq_match(normalized, user_language)
             if faq_response:
                 # Create conversation record
                 conversation = Conversation.objects.create(
@@ -115,22 +154,83 @@ def multilingual_chat(request):
                     'detected_language': user_language,
                     'conversation_id': conversation.id,
                     'confidence_score': 0.95,
-                    'source': 'faq'
+                    'source': 'faq',
+                    'translation_degraded': translation_degraded
                 })
             
-            # Translate user message to English for Rasa processing (if needed) - Priority 3
-            message_for_rasa = user_message
-            if user_language != 'en':
-                message_for_rasa = translator.translate_text(user_message, 'en')
+            # Translate the Shona parts of the message to English for Rasa - Priority 3.
+            # English in a code-switched message is left as the student wrote it
+            # Students asking the same thing at once share one translation; keyed on
+            # the exact text, since that is what is translated and shown back
+            try:
+                (message_for_rasa, degraded), _ = chat_flight.do(
+                    ('translation', user_message, user_language),
+                    lambda: translator.translate_to_english_with_status(
+                        user_message, user_language, timeout=deadline.remaining()
+                    ),
+                    timeout=deadline.remaining()
+                )
+            except SingleFlightTimeout as e:
+                logger.warning(f"Translation skipped: {e}")
+                message_for_rasa, degraded = user_message, True
+            translation_degraded = translation_degraded or degraded
+            if message_for_rasa != user_message:
                 logger.info(f"Translated for Rasa: {message_for_rasa}")
             
-            # Send to Rasa
+            # Trivial intents (greet, thank_you, goodbye) answered in-process - Priority 4
+            prediction = predict_intent(message_for_rasa)
+            direct = classify_direct_response(prediction)
+            if direct:
+                intent, confidence_score, bot_reply = direct
+                bot_reply, degraded = localize(bot_reply, user_language, deadline)
+                translation_degraded = translation_degraded or degraded
+
+                conversation = Conversation.objects.create(
+                    user=user,
+                    session_id=session_id,
+                    user_message=user_message,
+                    bot_response=bot_reply,
+                    detected_language=user_language,
+                    confidence_score=confidence_score,
+                    intent=intent,
+                    is_fallback=False
+                )
+
+                return JsonResponse({
+                    'response': bot_reply,
+                    'detected_language': user_language,
+                    'original_message': user_message,
+                    'translated_input': message_for_rasa if message_for_rasa != user_message else None,
+                    'conversation_id': conversation.id,
+                    'confidence_score': confidence_score,
+                    'intent': intent,
+                    'is_fallback': False,
+                    'source': 'intent_classifier',
+                    'translation_degraded': translation_degraded
+                })
+
+            # Send to Rasa with whatever is left of the request budget
             try:
-                rasa_response = requests.post(
+                if not deadline.allows('rasa', getattr(settings, 'CHAT_RASA_MIN_SECONDS', 0.5)):
+                    raise requests.exceptions.Timeout("Request deadline reached before the Rasa call")
+                rasa_timeout = deadline.timeout(getattr(settings, 'RASA_TIMEOUT_SECONDS', 10))
+                post_to_rasa = lambda: requests.post(
                     "http://localhost:5005/webhooks/rest/webhook",
                     json={"sender": session_id, "message": message_for_rasa},
-                    timeout=10
+                    timeout=rasa_timeout
                 )
+                if session_independent_intent(prediction):
+                    # Same question, same answer whoever asks: identical concurrent
+                    # messages share one Rasa call (each still gets its own record)
+                    try:
+                        rasa_response, _ = chat_flight.do(
+                            flight_key('rasa', normalize(message_for_rasa), user_language),
+                            post_to_rasa, timeout=rasa_timeout
+                        )
+                    except SingleFlightTimeout as e:
+                        raise requests.exceptions.Timeout(str(e))
+                else:
+                    rasa_response = post_to_rasa()
                 
                 if rasa_response.status_code == 200:
                     rasa_data = rasa_response.json()
@@ -163,19 +263,17 @@ def multilingual_chat(request):
                             intent = metadata.get('intent')
                         
                         # Check if this looks like a fallback response
-                        fallback_phrases = [
-                            "sorry, i did not understand",
-                            "i'm not sure i understand", 
-                            "could you please rephrase",
-                            "i didn't get that",
-                            "i don't understand",
-                            "can you rephrase"
-                        ]
-                        is_fallback = any(phrase in bot_reply.lower() for phrase in fallback_phrases)
+                        normalized_reply = normalize(bot_reply)
+                        is_fallback = any(normalized_reply.has_phrase(phrase) for phrase in FALLBACK_PHRASES)
                         
-                        # Translate bot response to user's language
+                        # Translate bot response to user's language: catalog first,
+                        # the translator only for the parts that are not pre-translated
                         if user_language != 'en':
-                            bot_reply = translator.translate_text(bot_reply, user_language)
+                            localized_parts, degraded = localize_parts(
+                                bot_reply_parts or [bot_reply], user_language, deadline
+                            )
+                            bot_reply = '\n\n'.join(localized_parts)
+                            translation_degraded = translation_degraded or degraded
                             logger.info(f"Translated response: {bot_reply}")
                         
                         # Create conversation record
@@ -192,7 +290,8 @@ def multilingual_chat(request):
                         
                         # If it's a fallback or low confidence, add to unanswered questions
                         if is_fallback or (confidence_score and confidence_score < 0.5):
-                            handle_unanswered_question(
+                            run_or_defer(
+                                deadline, 'unanswered_logging', handle_unanswered_question,
                                 user_message, user_language, session_id,
                                 confidence_score, intent, bot_reply
                             )
@@ -201,11 +300,12 @@ def multilingual_chat(request):
                             'response': bot_reply,
                             'detected_language': user_language,
                             'original_message': user_message,
-                            'translated_input': message_for_rasa if user_language != 'en' else None,
+                            'translated_input': message_for_rasa if message_for_rasa != user_message else None,
                             'conversation_id': conversation.id,
                             'confidence_score': confidence_score,
                             'intent': intent,
-                            'is_fallback': is_fallback
+                            'is_fallback': is_fallback,
+                            'translation_degraded': translation_degraded
                         })
                     else:
                         # Empty response from Rasa - treat as unanswered
@@ -222,7 +322,8 @@ def multilingual_chat(request):
                             is_fallback=True
                         )
                         
-                        handle_unanswered_question(
+                        run_or_defer(
+                            deadline, 'unanswered_logging', handle_unanswered_question,
                             user_message, user_language, session_id,
                             0.0, "empty_response", fallback_msg
                         )
@@ -232,7 +333,8 @@ def multilingual_chat(request):
                             'detected_language': user_language,
                             'conversation_id': conversation.id,
                             'confidence_score': 0.0,
-                            'is_fallback': True
+                            'is_fallback': True,
+                            'translation_degraded': translation_degraded
                         })
                 else:
                     logger.error(f"Rasa server error: {rasa_response.status_code}")
@@ -261,7 +363,8 @@ def multilingual_chat(request):
                     'conversation_id': conversation.id,
                     'error': 'rasa_connection_error',
                     'confidence_score': 0.0,
-                    'is_fallback': True
+                    'is_fallback': True,
+                    'translation_degraded': translation_degraded
                 })
                 
         except json.JSONDecodeError:
@@ -352,37 +455,111 @@ def submit_feedback(request):
         logger.error(f"Feedback submission error: {e}")
         return JsonResponse({'error': 'Failed to submit feedback'}, status=500)
 
+# Bot replies containing any of these are treated as fallbacks
+FALLBACK_PHRASES = [
+    "sorry, i did not understand",
+    "i'm not sure i understand",
+    "could you please rephrase",
+    "i didn't get that",
+    "i don't understand",
+    "can you rephrase",
+]
+
+# Confidence reported for an FAQ found only through its keywords
+FAQ_KEYWORD_MATCH_SCORE = 0.6
+FAQ_SIMILARITY_THRESHOLD = 0.7
+
+
+def could_reach_similarity(length_a, length_b, threshold):
+    """
+    Whether SequenceMatcher.ratio() can exceed threshold for texts of these
+    lengths: at most min(a, b) characters match, so ratio <= 2 min / (a + b)
+    """
+    return 2 * min(length_a, length_b) > threshold * (length_a + length_b)
+
+
+def find_faq_match(user_message, language):
+    """
+    Return (faq, score) for the best matching active FAQ, or (None, 0.0).
+    Question similarity above 0.7 wins; otherwise a keyword hit scores
+    FAQ_KEYWORD_MATCH_SCORE. user_message may be a string or a NormalizedMessage
+    """
+    # A translated copy is never served once its English source is switched off
+    faqs = list(
+        FAQ.objects.filter(language=language, is_active=True).exclude(translated_from__is_active=False)
+    )
+    message = normalize(user_message)
+
+    # SequenceMatcher is quadratic, so only questions whose length could
+    # still beat the best score get compared; a long message skips them all
+    best_faq, best_score = None, FAQ_SIMILARITY_THRESHOLD
+    for faq in faqs:
+        question = fold(faq.question)
+        if not could_reach_similarity(len(message.text), len(question), best_score):
+            continue
+        matcher = SequenceMatcher(None, message.text, question)
+        if matcher.quick_ratio() <= best_score:
+            continue
+        similarity = matcher.ratio()
+        if similarity > best_score:
+            best_faq, best_score = faq, similarity
+    if best_faq is not None:
+        return best_faq, best_score
+
+    for faq in faqs:
+        if faq.keywords:
+            if any(message.has_phrase(keyword) for keyword in faq.keywords.split(',')):
+                return faq, FAQ_KEYWORD_MATCH_SCORE
+
+    return None, 0.0
+
 def check_faq_match(user_message, language):
     """
     Check if user message matches any existing FAQ
     """
     try:
-        faqs = FAQ.objects.filter(language=language, is_active=True)
-        
-        # First try exact similarity matching
-        for faq in faqs:
-            similarity = SequenceMatcher(None, user_message.lower(), faq.question.lower()).ratio()
-            if similarity > 0.7:
-                # Increment usage count
-                faq.usage_count = F('usage_count') + 1
-                faq.save()
-                return faq.answer
-        
-        # Then try keyword matching
-        for faq in faqs:
-            if faq.keywords:
-                keywords = [k.strip().lower() for k in faq.keywords.split(',')]
-                message_words = user_message.lower().split()
-                if any(keyword in message_words for keyword in keywords):
-                    faq.usage_count = F('usage_count') + 1
-                    faq.save()
-                    return faq.answer
-        
-        return None
+        # Identical concurrent questions share one FAQ scan
+        message = normalize(user_message)
+        (faq, _), _ = chat_flight.do(
+            flight_key('faq', message, language), lambda: find_faq_match(message, language)
+        )
+        if faq is None:
+            return None
+
+        # Increment usage count (once per asker, shared scan or not)
+        FAQ.objects.filter(pk=faq.pk).update(usage_count=F('usage_count') + 1)
+        return faq.answer
     except Exception as e:
         logger.error(f"FAQ matching error: {e}")
         return None
 
+@require_http_methods(["GET"])
+def faq_search(request):
+    """
+    JSON FAQ lookup for the Rasa action server's fallback race.
+    Usage is not counted here; the action server may discard the answer
+    """
+    query = request.GET.get('q', '').strip()
+    language = request.GET.get('language', 'en')
+    if not query:
+        return JsonResponse({'error': 'No query provided'}, status=400)
+
+    try:
+        faq, score = find_faq_match(query, language)
+    except Exception as e:
+        logger.error(f"FAQ search error: {e}")
+        return JsonResponse({'error': 'FAQ search failed'}, status=500)
+
+    if faq is None:
+        return JsonResponse({'answer': None, 'score': 0.0})
+    return JsonResponse({
+        'faq_id': faq.id,
+        'question': faq.question,
+        'answer': faq.answer,
+        'category': faq.category,
+        'score': round(score, 3),
+    })
+
 def handle_unanswered_question(user_message, language, session_id, confidence_score, intent, bot_response):
     """
     Handle unanswered questions by storing or updating frequency
@@ -411,21 +588,108 @@ def handle_unanswered_question(user_message, language, session_id, confidence_sc
     except Exception as e:
         logger.error(f"Error handling unanswered question: {e}")
 
+def localize_parts(parts, language, deadline=None):
+    """
+    Translate bot reply parts, using the pre-translated catalog for the parts
+    it has. The rest are translated paragraph by paragraph, concurrently.
+    Returns (parts, degraded); degraded parts are left in English, including
+    when the request deadline leaves no time to translate
+    """
+    if language == 'en':
+        return list(parts), False
+    localized = [translation_catalog.lookup(part, language) for part in parts]
+    missing = [i for i, text in enumerate(localized) if text is None]
+    if not missing:
+        return localized, False
+
+    if deadline is not None and not deadline.allows('reply_translation'):
+        translated, degraded = [parts[i] for i in missing], True
+    else:
+        translated, degraded = translator.translate_many_with_status(
+            [parts[i] for i in missing], language,
+            timeout=deadline.remaining() if deadline is not None else None
+        )
+    for i, text in zip(missing, translated):
+        localized[i] = text
+    return localized, degraded
+
+def localize(text, language, deadline=None):
+    """Translate one bot reply; see localize_parts. Returns (text, degraded)"""
+    parts, degraded = localize_parts([text], language, deadline)
+    return parts[0], degraded
+
 def get_fallback_message(language):
     """Get appropriate fallback message based on language"""
-    messages = {
-        'en': "I'm sorry, I couldn't understand that. Could you please rephrase your question?",
-        'sn': "Pamusoroi, handina kunzwisisa izvozvo. Mungandipindure muimwe nzira here?"
-    }
-    return messages.get(language, messages['en'])
+    return translation_catalog.lookup(FALLBACK_MESSAGE, language) or FALLBACK_MESSAGE
 
 def get_connection_error_message(language):
     """Get appropriate connection error message based on language"""
-    messages = {
-        'en': "I'm sorry, I'm having trouble connecting right now. Please try again.",
-        'sn': "Pamusoroi, ndiri kunetsa kubatana izvozvi. Edza zvakare."
-    }
-    return messages.get(language, messages['en'])
+    return translation_catalog.lookup(CONNECTION_ERROR_MESSAGE, language) or CONNECTION_ERROR_MESSAGE
+
+@staff_member_required
+def crisis_alert_stream(request):
+    """
+    Server-sent event stream of crisis alerts for staff dashboards.
+    Alerts that are still new are replayed when the dashboard connects.
+    """
+    # Subscribe before reading the backlog, so an alert raised in between is
+    # pushed even though it missed the query; one in both is sent once
+    subscriber = crisis_dispatcher.subscribe()
+    pending_alerts = list(
+        CrisisAlert.objects.filter(status='new')
+        .select_related('mental_health_interaction')
+        .order_by('created_at')
+    )
+    heartbeat = getattr(settings, 'CRISIS_STREAM_HEARTBEAT_SECONDS', 15)
+    
+    def event_stream():
+        try:
+            yield "retry: 3000\n\n"
+            replayed = set()
+            for alert in pending_alerts:
+                yield format_sse(build_alert_event(alert))
+                replayed.add(alert.id)
+                # A replayed alert has now reached staff, even if dispatch never got it out
+                if alert.delivered_at is None:
+                    mark_delivered(alert)
+            while True:
+                try:
+                    event = subscriber.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event['id'] in replayed:
+                    replayed.discard(event['id'])
+                    continue
+                yield format_sse(event)
+        finally:
+            crisis_dispatcher.unsubscribe(subscriber)
+    
+    response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+@staff_member_required
+@require_http_methods(["POST"])
+def acknowledge_crisis_alert(request, alert_id):
+    """Acknowledge a crisis alert from the staff dashboard"""
+    CrisisAlert.objects.filter(id=alert_id, status='new').update(
+        status='acknowledged',
+        acknowledged_by=request.user,
+        acknowledged_at=timezone.now()
+    )
+    try:
+        alert = CrisisAlert.objects.get(id=alert_id)
+    except CrisisAlert.DoesNotExist:
+        return JsonResponse({'error': 'Crisis alert not found'}, status=404)
+    
+    time_to_acknowledge = alert.time_to_acknowledge
+    return JsonResponse({
+        'success': True,
+        'status': alert.status,
+        'time_to_acknowledge': time_to_acknowledge.total_seconds() if time_to_acknowledge else None
+    })
 
 def get_client_ip(request):
     """Get client IP address"""
@@ -1,12 +1,19 @@
 from rasa_sdk import Action, Tracker
 from rasa_sdk.executor import CollectingDispatcher
-import requests
+import asyncio
 import os
+import re
 from dotenv import load_dotenv
-from googletrans import Translator
 import json
+from datetime import datetime
 from typing import Any, Text, Dict, List
 
+from .fallback import answer_fallback
+from .lms_data import STUDENT_ID_RE, lms_data, normalize_name
+from .session_cache import student_bundles
+from .timetable import format_minute, format_session, parse_query_time, timetable_for
+from .translation import translate_static, translate_to_english, translation_cache
+
 
 # Load environment variables - FIXED PATH
 env_path = os.path.join(os.path.dirname(__file__), '.env')
@@ -23,32 +30,51 @@ if serpapi_key:
 # -------------------------
 # TRANSLATOR
 # -------------------------
-translator = Translator()
+# Fixed framing text for ActionMultilingual, so the reply never needs a
+# second translation round trip for the supported languages
+YOU_SAID_PREFIX = {
+    'en': "You said (in English): ",
+    'sn': "Wati (muChirungu): ",
+}
+
 
 class ActionMultilingual(Action):
     def name(self):
         return "action_multilingual"
 
-    def run(self, dispatcher: CollectingDispatcher,
+    async def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: dict):
 
         user_msg = tracker.latest_message.get('text')
 
         try:
-            detected_lang = translator.detect(user_msg).lang
-            translated_to_en = translator.translate(user_msg, dest='en').text
-
-            bot_reply = f"You said (in English): {translated_to_en}"
-            final_reply = translator.translate(bot_reply, dest=detected_lang).text
-
-            dispatcher.utter_message(text=final_reply)
+            # Local language ID + cache first; at most one remote call
+            detected_lang, translated_to_en = await translate_to_english(user_msg)
+
+            prefix = YOU_SAID_PREFIX.get(detected_lang)
+            if prefix is None:
+                cached = translation_cache.get(YOU_SAID_PREFIX['en'], detected_lang)
+                if cached is not None:
+                    prefix = cached[1]
+                else:
+                    # Reply now in English and warm the cache for the next message
+                    prefix = YOU_SAID_PREFIX['en']
+                    asyncio.ensure_future(self._warm_prefix(detected_lang))
+
+            dispatcher.utter_message(text=f"{prefix}{translated_to_en}")
         except Exception as e:
             print(f"Translation error: {e}")
             dispatcher.utter_message(text=user_msg)
 
         return []
 
+    async def _warm_prefix(self, language):
+        try:
+            await translate_static(YOU_SAID_PREFIX['en'], language)
+        except Exception as e:
+            print(f"Could not pre-translate reply prefix to {language}: {e}")
+
 
 # -------------------------
 # MAIN HYBRID ACTION
@@ -57,7 +83,7 @@ class ActionAnswerWUAQuestion(Action):
     def name(self):
         return "action_answer_wua_question"
 
-    def run(self, dispatcher: CollectingDispatcher,
+    async def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: dict):
 
@@ -105,102 +131,28 @@ class ActionAnswerWUAQuestion(Action):
             dispatcher.utter_message(text=trained_responses[intent])
             return []
 
-        # Step 2: fallback to SerpAPI
-        serpapi_key = os.getenv("SERPAPI_KEY")
-        
-        print(f"\n=== SerpAPI Debug Info ===")
+        # Step 2: race the FAQ store, site index and LMS data (SerpAPI as backup)
+        print(f"\n=== Fallback Debug Info ===")
         print(f"Query: {query}")
         print(f"Intent: {intent}")
-        print(f"API Key present: {bool(serpapi_key)}")
-        
-        if not serpapi_key:
-            print("ERROR: SERPAPI_KEY not found in environment")
-            dispatcher.utter_message(
-                text="I couldn't find that in my knowledge base, and search is unavailable right now."
-            )
-            return []
-
-        params = {
-            "engine": "google",
-            "q": f"site:wua.ac.zw {query}",
-            "api_key": serpapi_key,
-            "num": 3
-        }
-
-        print(f"Search query: {params['q']}")
 
         try:
-            response = requests.get("https://serpapi.com/search", params=params, timeout=10)
-            
-            print(f"SerpAPI Status Code: {response.status_code}")
-            print(f"Response Headers: {dict(response.headers)}")
-            
-            # Check if request was successful
-            if response.status_code != 200:
-                print(f"ERROR: Non-200 status code")
-                print(f"Response text: {response.text}")
-                dispatcher.utter_message(
-                    text="I had trouble searching. Please try again or contact info@wua.ac.zw"
-                )
-                return []
-            
-            # Parse JSON
-            try:
-                data = response.json()
-                print(f"JSON parsed successfully")
-                print(f"Response keys: {data.keys()}")
-            except json.JSONDecodeError as je:
-                print(f"JSON Decode Error: {je}")
-                print(f"Raw response: {response.text[:500]}")
-                dispatcher.utter_message(text="Sorry, I received an invalid response. Please try again.")
-                return []
-
-            # Check for errors in response
-            if "error" in data:
-                print(f"API Error: {data['error']}")
-                dispatcher.utter_message(text="Sorry, there was an issue with the search service.")
-                return []
-
-            # Process results
-            if "organic_results" in data and len(data["organic_results"]) > 0:
-                results = data["organic_results"][:2]
-                print(f"Found {len(results)} results")
-                
-                # Build complete message
-                message_parts = ["Here's what I found on the WUA website:\n"]
-                
-                for idx, res in enumerate(results, 1):
-                    title = res.get('title', 'No title')
-                    snippet = res.get('snippet', 'No description available')
-                    link = res.get('link', '')
-                    
-                    message_parts.append(f"\n{idx}. {title}")
-                    message_parts.append(f"{snippet}")
-                    message_parts.append(f"Link: {link}\n")
-                
-                message = "\n".join(message_parts)
-                print(f"Complete message length: {len(message)}")
-                print(f"Complete message:\n{message}")
-                dispatcher.utter_message(text=message)
-            else:
-                print("No organic results found")
-                print(f"Full response data: {json.dumps(data, indent=2)[:500]}")
-                dispatcher.utter_message(
-                    text="I couldn't find anything specific on the WUA site. Could you rephrase or ask about admissions, fees, or courses?"
-                )
-
-        except requests.exceptions.Timeout:
-            print("ERROR: Request timeout")
-            dispatcher.utter_message(text="The search request timed out. Please try again.")
-        except requests.exceptions.RequestException as e:
-            print(f"Request error: {type(e).__name__}: {e}")
-            dispatcher.utter_message(text="Sorry, I had trouble connecting to the search service.")
+            answer = await answer_fallback(query)
         except Exception as e:
             print(f"Unexpected error: {type(e).__name__}: {e}")
             import traceback
             traceback.print_exc()
             dispatcher.utter_message(text="Sorry, I had trouble looking that up. Please try again later.")
+            return []
+
+        if answer is None:
+            dispatcher.utter_message(
+                text="I couldn't find anything specific on the WUA site. Could you rephrase or ask about admissions, fees, or courses?"
+            )
+            return []
 
+        print(f"Answered from {answer.source} (confidence {answer.confidence:.2f})")
+        dispatcher.utter_message(text=answer.text)
         return []
 
 
@@ -223,29 +175,59 @@ class ActionProvideContactInfo(Action):
         return []
     
  
-# Mock Student Database
-STUDENT_DATABASE = {
-    "alice johnson": {
-        "student_id": "WUA001",
-        "gpa": 3.85,
-        "assignments": [
-            {"name": "Python Project", "score": 92, "due_date": "2025-10-20"},
-            {"name": "Database Design", "score": 88, "due_date": "2025-10-25"},
-        ],
-        "courses": ["Data Science 101", "Web Development", "Database Systems"],
-        "grades": {"DS101": "A", "WD201": "B+", "DBS301": "A-"}
-    },
-    "jane doe": {
-        "student_id": "WUA002",
-        "gpa": 3.92,
-        "assignments": [
-            {"name": "Business Plan", "score": 95, "due_date": "2025-10-22"},
-            {"name": "Financial Analysis", "score": 90, "due_date": "2025-10-28"},
-        ],
-        "courses": ["Business Management", "Entrepreneurship", "Finance"],
-        "grades": {"BM101": "A", "ENT201": "A", "FIN301": "A-"}
-    },
-}
+# Student records come from lms_data.json (see lms_data.py)
+def resolve_student(lms, student_name):
+    """Map a name or student ID to one student ID; returns (student_id, error message)"""
+    if lms.get_student(student_name):
+        return student_name.strip().upper(), None
+    matches = lms.find_student_ids(student_name)
+    if not matches:
+        return None, f"Sorry, no student record found for '{student_name}'. Please check the name and try again."
+    if len(matches) > 1:
+        return None, f"More than one student is registered as '{student_name}'. Please provide your student ID instead."
+    return matches[0], None
+
+
+def build_student_bundle(lms, student_id):
+    """Everything the academic actions show for one student, fetched in one go"""
+    student = lms.get_student(student_id)
+    sessions = timetable_for(lms).by_student.get(student_id)
+    return {
+        "student_id": student_id,
+        "name": student.get("name", student_id),
+        "program": student.get("program", "N/A"),
+        "gpa": student.get("gpa", "N/A"),
+        "courses": [{"code": c["code"], "name": c["name"]} for c in lms.student_courses(student_id)],
+        "grades": dict(lms.student_grades(student_id)),
+        "assignments": list(lms.student_assignments(student_id)),
+        "schedule": [format_session(session) for session in (sessions.sessions if sessions else [])],
+    }
+
+
+def get_student_bundle(tracker, student_name=None):
+    """
+    Return (bundle, error message) for the student in this conversation.
+    The first authenticated lookup prefetches the bundle into the per-sender
+    cache; follow-up turns are served from memory, even without a name.
+    """
+    bundle = student_bundles.get(tracker.sender_id)
+    if bundle is not None and (
+        not student_name
+        or student_name.strip().upper() == bundle["student_id"]
+        or normalize_name(student_name) == normalize_name(bundle["name"])
+    ):
+        return bundle, None
+    if not student_name:
+        return None, None
+
+    lms = lms_data.snapshot()
+    student_id, error = resolve_student(lms, student_name)
+    if error:
+        return None, error
+    bundle = build_student_bundle(lms, student_id)
+    student_bundles.set(tracker.sender_id, bundle)
+    return bundle, None
+
 
 class ActionGetStudentInfo(Action):
     def name(self):
@@ -255,59 +237,152 @@ class ActionGetStudentInfo(Action):
             tracker: Tracker,
             domain: dict):
 
-        # Get student name from slot
+        # Get student name (or student ID) from slot, or an ID typed in the message
         student_name = tracker.get_slot("student_name")
-        query = tracker.latest_message.get("text", "").lower()
+        text = tracker.latest_message.get("text", "")
+        query = text.lower()
 
         if not student_name:
-            dispatcher.utter_message(
-                text="To access your records, please provide your full name for authentication."
-            )
-            return []
+            id_match = STUDENT_ID_RE.search(text)
+            student_name = id_match.group(0) if id_match else None
 
-        # Normalize name for lookup
-        name_key = student_name.lower().strip()
-
-        # Check if student exists
-        if name_key not in STUDENT_DATABASE:
+        student, error = get_student_bundle(tracker, student_name)
+        if error:
+            dispatcher.utter_message(text=error)
+            return []
+        if student is None:
             dispatcher.utter_message(
-                text=f"Sorry, no student record found for '{student_name}'. Please check the name and try again."
+                text="To access your records, please provide your full name for authentication."
             )
             return []
 
-        # Get student data
-        student = STUDENT_DATABASE[name_key]
+        display_name = student["name"]
 
         # Route to specific info based on query
         if "gpa" in query or "grade" in query:
             dispatcher.utter_message(
-                text=f"**{student_name.title()} - GPA & Grades**\n\n"
+                text=f"**{display_name} - GPA & Grades**\n\n"
                      f"Overall GPA: {student['gpa']}\n\n"
                      f"Course Grades:\n"
-                     + "\n".join([f"- {course}: {grade}" for course, grade in student['grades'].items()])
+                     + "\n".join([
+                         f"- {course}: {grade['grade']} ({grade['percentage']}%)"
+                         for course, grade in student['grades'].items()
+                     ])
             )
         elif "assignment" in query:
             assignments_text = "\n".join([
-                f"- {a['name']}: {a['score']}/100 (Due: {a['due_date']})"
+                f"- {a['title']} ({a['course']}): {a['status']} (Due: {a['due_date']})"
                 for a in student['assignments']
-            ])
+            ]) or "No assignments on record."
             dispatcher.utter_message(
-                text=f"**{student_name.title()} - Assignments**\n\n{assignments_text}"
+                text=f"**{display_name} - Assignments**\n\n{assignments_text}"
+            )
+        elif "schedule" in query or "timetable" in query:
+            schedule_text = "\n".join([f"- {session}" for session in student['schedule']]) or "No scheduled classes."
+            dispatcher.utter_message(
+                text=f"**{display_name} - Weekly Timetable**\n\n{schedule_text}"
             )
         elif "course" in query:
-            courses_text = "\n".join([f"- {course}" for course in student['courses']])
+            courses_text = "\n".join([
+                f"- {course['code']} - {course['name']}" for course in student['courses']
+            ])
             dispatcher.utter_message(
-                text=f"**{student_name.title()} - Enrolled Courses**\n\n{courses_text}"
+                text=f"**{display_name} - Enrolled Courses**\n\n{courses_text}"
             )
         else:
             # Default: show full summary
             dispatcher.utter_message(
-                text=f"**{student_name.title()} - Academic Summary**\n\n"
+                text=f"**{display_name} - Academic Summary**\n\n"
                      f"Student ID: {student['student_id']}\n"
+                     f"Program: {student['program']}\n"
                      f"GPA: {student['gpa']}\n"
                      f"Courses: {len(student['courses'])}\n\n"
-                     f"Ask me about: GPA, assignments, or courses for more details."
+                     f"Ask me about: GPA, assignments, courses or your timetable for more details."
             )
 
-        return []    
-    
\ No newline at end of file
+        return []
+
+
+ROOM_QUERY_RE = re.compile(r"\b(?:[a-z]+\s+)?(?:room|lab)\s*\w+")
+TEACHING_WORDS = ("teach", "lecture", "instructor", "lecturer", "dr", "prof")
+
+
+class ActionTimetableQuery(Action):
+    def name(self):
+        return "action_timetable_query"
+
+    def run(self, dispatcher: CollectingDispatcher,
+            tracker: Tracker,
+            domain: dict):
+
+        text = tracker.latest_message.get("text", "")
+        query = text.lower()
+        lms = lms_data.snapshot()
+        timetable = timetable_for(lms)
+        minute = parse_query_time(query, datetime.now())
+
+        # "is room 101 free at 2pm"
+        room_match = ROOM_QUERY_RE.search(query)
+        if room_match:
+            rooms = timetable.find_rooms(room_match.group(0))
+            if not rooms and " " in room_match.group(0):
+                rooms = timetable.find_rooms(room_match.group(0).split(" ", 1)[1])
+            if rooms:
+                dispatcher.utter_message(text="\n\n".join(
+                    self._room_status(timetable, room, minute) for room in rooms
+                ))
+                return []
+
+        # "when does Dr. Moyo teach"
+        words = re.findall(r"[a-z']+", query)
+        if any(word.startswith(TEACHING_WORDS) for word in words):
+            instructors = sorted({key for word in words for key in timetable.find_instructors(word)})
+            if instructors:
+                dispatcher.utter_message(text="\n\n".join(
+                    self._instructor_schedule(timetable, key) for key in instructors
+                ))
+                return []
+
+        # "what class do I have now / next"
+        student_name = tracker.get_slot("student_name")
+        if not student_name:
+            id_match = STUDENT_ID_RE.search(text)
+            student_name = id_match.group(0) if id_match else None
+
+        bundle, error = get_student_bundle(tracker, student_name)
+        if error:
+            dispatcher.utter_message(text=error)
+            return []
+        if bundle is None:
+            dispatcher.utter_message(
+                text="Please tell me your full name or student ID so I can check your timetable."
+            )
+            return []
+
+        current, upcoming = timetable.student_now_and_next(bundle["student_id"], minute)
+        if upcoming is None:
+            dispatcher.utter_message(text="You have no scheduled classes this semester.")
+            return []
+
+        lines = [f"**Timetable for {format_minute(minute)}**\n"]
+        lines.extend(f"Now: {format_session(session)}" for session in current)
+        if not current:
+            lines.append("Now: no class")
+        lines.append(f"Next: {format_session(upcoming)}")
+        dispatcher.utter_message(text="\n".join(lines))
+        return []
+
+    def _room_status(self, timetable, room, minute):
+        current, upcoming = timetable.room_status(room, minute)
+        name = timetable.room_names[room]
+        if current:
+            status = f"{name} is in use at {format_minute(minute)}: " + "; ".join(map(format_session, current))
+        else:
+            status = f"{name} is free at {format_minute(minute)}."
+        if upcoming:
+            status += f"\nNext booking: {format_session(upcoming)}"
+        return status
+
+    def _instructor_schedule(self, timetable, instructor):
+        sessions = "\n".join(f"- {format_session(s)}" for s in timetable.instructor_sessions(instructor))
+        return f"**{timetable.instructor_names[instructor]} teaches:**\n{sessions}"
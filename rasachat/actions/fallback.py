@@ -0,0 +1,190 @@
+"""
+Parallel answer race for questions Rasa could not route to a trained response.
+
+Every local source runs at once, each under its own deadline. The first
+answer at or above FALLBACK_CONFIDENCE wins and the other lookups are
+cancelled; if none is confident, the best answer that arrived in time is used.
+Tail latency therefore follows the fastest good source rather than the
+slowest one.
+
+SerpAPI is a backup source: it only answers when no local source found
+anything. It starts once the local sources have all missed, or after
+SERPAPI_HEDGE_DELAY if they are still running, and is cancelled as soon as
+a local answer makes it unnecessary.
+"""
+import asyncio
+import os
+from typing import Awaitable, Callable, List, NamedTuple, Optional
+
+from .http_client import get_json
+from .lms_data import COURSE_CODE_RE, lms_data
+from .serpapi import search_wua
+from .site_index import site_index
+from .timetable import format_session, timetable_for
+
+FALLBACK_CONFIDENCE = float(os.getenv("FALLBACK_CONFIDENCE", "0.7"))
+# Answers below this are never shown
+FALLBACK_MIN_CONFIDENCE = float(os.getenv("FALLBACK_MIN_CONFIDENCE", "0.3"))
+
+FAQ_SEARCH_URL = os.getenv("FAQ_SEARCH_URL", "http://localhost:8000/faq-search/")
+FAQ_DEADLINE = float(os.getenv("FALLBACK_FAQ_DEADLINE", "1.5"))
+SITE_INDEX_DEADLINE = float(os.getenv("FALLBACK_SITE_INDEX_DEADLINE", "0.5"))
+LMS_DEADLINE = float(os.getenv("FALLBACK_LMS_DEADLINE", "0.5"))
+SERPAPI_DEADLINE = float(os.getenv("FALLBACK_SERPAPI_DEADLINE", "8"))
+SERPAPI_HEDGE_DELAY = float(os.getenv("FALLBACK_SERPAPI_HEDGE_DELAY", "1.0"))
+
+# Web search hits are relevant but unverified, so they only win when
+# nothing local answered confidently
+SERPAPI_CONFIDENCE = 0.5
+
+
+class Answer(NamedTuple):
+    source: str
+    text: str
+    confidence: float
+
+
+class Source(NamedTuple):
+    name: str
+    lookup: Callable[[str], Awaitable[Optional[Answer]]]
+    deadline: float
+    # Backup sources set this: seconds to wait for the primary sources
+    # before starting anyway
+    hedge: Optional[float] = None
+
+
+async def race(query: str, sources: List[Source], threshold: float = FALLBACK_CONFIDENCE) -> Optional[Answer]:
+    """
+    Run the primary sources concurrently and return the first confident
+    answer. Backup sources are only used when no primary source answered
+    """
+    async def run(source):
+        try:
+            return await asyncio.wait_for(source.lookup(query), source.deadline)
+        except asyncio.TimeoutError:
+            print(f"Fallback source '{source.name}' missed its {source.deadline}s deadline")
+        except Exception as e:
+            print(f"Fallback source '{source.name}' failed: {type(e).__name__}: {e}")
+        return None
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    primary = {asyncio.ensure_future(run(source)) for source in sources if source.hedge is None}
+    backups = sorted((source for source in sources if source.hedge is not None), key=lambda s: s.hedge)
+    backup_tasks = set()
+    best = best_backup = None
+    try:
+        while primary or backups or backup_tasks:
+            if not primary:
+                if best is not None:
+                    return best
+                # Every primary source missed: no reason to keep backups waiting
+                backup_tasks.update(asyncio.ensure_future(run(source)) for source in backups)
+                backups = []
+            while backups and loop.time() - started >= backups[0].hedge:
+                backup_tasks.add(asyncio.ensure_future(run(backups.pop(0))))
+
+            timeout = max(0.0, started + backups[0].hedge - loop.time()) if backups else None
+            done, _ = await asyncio.wait(primary | backup_tasks, timeout=timeout,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                is_backup = task in backup_tasks
+                primary.discard(task)
+                backup_tasks.discard(task)
+                answer = task.result()
+                if answer is None or answer.confidence < FALLBACK_MIN_CONFIDENCE:
+                    continue
+                if answer.confidence >= threshold and not (is_backup and primary):
+                    return answer
+                if is_backup:
+                    if best_backup is None or answer.confidence > best_backup.confidence:
+                        best_backup = answer
+                elif best is None or answer.confidence > best.confidence:
+                    best = answer
+        return best or best_backup
+    finally:
+        for task in primary | backup_tasks:
+            task.cancel()
+
+
+# -------------------------
+# SOURCES
+# -------------------------
+def format_search_results(results):
+    """Render search results (local index or SerpAPI) as one chat message"""
+    message_parts = ["Here's what I found on the WUA website:\n"]
+
+    for idx, res in enumerate(results, 1):
+        title = res.get('title', 'No title')
+        snippet = res.get('snippet', 'No description available')
+        link = res.get('link', '')
+
+        message_parts.append(f"\n{idx}. {title}")
+        message_parts.append(f"{snippet}")
+        message_parts.append(f"Link: {link}\n")
+
+    return "\n".join(message_parts)
+
+
+async def faq_lookup(query, language="en"):
+    """Ask the Django FAQ store for its best match"""
+    status, data, _ = await get_json(FAQ_SEARCH_URL, params={"q": query, "language": language},
+                                     timeout=FAQ_DEADLINE)
+    if status != 200 or not isinstance(data, dict) or not data.get("answer"):
+        return None
+    return Answer("faq", data["answer"], float(data.get("score", 0)))
+
+
+async def site_index_lookup(query):
+    results = site_index.search(query, limit=2)
+    if not results:
+        return None
+    return Answer("site_index", format_search_results(results), results[0].get("coverage", 0.0))
+
+
+async def lms_lookup(query):
+    """Answer course questions (who teaches it, when and where) from LMS data"""
+    lms = lms_data.snapshot()
+    codes = lms.find_courses(query)
+    if not codes:
+        return None
+
+    timetable = timetable_for(lms)
+    parts = []
+    for code in codes[:3]:
+        course = lms.get_course(code)
+        lines = [f"**{code} - {course.get('name', code)}**"]
+        if course.get("instructor"):
+            lines.append(f"Instructor: {course['instructor']}")
+        if course.get("credits"):
+            lines.append(f"Credits: {course['credits']}")
+        lines.extend(f"- {format_session(s)}" for s in timetable.course_sessions(code))
+        parts.append("\n".join(lines))
+    # A course named by code is unambiguous; one found by name is nearly so
+    confidence = 0.9 if COURSE_CODE_RE.search(query) else 0.8
+    return Answer("lms", "\n\n".join(parts), confidence)
+
+
+async def serpapi_lookup(query, api_key):
+    data = await search_wua(query, api_key, timeout=SERPAPI_DEADLINE)
+    results = data.get("organic_results") or []
+    if not results:
+        return None
+    return Answer("serpapi", format_search_results(results[:2]), SERPAPI_CONFIDENCE)
+
+
+def default_sources(language="en") -> List[Source]:
+    sources = [
+        Source("faq", lambda q: faq_lookup(q, language), FAQ_DEADLINE),
+        Source("site_index", site_index_lookup, SITE_INDEX_DEADLINE),
+        Source("lms", lms_lookup, LMS_DEADLINE),
+    ]
+    serpapi_key = os.getenv("SERPAPI_KEY")
+    if serpapi_key:
+        sources.append(Source("serpapi", lambda q: serpapi_lookup(q, serpapi_key), SERPAPI_DEADLINE,
+                              hedge=SERPAPI_HEDGE_DELAY))
+    return sources
+
+
+async def answer_fallback(query: str, language: str = "en") -> Optional[Answer]:
+    return await race(query, default_sources(language))
@@ -0,0 +1,50 @@
+import asyncio
+import os
+
+import aiohttp
+
+# Connection pool shared by every action in the action server process
+HTTP_POOL_SIZE = int(os.getenv("ACTIONS_HTTP_POOL_SIZE", "100"))
+HTTP_POOL_PER_HOST = int(os.getenv("ACTIONS_HTTP_POOL_PER_HOST", "20"))
+DEFAULT_TIMEOUT = float(os.getenv("ACTIONS_HTTP_TIMEOUT", "10"))
+
+_session = None
+_session_loop = None
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    """
+    Return the pooled aiohttp session for the running event loop.
+    Sessions are bound to a loop, so a new one is opened if the loop changed.
+    """
+    global _session, _session_loop
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=HTTP_POOL_SIZE, limit_per_host=HTTP_POOL_PER_HOST),
+            timeout=aiohttp.ClientTimeout(total=DEFAULT_TIMEOUT),
+        )
+        _session_loop = loop
+    return _session
+
+
+async def get_json(url, params=None, timeout=DEFAULT_TIMEOUT):
+    """
+    GET a URL through the shared session with a per-call deadline.
+    Returns (status, parsed JSON or None, raw text).
+    """
+    session = get_http_session()
+    async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+        text = await response.text()
+        try:
+            data = await response.json(content_type=None)
+        except ValueError:
+            data = None
+        return response.status, data, text
+
+
+async def close_http_session():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
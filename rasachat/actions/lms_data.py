@@ -0,0 +1,183 @@
+"""
+Read-only LMS data service backed by rasachat/lms_data.json.
+
+The file is parsed lazily on first use into an immutable LMSSnapshot with
+dictionary indexes, so every lookup is O(1). When the file's mtime changes
+a new snapshot is built off to the side and swapped in with one assignment:
+callers holding the old snapshot keep a consistent view, and a half-written
+file never replaces good data.
+"""
+import json
+import os
+import re
+import threading
+import time
+from types import MappingProxyType
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_LMS_PATH = os.getenv(
+    "LMS_DATA_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lms_data.json")
+)
+# How often (seconds) the file's mtime is checked at most
+LMS_RELOAD_CHECK_INTERVAL = float(os.getenv("LMS_RELOAD_CHECK_INTERVAL", "5"))
+
+STUDENT_ID_RE = re.compile(r"\bWUA\d{3,}\b", re.IGNORECASE)
+COURSE_CODE_RE = re.compile(r"\b([A-Za-z]{3})\s?(\d{3})\b")
+_TITLES_RE = re.compile(r"^(dr|prof|mr|mrs|ms|miss)\.?\s+")
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return " ".join(re.findall(r"[\w']+", (name or "").lower()))
+
+
+def normalize_instructor(name: str) -> str:
+    """Instructor key without honorifics, so 'Dr. Sarah Moyo' == 'sarah moyo'"""
+    return _TITLES_RE.sub("", normalize_name(name))
+
+
+def normalize_course_code(code: str) -> str:
+    return re.sub(r"\s+", "", (code or "")).upper()
+
+
+class LMSSnapshot:
+    """Immutable, fully indexed view of one version of lms_data.json"""
+
+    def __init__(self, data: Dict, mtime: Optional[float] = None):
+        self.mtime = mtime
+        students = data.get("students", {})
+        courses = data.get("courses", {})
+        grades = data.get("grades", {})
+        assignments = data.get("assignments", {})
+
+        self.students = MappingProxyType({sid.upper(): s for sid, s in students.items()})
+        self.courses = MappingProxyType({normalize_course_code(c): v for c, v in courses.items()})
+        self.grades = MappingProxyType({sid.upper(): g for sid, g in grades.items()})
+        self.assignments = MappingProxyType({
+            sid.upper(): tuple(items) for sid, items in assignments.items()
+        })
+
+        self.by_course_name = MappingProxyType({
+            normalize_name(course.get("name", "")): code for code, course in self.courses.items()
+        })
+        self.max_course_name_words = max((len(name.split()) for name in self.by_course_name), default=0)
+
+        by_name = {}
+        for sid, student in self.students.items():
+            by_name.setdefault(normalize_name(student.get("name", "")), []).append(sid)
+        self.by_name = MappingProxyType({k: tuple(v) for k, v in by_name.items()})
+
+        by_instructor = {}
+        for code, course in self.courses.items():
+            key = normalize_instructor(course.get("instructor", ""))
+            if key:
+                by_instructor.setdefault(key, []).append(code)
+        self.by_instructor = MappingProxyType({k: tuple(v) for k, v in by_instructor.items()})
+
+        by_course = {}
+        for sid, student in self.students.items():
+            for code in student.get("courses", []):
+                by_course.setdefault(normalize_course_code(code), []).append(sid)
+        self.students_by_course = MappingProxyType({k: tuple(v) for k, v in by_course.items()})
+
+    # -- lookups ----------------------------------------------------------
+
+    def get_student(self, student_id: str) -> Optional[Dict]:
+        return self.students.get((student_id or "").strip().upper())
+
+    def find_student_ids(self, name: str) -> Tuple[str, ...]:
+        """All student IDs registered under a name (names are not unique)"""
+        return self.by_name.get(normalize_name(name), ())
+
+    def get_course(self, code: str) -> Optional[Dict]:
+        return self.courses.get(normalize_course_code(code))
+
+    def find_courses(self, text: str) -> List[str]:
+        """Course codes mentioned in free text, by code ('ICT 201') or by full course name"""
+        found = []
+        for prefix, number in COURSE_CODE_RE.findall(text or ""):
+            code = f"{prefix}{number}".upper()
+            if code in self.courses and code not in found:
+                found.append(code)
+
+        words = normalize_name(text).split()
+        for size in range(min(self.max_course_name_words, len(words)), 0, -1):
+            for i in range(len(words) - size + 1):
+                code = self.by_course_name.get(" ".join(words[i:i + size]))
+                if code and code not in found:
+                    found.append(code)
+        return found
+
+    def courses_for_instructor(self, instructor: str) -> List[Dict]:
+        return [
+            dict(self.courses[code], code=code)
+            for code in self.by_instructor.get(normalize_instructor(instructor), ())
+        ]
+
+    def student_courses(self, student_id: str) -> List[Dict]:
+        student = self.get_student(student_id) or {}
+        return [
+            dict(self.courses.get(normalize_course_code(code), {"name": code}), code=normalize_course_code(code))
+            for code in student.get("courses", [])
+        ]
+
+    def student_grades(self, student_id: str) -> Dict:
+        return self.grades.get((student_id or "").strip().upper(), {})
+
+    def student_assignments(self, student_id: str) -> Tuple[Dict, ...]:
+        return self.assignments.get((student_id or "").strip().upper(), ())
+
+    def course_students(self, code: str) -> Tuple[str, ...]:
+        return self.students_by_course.get(normalize_course_code(code), ())
+
+
+class LMSData:
+    """Lazily loaded LMS snapshot, rebuilt atomically when the file changes"""
+
+    def __init__(self, path: str = DEFAULT_LMS_PATH,
+                 check_interval: float = LMS_RELOAD_CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> LMSSnapshot:
+        """Return the current snapshot, reloading first if the file changed"""
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if snapshot is not None and now - self._checked_at < self.check_interval:
+            return snapshot
+
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            mtime = None
+        self._checked_at = now
+
+        if snapshot is not None and (mtime is None or mtime == snapshot.mtime):
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or (mtime is not None and mtime != snapshot.mtime):
+                snapshot = self._load(mtime) or snapshot or LMSSnapshot({})
+                self._snapshot = snapshot
+        return snapshot
+
+    def _load(self, mtime) -> Optional[LMSSnapshot]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            # Keep serving the previous snapshot if the file is missing or half-written
+            print(f"Could not load LMS data {self.path}: {e}")
+            return None
+        snapshot = LMSSnapshot(data, mtime)
+        print(f"Loaded LMS data: {len(snapshot.students)} students, {len(snapshot.courses)} courses")
+        return snapshot
+
+
+# Global LMS data used by the actions
+lms_data = LMSData()
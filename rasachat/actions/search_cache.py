@@ -0,0 +1,140 @@
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+
+def normalize_query(query: str, site: str = "wua.ac.zw") -> str:
+    """
+    Canonical cache key for a site search: lowercased, punctuation stripped,
+    whitespace collapsed, always scoped to the site
+    """
+    words = re.findall(r"[\w']+", (query or "").lower())
+    return f"site:{site} {' '.join(words)}".strip()
+
+
+class SearchCache:
+    """
+    Two-level TTL cache for search results: an in-memory LRU in front of a
+    persistent SQLite store, so results survive action server restarts.
+
+    Entries younger than `ttl` are fresh. Entries older than that but younger
+    than `stale_ttl` are served stale while a background refresh task runs;
+    the caller waits at most `revalidate_wait` seconds for the refresh before
+    falling back to the stale result.
+    """
+
+    def __init__(self, path: str, max_entries: int = 256, ttl: float = 6 * 3600,
+                 stale_ttl: float = 7 * 24 * 3600, revalidate_wait: float = 1.5):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.revalidate_wait = revalidate_wait
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing = {}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, fetched_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    # -- storage ----------------------------------------------------------
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Return (value, fetched_at) from memory or disk, or None"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+
+            row = self._db.execute(
+                "SELECT value, fetched_at FROM search_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            entry = (json.loads(row[0]), row[1])
+            self._remember(key, entry)
+            return entry
+
+    def set(self, key: str, value: Any, fetched_at: Optional[float] = None):
+        entry = (value, fetched_at if fetched_at is not None else time.time())
+        with self._lock:
+            self._remember(key, entry)
+            self._db.execute(
+                "INSERT OR REPLACE INTO search_cache (key, value, fetched_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), entry[1]),
+            )
+            self._db.commit()
+
+    def purge_expired(self):
+        """Drop entries too old to be served even as stale"""
+        cutoff = time.time() - self.stale_ttl
+        with self._lock:
+            self._db.execute("DELETE FROM search_cache WHERE fetched_at < ?", (cutoff,))
+            self._db.commit()
+            for key in [k for k, (_, at) in self._memory.items() if at < cutoff]:
+                del self._memory[key]
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    # -- read-through -----------------------------------------------------
+
+    async def get_or_fetch(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached value for key, awaiting fetch() on a miss and
+        revalidating in the background once the entry goes stale.
+        Exceptions from fetch() propagate only when there is nothing to serve.
+        """
+        entry = self.get(key)
+        now = time.time()
+
+        if entry is not None and now - entry[1] < self.ttl:
+            return entry[0]
+
+        if entry is not None and now - entry[1] < self.stale_ttl:
+            refresh = self._start_refresh(key, fetch)
+            await asyncio.wait({refresh}, timeout=self.revalidate_wait)
+            fresh = self.get(key)
+            return fresh[0] if fresh is not None else entry[0]
+
+        value = await fetch()
+        self.set(key, value)
+        return value
+
+    def _start_refresh(self, key, fetch) -> asyncio.Task:
+        """Run at most one background refresh per key"""
+        running = self._refreshing.get(key)
+        if running is not None and not running.done():
+            return running
+
+        async def refresh():
+            try:
+                self.set(key, await fetch())
+            except Exception as e:
+                print(f"Search cache refresh failed for '{key}': {type(e).__name__}: {e}")
+            finally:
+                self._refreshing.pop(key, None)
+
+        task = asyncio.ensure_future(refresh())
+        self._refreshing[key] = task
+        return task
@@ -0,0 +1,60 @@
+import os
+
+from .http_client import get_json
+from .search_cache import SearchCache, normalize_query
+
+SERPAPI_URL = os.getenv("SERPAPI_URL", "https://serpapi.com/search")
+SERPAPI_TIMEOUT = float(os.getenv("SERPAPI_TIMEOUT", "10"))
+
+search_cache = SearchCache(
+    path=os.getenv(
+        "SERPAPI_CACHE_PATH",
+        os.path.join(os.path.dirname(__file__), "serpapi_cache.sqlite3")
+    ),
+    max_entries=int(os.getenv("SERPAPI_CACHE_MEMORY_ENTRIES", "256")),
+    ttl=float(os.getenv("SERPAPI_CACHE_TTL", str(6 * 3600))),
+    stale_ttl=float(os.getenv("SERPAPI_CACHE_STALE_TTL", str(7 * 24 * 3600))),
+)
+
+
+class SerpAPIError(Exception):
+    """Raised when SerpAPI answers but not with usable results"""
+
+    def __init__(self, user_message):
+        super().__init__(user_message)
+        self.user_message = user_message
+
+
+async def fetch_serpapi(search_query, api_key, timeout=SERPAPI_TIMEOUT):
+    """Call SerpAPI once and return the parsed JSON payload"""
+    params = {
+        "engine": "google",
+        "q": search_query,
+        "api_key": api_key,
+        "num": 3
+    }
+    status, data, text = await get_json(SERPAPI_URL, params=params, timeout=timeout)
+    print(f"SerpAPI Status Code: {status}")
+
+    if status != 200:
+        print(f"ERROR: Non-200 status code")
+        print(f"Response text: {text[:500]}")
+        raise SerpAPIError("I had trouble searching. Please try again or contact info@wua.ac.zw")
+
+    if not isinstance(data, dict):
+        print(f"Invalid JSON response: {text[:500]}")
+        raise SerpAPIError("Sorry, I received an invalid response. Please try again.")
+
+    # Errors are never cached
+    if "error" in data:
+        print(f"API Error: {data['error']}")
+        raise SerpAPIError("Sorry, there was an issue with the search service.")
+
+    return data
+
+
+async def search_wua(query, api_key, timeout=SERPAPI_TIMEOUT):
+    """Search the WUA site, served from the result cache when possible"""
+    key = normalize_query(query)
+    print(f"Search query: {key}")
+    return await search_cache.get_or_fetch(key, lambda: fetch_serpapi(key, api_key, timeout))
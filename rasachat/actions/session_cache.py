@@ -0,0 +1,75 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+SESSION_CACHE_TTL = float(os.getenv("SESSION_CACHE_TTL", "1800"))
+SESSION_CACHE_MAX_ENTRIES = int(os.getenv("SESSION_CACHE_MAX_ENTRIES", "2000"))
+SESSION_CACHE_MAX_BYTES = int(os.getenv("SESSION_CACHE_MAX_BYTES", str(8 * 1024 * 1024)))
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate memory footprint of a JSON-like value"""
+    return len(json.dumps(value, default=str, separators=(",", ":")))
+
+
+class SessionCache:
+    """
+    Per-sender cache for data prefetched at the start of a conversation.
+
+    Entries expire `ttl` seconds after they were stored. The least recently
+    used senders are evicted once either `max_entries` or the approximate
+    `max_bytes` budget is exceeded, so memory stays bounded however many
+    conversations the action server sees.
+    """
+
+    def __init__(self, ttl: float = SESSION_CACHE_TTL, max_entries: int = SESSION_CACHE_MAX_ENTRIES,
+                 max_bytes: int = SESSION_CACHE_MAX_BYTES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, sender_id: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(sender_id)
+            if entry is None:
+                return None
+            value, stored_at, size = entry
+            if time.monotonic() - stored_at >= self.ttl:
+                self._pop(sender_id)
+                return None
+            self._entries.move_to_end(sender_id)
+            return value
+
+    def set(self, sender_id: str, value: Any):
+        size = estimate_size(value)
+        with self._lock:
+            if sender_id in self._entries:
+                self._pop(sender_id)
+            if size > self.max_bytes:
+                return
+            self._entries[sender_id] = (value, time.monotonic(), size)
+            self.total_bytes += size
+            while len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+
+    def invalidate(self, sender_id: str):
+        with self._lock:
+            if sender_id in self._entries:
+                self._pop(sender_id)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _pop(self, sender_id):
+        _, _, size = self._entries.pop(sender_id)
+        self.total_bytes -= size
+
+
+# Academic bundle per conversation, filled on the first authenticated lookup
+student_bundles = SessionCache()
@@ -0,0 +1,273 @@
+"""
+Offline BM25 index over a snapshot of the WUA website.
+
+Build it from a directory of saved .html/.htm/.txt pages:
+
+    cd rasachat
+    python -m actions.site_index build path/to/wua_snapshot
+    python -m actions.site_index search "library opening hours"
+
+The action server loads the index lazily and reloads it when the file changes.
+"""
+import argparse
+import gzip
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+
+DEFAULT_INDEX_PATH = os.getenv(
+    "WUA_SITE_INDEX_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "site_index.json.gz")
+)
+DEFAULT_BASE_URL = "https://www.wua.ac.zw"
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_BOOST = 3
+SNIPPET_CHARS = 200
+STORED_TEXT_CHARS = 5000
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for",
+    "from", "has", "have", "how", "i", "in", "is", "it", "its", "me", "my", "of",
+    "on", "or", "our", "tell", "that", "the", "their", "there", "this", "to",
+    "was", "what", "when", "where", "which", "who", "will", "with", "you", "your",
+    "about", "wua", "university", "women's", "women", "africa",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9'\-]*")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS and len(t) > 1]
+
+
+class _PageParser(HTMLParser):
+    """Collect title, canonical link and visible text from one HTML page"""
+    SKIP_TAGS = {"script", "style", "noscript", "nav", "footer", "header", "svg"}
+
+    def __init__(self):
+        super().__init__()
+        self.title = ""
+        self.heading = ""
+        self.link = ""
+        self.text = []
+        self._skip = 0
+        self._in_title = False
+        self._in_h1 = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag in self.SKIP_TAGS:
+            self._skip += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag == "h1":
+            self._in_h1 = True
+        elif tag == "link" and attrs.get("rel") == "canonical":
+            self.link = attrs.get("href", "")
+        elif tag == "meta" and attrs.get("property") == "og:url" and not self.link:
+            self.link = attrs.get("content", "")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS and self._skip:
+            self._skip -= 1
+        elif tag == "title":
+            self._in_title = False
+        elif tag == "h1":
+            self._in_h1 = False
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif not self._skip:
+            if self._in_h1 and not self.heading:
+                self.heading = data.strip()
+            self.text.append(data)
+
+
+def _page_link(relative_path: str, base_url: str) -> str:
+    path = relative_path.replace(os.sep, "/")
+    path = re.sub(r"(^|/)index\.html?$", r"\1", path)
+    path = re.sub(r"\.(html?|txt)$", "", path)
+    return f"{base_url.rstrip('/')}/{path}".rstrip("/")
+
+
+def extract_document(path: str, snapshot_dir: str, base_url: str = DEFAULT_BASE_URL) -> Optional[Dict]:
+    """Turn one saved page into {'title', 'link', 'text'}"""
+    with open(path, encoding="utf-8", errors="ignore") as f:
+        raw = f.read()
+
+    relative_path = os.path.relpath(path, snapshot_dir)
+    if path.lower().endswith(".txt"):
+        lines = [line.strip() for line in raw.splitlines() if line.strip()]
+        if not lines:
+            return None
+        title, text, link = lines[0], " ".join(lines[1:]), ""
+    else:
+        parser = _PageParser()
+        parser.feed(raw)
+        title = (parser.title or parser.heading).strip()
+        text = " ".join(parser.text)
+        link = parser.link
+
+    text = re.sub(r"\s+", " ", text).strip()
+    if not text:
+        return None
+    return {
+        "title": re.sub(r"\s+", " ", title) or relative_path,
+        "link": link or _page_link(relative_path, base_url),
+        "text": text[:STORED_TEXT_CHARS],
+    }
+
+
+def build_index(documents: List[Dict]) -> Dict:
+    """Build the compact inverted index: term -> [[doc_id, term_frequency], ...]"""
+    postings = defaultdict(list)
+    doc_lengths = []
+    for doc_id, doc in enumerate(documents):
+        counts = Counter(tokenize(doc["text"]))
+        for term in tokenize(doc["title"]):
+            counts[term] += TITLE_BOOST
+        for term, tf in counts.items():
+            postings[term].append([doc_id, tf])
+        doc_lengths.append(sum(counts.values()))
+
+    return {
+        "version": 1,
+        "docs": [[d["title"], d["link"], d["text"]] for d in documents],
+        "doc_lengths": doc_lengths,
+        "avg_length": (sum(doc_lengths) / len(doc_lengths)) if doc_lengths else 0.0,
+        "postings": dict(postings),
+    }
+
+
+def build_from_directory(snapshot_dir: str, base_url: str = DEFAULT_BASE_URL) -> Dict:
+    documents = []
+    for root, _, files in os.walk(snapshot_dir):
+        for name in sorted(files):
+            if name.lower().endswith((".html", ".htm", ".txt")):
+                doc = extract_document(os.path.join(root, name), snapshot_dir, base_url)
+                if doc:
+                    documents.append(doc)
+    return build_index(documents)
+
+
+def save_index(index: Dict, path: str = DEFAULT_INDEX_PATH):
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump(index, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+class SiteIndex:
+    """BM25 search over a prebuilt index, reloaded when the file changes"""
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH, index: Optional[Dict] = None):
+        self.path = path
+        self._index = index
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def _current(self) -> Optional[Dict]:
+        if self.path is None:
+            return self._index
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return self._index
+
+        if mtime != self._mtime:
+            with self._lock:
+                if mtime != self._mtime:
+                    try:
+                        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                            self._index = json.load(f)
+                    except (OSError, ValueError) as e:
+                        # Keep serving the previous index if a rebuild is half-written
+                        print(f"Could not load site index {self.path}: {e}")
+                    self._mtime = mtime
+        return self._index
+
+    def search(self, query: str, limit: int = 2) -> List[Dict]:
+        """Return up to `limit` results as SerpAPI-style {'title', 'snippet', 'link'} dicts, plus score and coverage"""
+        index = self._current()
+        terms = set(tokenize(query or ""))
+        if not index or not terms or not index["docs"]:
+            return []
+
+        total_docs = len(index["docs"])
+        doc_lengths = index["doc_lengths"]
+        avg_length = index["avg_length"] or 1.0
+        scores = defaultdict(float)
+        matched = defaultdict(int)
+        for term in terms:
+            postings = index["postings"].get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_lengths[doc_id] / avg_length)
+                scores[doc_id] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+                matched[doc_id] += 1
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        results = []
+        for doc_id, score in ranked:
+            title, link, text = index["docs"][doc_id]
+            results.append({
+                "title": title,
+                "snippet": best_snippet(text, terms),
+                "link": link,
+                "score": round(score, 3),
+                # Share of query terms found in the page
+                "coverage": round(matched[doc_id] / len(terms), 3),
+            })
+        return results
+
+
+def best_snippet(text: str, terms, max_chars: int = SNIPPET_CHARS) -> str:
+    """Pick the sentence that mentions the most query terms"""
+    sentences = _SENTENCE_RE.split(text) or [text]
+    best = max(sentences, key=lambda s: len(terms & set(tokenize(s))))
+    if len(best) > max_chars:
+        best = best[:max_chars].rsplit(" ", 1)[0] + "..."
+    return best
+
+
+# Global index used by the actions
+site_index = SiteIndex()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the offline WUA site index")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="Index a directory of saved WUA pages")
+    build.add_argument("snapshot_dir")
+    build.add_argument("--output", default=DEFAULT_INDEX_PATH)
+    build.add_argument("--base-url", default=DEFAULT_BASE_URL)
+
+    search = sub.add_parser("search", help="Query the index")
+    search.add_argument("query")
+    search.add_argument("--index", default=DEFAULT_INDEX_PATH)
+    search.add_argument("--limit", type=int, default=3)
+
+    args = parser.parse_args(argv)
+    if args.command == "build":
+        index = build_from_directory(args.snapshot_dir, args.base_url)
+        save_index(index, args.output)
+        print(f"Indexed {len(index['docs'])} pages, {len(index['postings'])} terms -> {args.output}")
+    else:
+        for result in SiteIndex(args.index).search(args.query, args.limit):
+            print(f"[{result['score']}] {result['title']}\n  {result['snippet']}\n  {result['link']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Weekly timetable index built from the course schedules in lms_data.json.
+
+Schedules such as "Mon 09:00-10:30, Wed 09:00-10:30" are parsed once per
+LMS snapshot into minute-of-week intervals (Monday 00:00 == 0), kept sorted
+per student, room and instructor. Every query is a bisect over one of those
+lists, so answering is O(log n) however large the timetable grows.
+"""
+import re
+import threading
+from bisect import bisect_right
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .lms_data import LMSSnapshot, normalize_course_code, normalize_instructor, normalize_name
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+DAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+_SLOT_RE = re.compile(r"([A-Za-z]{3})[a-z]*\s+(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})")
+_ROOM_ALIAS_RE = re.compile(r"\b((?:room|lab)\s*\w+)$")
+
+
+class Session(NamedTuple):
+    start: int
+    end: int
+    code: str
+    name: str
+    room: str
+    instructor: str
+
+
+def parse_schedule(schedule: str) -> List[Tuple[int, int]]:
+    """Parse 'Mon 09:00-10:30, Wed 09:00-10:30' into minute-of-week intervals"""
+    intervals = []
+    for day, sh, sm, eh, em in _SLOT_RE.findall(schedule or ""):
+        day = day.lower()
+        if day not in DAYS:
+            continue
+        base = DAYS.index(day) * MINUTES_PER_DAY
+        intervals.append((base + int(sh) * 60 + int(sm), base + int(eh) * 60 + int(em)))
+    return intervals
+
+
+def minute_of_week(when: datetime) -> int:
+    return when.weekday() * MINUTES_PER_DAY + when.hour * 60 + when.minute
+
+
+def format_minute(minute: int) -> str:
+    day, rest = divmod(minute % MINUTES_PER_WEEK, MINUTES_PER_DAY)
+    return f"{DAY_NAMES[day]} {rest // 60:02d}:{rest % 60:02d}"
+
+
+def format_session(session: Session) -> str:
+    end = session.end % MINUTES_PER_DAY
+    return (f"{session.code} {session.name}, {format_minute(session.start)}-{end // 60:02d}:{end % 60:02d}"
+            f" in {session.room} ({session.instructor})")
+
+
+def normalize_room(room: str) -> str:
+    return normalize_name(room)
+
+
+class _IntervalList:
+    """
+    Sessions sorted by start, with a parallel list of starts for bisect and
+    a running maximum of end times so overlapping sessions are all found
+    """
+
+    __slots__ = ("sessions", "starts", "max_ends")
+
+    def __init__(self, sessions: List[Session]):
+        self.sessions = sorted(sessions)
+        self.starts = [s.start for s in self.sessions]
+        self.max_ends = []
+        latest = -1
+        for session in self.sessions:
+            latest = max(latest, session.end)
+            self.max_ends.append(latest)
+
+    def at(self, minute: int) -> List[Session]:
+        """Sessions in progress at `minute` (more than one if they clash)"""
+        found = []
+        i = bisect_right(self.starts, minute) - 1
+        while i >= 0 and self.max_ends[i] > minute:
+            if self.sessions[i].end > minute:
+                found.append(self.sessions[i])
+            i -= 1
+        found.reverse()
+        return found
+
+    def next_after(self, minute: int) -> Optional[Session]:
+        """First session starting after `minute`, wrapping into next week"""
+        if not self.sessions:
+            return None
+        i = bisect_right(self.starts, minute)
+        return self.sessions[i % len(self.sessions)]
+
+
+class Timetable:
+    """Interval indexes per student, room and instructor for one LMS snapshot"""
+
+    def __init__(self, lms: LMSSnapshot):
+        by_course: Dict[str, List[Session]] = {}
+        by_room: Dict[str, List[Session]] = {}
+        by_instructor: Dict[str, List[Session]] = {}
+        self.room_names: Dict[str, str] = {}
+        self.room_aliases: Dict[str, set] = {}
+        self.instructor_names: Dict[str, str] = {}
+        self.instructor_surnames: Dict[str, set] = {}
+
+        for code, course in lms.courses.items():
+            room = course.get("room", "")
+            instructor = course.get("instructor", "")
+            sessions = [
+                Session(start, end, code, course.get("name", code), room, instructor)
+                for start, end in parse_schedule(course.get("schedule", ""))
+            ]
+            by_course[code] = sessions
+
+            room_key = normalize_room(room)
+            if room_key:
+                by_room.setdefault(room_key, []).extend(sessions)
+                self.room_names[room_key] = room
+                self.room_aliases.setdefault(room_key, set()).add(room_key)
+                alias = _ROOM_ALIAS_RE.search(room_key)
+                if alias:
+                    self.room_aliases.setdefault(alias.group(1), set()).add(room_key)
+
+            instructor_key = normalize_instructor(instructor)
+            if instructor_key:
+                by_instructor.setdefault(instructor_key, []).extend(sessions)
+                self.instructor_names[instructor_key] = instructor
+                self.instructor_surnames.setdefault(instructor_key.split()[-1], set()).add(instructor_key)
+
+        self.by_course = {k: sorted(v) for k, v in by_course.items()}
+        self.by_room = {k: _IntervalList(v) for k, v in by_room.items()}
+        self.by_instructor = {k: _IntervalList(v) for k, v in by_instructor.items()}
+        self.by_student = {
+            student_id: _IntervalList([
+                session
+                for code in student.get("courses", [])
+                for session in by_course.get(normalize_course_code(code), [])
+            ])
+            for student_id, student in lms.students.items()
+        }
+
+    # -- lookups ----------------------------------------------------------
+
+    def find_rooms(self, text: str) -> List[str]:
+        """Room keys matching a full room name or a short alias like 'room 101'"""
+        return sorted(self.room_aliases.get(normalize_room(text), ()))
+
+    def find_instructors(self, text: str) -> List[str]:
+        """Instructor keys matching a full name or a surname, titles ignored"""
+        key = normalize_instructor(text)
+        if key in self.instructor_names:
+            return [key]
+        return sorted(self.instructor_surnames.get(key, ()))
+
+    # -- queries ----------------------------------------------------------
+
+    def student_now_and_next(self, student_id: str, minute: int) -> Tuple[List[Session], Optional[Session]]:
+        sessions = self.by_student.get(student_id)
+        if sessions is None:
+            return [], None
+        return sessions.at(minute), sessions.next_after(minute)
+
+    def room_status(self, room_key: str, minute: int) -> Tuple[List[Session], Optional[Session]]:
+        """(sessions occupying the room at `minute`, next booking)"""
+        sessions = self.by_room.get(room_key)
+        if sessions is None:
+            return [], None
+        return sessions.at(minute), sessions.next_after(minute)
+
+    def course_sessions(self, code: str) -> List[Session]:
+        return list(self.by_course.get(normalize_course_code(code), []))
+
+    def instructor_sessions(self, instructor_key: str) -> List[Session]:
+        sessions = self.by_instructor.get(instructor_key)
+        return list(sessions.sessions) if sessions else []
+
+
+_cache_lock = threading.Lock()
+_cached: Tuple[Optional[LMSSnapshot], Optional[Timetable]] = (None, None)
+
+
+def timetable_for(lms: LMSSnapshot) -> Timetable:
+    """Build the timetable once per LMS snapshot"""
+    global _cached
+    snapshot, timetable = _cached
+    if snapshot is lms:
+        return timetable
+    with _cache_lock:
+        if _cached[0] is not lms:
+            _cached = (lms, Timetable(lms))
+        return _cached[1]
+
+
+# -- natural language time --------------------------------------------------
+
+_TIME_RE = re.compile(r"\b(?:at\s+)?(\d{1,2})(?::(\d{2}))?\s*(am|pm)?\b")
+_DAY_RE = re.compile(r"\b(mon|tue|wed|thu|fri|sat|sun)[a-z]*\b")
+
+
+def parse_query_time(text: str, now: datetime) -> int:
+    """
+    Minute of week a query refers to: 'now' by default, shifted by an
+    explicit weekday ('on wednesday') and/or clock time ('at 2pm', '14:30')
+    """
+    text = (text or "").lower()
+    minute = minute_of_week(now)
+    today = minute // MINUTES_PER_DAY
+    day, clock = today, minute % MINUTES_PER_DAY
+
+    day_match = _DAY_RE.search(text)
+    if day_match:
+        day = DAYS.index(day_match.group(1))
+    elif "tomorrow" in text:
+        day = (today + 1) % 7
+    if day != today:
+        # Another day with no clock time means from the start of that day
+        clock = 0
+
+    for match in _TIME_RE.finditer(text):
+        hour, mins, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+        # Bare numbers ('room 101') are not times
+        if not meridiem and match.group(2) is None:
+            continue
+        if meridiem == "pm" and hour < 12:
+            hour += 12
+        elif meridiem == "am" and hour == 12:
+            hour = 0
+        if hour < 24 and mins < 60:
+            clock = hour * 60 + mins
+            break
+
+    return day * MINUTES_PER_DAY + clock
@@ -0,0 +1,146 @@
+import asyncio
+import functools
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from googletrans import Translator
+
+TRANSLATE_TIMEOUT = float(os.getenv("TRANSLATE_TIMEOUT", "5"))
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "2048"))
+
+translator = Translator()
+
+
+async def run_blocking(func, *args, timeout=TRANSLATE_TIMEOUT, **kwargs):
+    """Run a blocking call in the default thread pool with a deadline"""
+    loop = asyncio.get_running_loop()
+    return await asyncio.wait_for(
+        loop.run_in_executor(None, functools.partial(func, *args, **kwargs)), timeout
+    )
+
+
+# -------------------------
+# LOCAL LANGUAGE ID
+# -------------------------
+# A subset of SHONA_LEXICON in chat/language_spans.py (the action server
+# does not import the Django app). Keep out words that are also English,
+# such as "here"
+SHONA_WORDS = {
+    'mhoro', 'mangwanani', 'masikati', 'manheru', 'ndeipi', 'zvakanaka',
+    'tinotenda', 'pamusoroi', 'hongu', 'kwete', 'sei', 'rinhi', 'ripi',
+    'makadii', 'zita', 'renyu', 'ndiani', 'ndiri', 'ndinoda', 'handina',
+    'mukoma', 'hanzvadzi', 'amai', 'baba', 'mwana', 'mukomana', 'musikana',
+    'ndingawana', 'ndapota', 'maita', 'basa', 'ini', 'iwe', 'isu',
+    'imi', 'ivo', 'uye', 'asi', 'chii', 'chei', 'kupi', 'papi', 'nei',
+    'zvino', 'nhasi', 'mangwana', 'nezuro', 'ndezvei', 'ndinonzi', 'zvinei',
+    'makosi', 'mari', 'chikoro', 'kuverenga', 'kudzidza', 'mudzidzi', 'vadzidzi',
+    'ndokumbirawo', 'ndibatsireiwo', 'ndibatsirei', 'rubatsiro', 'ndakanaka',
+}
+
+ENGLISH_WORDS = {
+    'the', 'a', 'an', 'is', 'are', 'was', 'be', 'what', 'how', 'when', 'where',
+    'who', 'why', 'which', 'i', 'you', 'my', 'your', 'me', 'we', 'to', 'of',
+    'and', 'in', 'on', 'for', 'with', 'can', 'do', 'does', 'please', 'hello',
+    'hi', 'thanks', 'thank', 'want', 'need', 'about', 'course', 'courses',
+    'fees', 'register', 'library', 'university', 'student', 'help', 'tell',
+    'it', 'this', 'that', 'have', 'has', 'will', 'would', 'could',
+    'should', 'there', 'time', 'open', 'apply', 'good', 'morning', 'yes', 'no',
+}
+
+# Shona verb/noun class prefixes followed by a vowel-final stem
+SHONA_MORPHOLOGY = re.compile(
+    r"^(ndi|nda|ndo|ndino|ndaka|ku|mu|zvi|zva|chi|cha|va|ma|ri|ti|ta|ha|dzi|ru|hu)[a-z]{3,}[aeiou]$"
+)
+_WORD_RE = re.compile(r"[a-z']+")
+
+
+def detect_language(text):
+    """
+    Cheap local language ID. Returns 'en' or 'sn' when the lexicon is
+    confident, or None when the message should be left to the remote detector.
+    """
+    words = _WORD_RE.findall((text or "").lower())
+    if not words:
+        return 'en'
+
+    shona_score = 0.0
+    english_score = 0.0
+    for word in words:
+        if word in SHONA_WORDS:
+            shona_score += 1
+        elif word in ENGLISH_WORDS:
+            english_score += 1
+        elif SHONA_MORPHOLOGY.match(word):
+            shona_score += 0.5
+
+    if shona_score == 0 and english_score / len(words) >= 0.3:
+        return 'en'
+    if shona_score > english_score:
+        return 'sn'
+    return None
+
+
+# -------------------------
+# TRANSLATION CACHE
+# -------------------------
+class TranslationCache:
+    """Thread-safe LRU of (text, dest) -> (source language, translated text)"""
+
+    def __init__(self, max_entries=TRANSLATION_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, text, dest):
+        with self._lock:
+            entry = self._entries.get((text, dest))
+            if entry is not None:
+                self._entries.move_to_end((text, dest))
+            return entry
+
+    def set(self, text, dest, src, translated):
+        with self._lock:
+            self._entries[(text, dest)] = (src, translated)
+            self._entries.move_to_end((text, dest))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+translation_cache = TranslationCache()
+
+
+async def translate_to_english(text):
+    """
+    Return (detected language, English text) using at most one remote call:
+    googletrans reports the source language alongside the translation, so
+    detection and translation share a single round trip.
+    """
+    local_lang = detect_language(text)
+    if local_lang == 'en':
+        return 'en', text
+
+    cached = translation_cache.get(text, 'en')
+    if cached is not None:
+        return cached
+
+    kwargs = {'dest': 'en'}
+    if local_lang:
+        kwargs['src'] = local_lang
+    result = await run_blocking(translator.translate, text, **kwargs)
+    src = (result.src or local_lang or 'en').lower()
+    translation_cache.set(text, 'en', src, result.text)
+    return src, result.text
+
+
+async def translate_static(text, dest):
+    """Translate a fixed bot string, caching it for every later request"""
+    if dest == 'en':
+        return text
+    cached = translation_cache.get(text, dest)
+    if cached is not None:
+        return cached[1]
+    result = await run_blocking(translator.translate, text, src='en', dest=dest)
+    translation_cache.set(text, dest, 'en', result.text)
+    return result.text
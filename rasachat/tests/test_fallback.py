@@ -0,0 +1,113 @@
+import asyncio
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from actions.fallback import Answer, Source, lms_lookup, race  # noqa: E402
+
+
+def source(name, delay, confidence, deadline=1.0, log=None, hedge=None, started=None):
+    async def lookup(query):
+        if started is not None:
+            started.append(name)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            if log is not None:
+                log.append(name)
+            raise
+        if confidence is None:
+            return None
+        return Answer(name, f"{name} answer", confidence)
+    return Source(name, lookup, deadline, hedge=hedge)
+
+
+class FallbackRaceTests(unittest.IsolatedAsyncioTestCase):
+    async def test_first_confident_answer_wins_and_cancels_the_rest(self):
+        cancelled = []
+        started = time.monotonic()
+        answer = await race("q", [
+            source("slow", 0.5, 0.99, log=cancelled),
+            source("weak", 0.01, 0.4),
+            source("fast", 0.05, 0.8),
+        ], threshold=0.7)
+        await asyncio.sleep(0.01)
+
+        self.assertEqual(answer.source, "fast")
+        self.assertLess(time.monotonic() - started, 0.3)
+        self.assertEqual(cancelled, ["slow"])
+
+    async def test_best_answer_used_when_none_is_confident(self):
+        answer = await race("q", [
+            source("low", 0.01, 0.4),
+            source("better", 0.02, 0.6),
+            source("empty", 0.01, None),
+        ], threshold=0.7)
+        self.assertEqual(answer.source, "better")
+
+    async def test_each_source_has_its_own_deadline(self):
+        started = time.monotonic()
+        answer = await race("q", [
+            source("late", 1.0, 0.9, deadline=0.05),
+            source("ok", 0.02, 0.5),
+        ], threshold=0.7)
+        self.assertEqual(answer.source, "ok")
+        self.assertLess(time.monotonic() - started, 0.5)
+
+    async def test_backup_does_not_run_when_a_primary_answers(self):
+        started = []
+        answer = await race("q", [
+            source("local", 0.02, 0.4),
+            source("web", 0.01, 0.5, hedge=1.0, started=started),
+        ], threshold=0.7)
+        self.assertEqual(answer.source, "local")
+        self.assertEqual(started, [])
+
+    async def test_backup_starts_as_soon_as_the_primaries_miss(self):
+        started_at = time.monotonic()
+        answer = await race("q", [
+            source("local", 0.02, None),
+            source("web", 0.01, 0.5, hedge=1.0),
+        ], threshold=0.7)
+        self.assertEqual(answer.source, "web")
+        self.assertLess(time.monotonic() - started_at, 0.5)
+
+    async def test_hedged_backup_is_cancelled_by_a_confident_primary(self):
+        started, cancelled = [], []
+        answer = await race("q", [
+            source("slow_local", 0.2, 0.9),
+            source("web", 0.5, 0.5, hedge=0.05, started=started, log=cancelled),
+        ], threshold=0.7)
+        await asyncio.sleep(0.01)
+        self.assertEqual(answer.source, "slow_local")
+        self.assertEqual(started, ["web"])
+        self.assertEqual(cancelled, ["web"])
+
+    async def test_hedged_backup_only_used_when_primaries_find_nothing(self):
+        answer = await race("q", [
+            source("weak_local", 0.1, 0.4),
+            source("web", 0.01, 0.9, hedge=0.01),
+        ], threshold=0.7)
+        self.assertEqual(answer.source, "weak_local")
+
+        answer = await race("q", [
+            source("empty_local", 0.1, None),
+            source("web", 0.01, 0.9, hedge=0.01),
+        ], threshold=0.7)
+        self.assertEqual(answer.source, "web")
+
+    async def test_lms_answers_course_questions(self):
+        answer = await lms_lookup("who teaches ENT101?")
+        self.assertIn("Dr. Sarah Moyo", answer.text)
+        self.assertGreaterEqual(answer.confidence, 0.9)
+
+        answer = await lms_lookup("when is database systems held")
+        self.assertIn("ICT202", answer.text)
+        self.assertIsNone(await lms_lookup("where is the library"))
+
+
+if __name__ == "__main__":
+    unittest.main()
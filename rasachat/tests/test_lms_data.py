@@ -0,0 +1,76 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from actions.lms_data import DEFAULT_LMS_PATH, LMSData  # noqa: E402
+
+DATA = {
+    "students": {
+        "WUA100": {"name": "Rudo Moyo", "gpa": "3.50", "courses": ["ICT101"]},
+        "WUA101": {"name": "Rudo  Moyo", "gpa": "3.10", "courses": ["ICT101", "COM101"]},
+        "WUA102": {"name": "Tendai Banda", "gpa": "3.90", "courses": ["COM101"]},
+    },
+    "courses": {
+        "ICT101": {"name": "Introduction to Computing", "instructor": "Dr. Anna Marange"},
+        "COM101": {"name": "Communication Skills", "instructor": "Prof. Grace Banda"},
+    },
+    "grades": {"WUA102": {"COM101": {"grade": "A", "percentage": "91"}}},
+    "assignments": {},
+}
+
+
+class LMSDataTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "lms_data.json")
+        self.write(DATA)
+        self.lms = LMSData(self.path, check_interval=0)
+
+    def write(self, data, mtime=None):
+        with open(self.path, "w") as f:
+            json.dump(data, f)
+        if mtime is not None:
+            os.utime(self.path, (mtime, mtime))
+
+    def test_indexes(self):
+        lms = self.lms.snapshot()
+        self.assertEqual(lms.get_student("wua102")["name"], "Tendai Banda")
+        self.assertEqual(lms.find_student_ids("rudo moyo"), ("WUA100", "WUA101"))
+        self.assertEqual(lms.get_course("com 101")["name"], "Communication Skills")
+        self.assertEqual([c["code"] for c in lms.courses_for_instructor("grace banda")], ["COM101"])
+        self.assertEqual(lms.course_students("ICT101"), ("WUA100", "WUA101"))
+        self.assertEqual(lms.student_grades("WUA102")["COM101"]["grade"], "A")
+
+    def test_reloads_when_file_changes(self):
+        first = self.lms.snapshot()
+        self.assertIs(self.lms.snapshot(), first)
+
+        changed = json.loads(json.dumps(DATA))
+        changed["students"]["WUA103"] = {"name": "Nyasha Dube", "gpa": "3.20", "courses": []}
+        self.write(changed, mtime=first.mtime + 10)
+
+        second = self.lms.snapshot()
+        self.assertIsNot(second, first)
+        self.assertEqual(second.find_student_ids("Nyasha Dube"), ("WUA103",))
+        # Old snapshot is untouched
+        self.assertIsNone(first.get_student("WUA103"))
+
+    def test_broken_file_keeps_previous_snapshot(self):
+        first = self.lms.snapshot()
+        with open(self.path, "w") as f:
+            f.write("{not json")
+        os.utime(self.path, (first.mtime + 10, first.mtime + 10))
+        self.assertIs(self.lms.snapshot(), first)
+
+    def test_bundled_data_loads(self):
+        lms = LMSData(DEFAULT_LMS_PATH).snapshot()
+        self.assertEqual(lms.find_student_ids("Mary Chimbga"), ("WUA001",))
+
+
+if __name__ == "__main__":
+    unittest.main()
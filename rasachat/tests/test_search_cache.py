@@ -0,0 +1,108 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from actions import serpapi  # noqa: E402
+from actions.http_client import close_http_session  # noqa: E402
+from actions.search_cache import SearchCache, normalize_query  # noqa: E402
+
+
+class SerpAPIStandIn(BaseHTTPRequestHandler):
+    """Local stand-in for https://serpapi.com/search"""
+    hits = []
+    delay = 0.0
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)["q"][0]
+        SerpAPIStandIn.hits.append(query)
+        time.sleep(SerpAPIStandIn.delay)
+        if "broken" in query:
+            self.send_response(500)
+            self.end_headers()
+            return
+        body = json.dumps({"organic_results": [
+            {"title": f"Result {len(SerpAPIStandIn.hits)}", "snippet": query, "link": "https://wua.ac.zw"}
+        ]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class SearchCacheTests(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), SerpAPIStandIn)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}/search"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        SerpAPIStandIn.hits = []
+        SerpAPIStandIn.delay = 0.0
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache.sqlite3")
+        self.original = (serpapi.SERPAPI_URL, serpapi.search_cache)
+        serpapi.SERPAPI_URL = self.url
+        serpapi.search_cache = SearchCache(self.path)
+
+    async def asyncTearDown(self):
+        await close_http_session()
+
+    def tearDown(self):
+        serpapi.SERPAPI_URL, serpapi.search_cache = self.original
+        self.tmp.cleanup()
+
+    async def test_normalized_queries_share_one_upstream_call(self):
+        self.assertEqual(normalize_query("Library  hours?"), "site:wua.ac.zw library hours")
+        first = await serpapi.search_wua("Library hours?", "key")
+        second = await serpapi.search_wua("  library HOURS ", "key")
+        self.assertEqual(first, second)
+        self.assertEqual(SerpAPIStandIn.hits, ["site:wua.ac.zw library hours"])
+
+    async def test_results_persist_across_restarts(self):
+        await serpapi.search_wua("fees", "key")
+        serpapi.search_cache = SearchCache(self.path)
+        await serpapi.search_wua("fees", "key")
+        self.assertEqual(len(SerpAPIStandIn.hits), 1)
+
+    async def test_stale_result_served_while_slow_upstream_revalidates(self):
+        serpapi.search_cache = SearchCache(self.path, ttl=0, revalidate_wait=0.05)
+        stale = await serpapi.search_wua("admissions", "key")
+
+        SerpAPIStandIn.delay = 0.5
+        started = time.monotonic()
+        served = await serpapi.search_wua("admissions", "key")
+        self.assertLess(time.monotonic() - started, 0.4)
+        self.assertEqual(served, stale)
+
+        await asyncio.sleep(0.7)
+        entry = serpapi.search_cache.get(normalize_query("admissions"))
+        self.assertEqual(entry[0]["organic_results"][0]["title"], "Result 2")
+
+    async def test_errors_are_not_cached(self):
+        with self.assertRaises(serpapi.SerpAPIError):
+            await serpapi.search_wua("broken", "key")
+        self.assertIsNone(serpapi.search_cache.get(normalize_query("broken")))
+
+    async def test_concurrent_searches_do_not_block_each_other(self):
+        SerpAPIStandIn.delay = 0.3
+        started = time.monotonic()
+        await asyncio.gather(*(serpapi.search_wua(f"question {i}", "key") for i in range(5)))
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(len(SerpAPIStandIn.hits), 5)
@@ -0,0 +1,74 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from actions import actions  # noqa: E402
+from actions.session_cache import SessionCache, estimate_size  # noqa: E402
+
+
+class StubTracker:
+    def __init__(self, sender_id, text, student_name=None):
+        self.sender_id = sender_id
+        self.latest_message = {"text": text}
+        self.student_name = student_name
+
+    def get_slot(self, name):
+        return self.student_name
+
+
+class StubDispatcher:
+    def __init__(self):
+        self.messages = []
+
+    def utter_message(self, text=None, **kwargs):
+        self.messages.append(text)
+
+
+class SessionCacheTests(unittest.TestCase):
+    def test_ttl_expiry(self):
+        cache = SessionCache(ttl=10)
+        with mock.patch("actions.session_cache.time.monotonic", return_value=100.0):
+            cache.set("a", {"x": 1})
+        with mock.patch("actions.session_cache.time.monotonic", return_value=105.0):
+            self.assertEqual(cache.get("a"), {"x": 1})
+        with mock.patch("actions.session_cache.time.monotonic", return_value=111.0):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual((len(cache), cache.total_bytes), (0, 0))
+
+    def test_memory_cap_evicts_least_recently_used(self):
+        value = {"payload": "x" * 100}
+        cache = SessionCache(max_entries=10, max_bytes=estimate_size(value) * 2)
+        cache.set("a", value)
+        cache.set("b", value)
+        cache.get("a")
+        cache.set("c", value)
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertLessEqual(cache.total_bytes, cache.max_bytes)
+
+    def test_follow_up_turns_are_served_from_the_bundle(self):
+        bundles = SessionCache()
+        with mock.patch.object(actions, "student_bundles", bundles), \
+                mock.patch.object(actions, "build_student_bundle", wraps=actions.build_student_bundle) as build:
+            first = StubDispatcher()
+            actions.ActionGetStudentInfo().run(first, StubTracker("s1", "my gpa", "Mary Chimbga"), {})
+            follow_up = StubDispatcher()
+            actions.ActionGetStudentInfo().run(follow_up, StubTracker("s1", "and my assignments?"), {})
+            actions.ActionTimetableQuery().run(StubDispatcher(), StubTracker("s1", "what is my next class"), {})
+
+        self.assertEqual(build.call_count, 1)
+        self.assertIn("Overall GPA: 3.75", first.messages[0])
+        self.assertIn("Business Plan Project", follow_up.messages[0])
+
+        # Another conversation still has to authenticate
+        other = StubDispatcher()
+        with mock.patch.object(actions, "student_bundles", bundles):
+            actions.ActionGetStudentInfo().run(other, StubTracker("s2", "my gpa"), {})
+        self.assertIn("provide your full name", other.messages[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
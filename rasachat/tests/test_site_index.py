@@ -0,0 +1,55 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from actions.site_index import SiteIndex, build_from_directory, save_index  # noqa: E402
+
+PAGES = {
+    "library/index.html": (
+        "<html><head><title>WUA Library</title></head><body><nav>Home | About</nav>"
+        "<h1>Library</h1><p>The library is open Monday to Friday from 8am to 10pm. "
+        "Students can borrow up to five books.</p></body></html>"
+    ),
+    "admissions.html": (
+        "<html><head><title>Admissions</title>"
+        "<link rel='canonical' href='https://www.wua.ac.zw/admissions/'></head>"
+        "<body><p>Applicants need five O Levels including English. "
+        "Mature entry is available.</p></body></html>"
+    ),
+    "hostels.txt": "Student Accommodation\nHostels are available on the Mount Pleasant campus.",
+}
+
+
+class SiteIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        for name, content in PAGES.items():
+            path = os.path.join(self.tmp.name, "snapshot", name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(content)
+        self.index_path = os.path.join(self.tmp.name, "site_index.json.gz")
+        save_index(build_from_directory(os.path.join(self.tmp.name, "snapshot")), self.index_path)
+        self.index = SiteIndex(self.index_path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_search_returns_serpapi_shaped_results(self):
+        results = self.index.search("When is the library open?")
+        self.assertEqual(results[0]["title"], "WUA Library")
+        self.assertEqual(results[0]["link"], "https://www.wua.ac.zw/library")
+        self.assertIn("Monday to Friday", results[0]["snippet"])
+
+    def test_canonical_link_and_text_pages(self):
+        self.assertEqual(
+            self.index.search("O Levels entry")[0]["link"], "https://www.wua.ac.zw/admissions/"
+        )
+        self.assertEqual(self.index.search("hostels")[0]["title"], "Student Accommodation")
+
+    def test_no_recall_returns_empty(self):
+        self.assertEqual(self.index.search("quantum chromodynamics"), [])
+        self.assertEqual(SiteIndex(os.path.join(self.tmp.name, "missing.gz")).search("library"), [])
@@ -0,0 +1,79 @@
+import os
+import sys
+import unittest
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from actions.lms_data import LMSSnapshot  # noqa: E402
+from actions.timetable import (  # noqa: E402
+    MINUTES_PER_DAY, Timetable, parse_query_time, parse_schedule,
+)
+
+DATA = {
+    "students": {
+        "WUA100": {"name": "Rudo Moyo", "courses": ["ENT101", "COM101"]},
+    },
+    "courses": {
+        "ENT101": {
+            "name": "Introduction to Entrepreneurship", "schedule": "Mon 09:00-10:30, Wed 09:00-10:30",
+            "room": "Business Building Room 101", "instructor": "Dr. Sarah Moyo",
+        },
+        "COM101": {
+            "name": "Communication Skills", "schedule": "Wed 10:00-11:30, Fri 10:00-11:30",
+            "room": "ICT Lab 1", "instructor": "Prof. Grace Banda",
+        },
+    },
+}
+
+# A Wednesday
+WEDNESDAY = datetime(2024, 10, 9, 8, 0)
+
+
+def at(day, hour, minute=0):
+    return day * MINUTES_PER_DAY + hour * 60 + minute
+
+
+class TimetableTests(unittest.TestCase):
+    def setUp(self):
+        self.timetable = Timetable(LMSSnapshot(DATA))
+
+    def test_parse_schedule(self):
+        self.assertEqual(
+            parse_schedule("Mon 09:00-10:30, Wed 14:00-15:30"),
+            [(at(0, 9), at(0, 10, 30)), (at(2, 14), at(2, 15, 30))],
+        )
+
+    def test_parse_query_time(self):
+        self.assertEqual(parse_query_time("what class now", WEDNESDAY), at(2, 8))
+        self.assertEqual(parse_query_time("is room 101 free at 2pm", WEDNESDAY), at(2, 14))
+        self.assertEqual(parse_query_time("on friday at 10:15", WEDNESDAY), at(4, 10, 15))
+        self.assertEqual(parse_query_time("tomorrow", WEDNESDAY), at(3, 0))
+
+    def test_student_now_and_next_finds_clashes(self):
+        current, upcoming = self.timetable.student_now_and_next("WUA100", at(2, 10, 15))
+        self.assertEqual([s.code for s in current], ["ENT101", "COM101"])
+        self.assertEqual((upcoming.code, upcoming.start), ("COM101", at(4, 10)))
+
+    def test_next_wraps_into_next_week(self):
+        current, upcoming = self.timetable.student_now_and_next("WUA100", at(5, 12))
+        self.assertEqual(current, [])
+        self.assertEqual((upcoming.code, upcoming.start), ("ENT101", at(0, 9)))
+
+    def test_room_aliases_and_status(self):
+        self.assertEqual(self.timetable.find_rooms("Room 101"), ["business building room 101"])
+        self.assertEqual(self.timetable.find_rooms("ict lab 1"), ["ict lab 1"])
+        busy, _ = self.timetable.room_status("ict lab 1", at(4, 11))
+        free, upcoming = self.timetable.room_status("ict lab 1", at(4, 12))
+        self.assertEqual([s.code for s in busy], ["COM101"])
+        self.assertEqual(free, [])
+        self.assertEqual(upcoming.start, at(2, 10))
+
+    def test_instructor_by_surname(self):
+        self.assertEqual(self.timetable.find_instructors("Dr. Moyo"), ["sarah moyo"])
+        sessions = self.timetable.instructor_sessions("sarah moyo")
+        self.assertEqual([s.start for s in sessions], [at(0, 9), at(2, 9)])
+
+
+if __name__ == "__main__":
+    unittest.main()
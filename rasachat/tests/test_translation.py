@@ -0,0 +1,71 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from actions import translation  # noqa: E402
+from actions.translation import TranslationCache, detect_language  # noqa: E402
+
+
+class StubResult:
+    def __init__(self, src, text):
+        self.src = src
+        self.text = text
+
+
+class StubTranslator:
+    """Counts remote calls instead of making them"""
+
+    def __init__(self):
+        self.calls = []
+
+    def translate(self, text, dest="en", src="auto"):
+        self.calls.append((text, src, dest))
+        return StubResult("sn" if src == "auto" else src, f"<{dest}> {text}")
+
+
+class TranslationTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.stub = StubTranslator()
+        patches = [
+            mock.patch.object(translation, "translator", self.stub),
+            mock.patch.object(translation, "translation_cache", TranslationCache(max_entries=8)),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_detect_language(self):
+        self.assertEqual(detect_language("What are the fees for this course?"), "en")
+        self.assertEqual(detect_language("Mhoro, ndinoda kuziva nezve makosi"), "sn")
+        self.assertEqual(detect_language(""), "en")
+        self.assertEqual(detect_language("Is the form here?"), "en")
+        self.assertIsNone(detect_language("Bonjour"))
+
+    async def test_english_needs_no_remote_call(self):
+        self.assertEqual(
+            await translation.translate_to_english("Where is the library?"),
+            ("en", "Where is the library?"),
+        )
+        self.assertEqual(self.stub.calls, [])
+
+    async def test_one_remote_call_then_cached(self):
+        message = "Mhoro, ndinoda kuziva nezve makosi"
+        first = await translation.translate_to_english(message)
+        second = await translation.translate_to_english(message)
+
+        self.assertEqual(first, ("sn", f"<en> {message}"))
+        self.assertEqual(second, first)
+        self.assertEqual(self.stub.calls, [(message, "sn", "en")])
+
+    async def test_static_strings_are_translated_once(self):
+        for _ in range(3):
+            text = await translation.translate_static("You said: ", "fr")
+        self.assertEqual(text, "<fr> You said: ")
+        self.assertEqual(len(self.stub.calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -135,8 +135,98 @@ DEFAULT_LANGUAGE = 'en'
 # Google Translate settings
 GOOGLE_TRANSLATE_ENABLED = True
 
+# Every googletrans call gets a hard deadline. Once enough latencies are
+# recorded, a call still running after the observed p95 is hedged with a
+# second attempt. On timeout the reply is sent untranslated and flagged
+# with "translation_degraded" in the chat response.
+TRANSLATOR_TIMEOUT_SECONDS = 3.0
+TRANSLATOR_HEDGING_ENABLED = True
+TRANSLATOR_HEDGE_MIN_SAMPLES = 20
+TRANSLATOR_MAX_WORKERS = 8
+
+# Long replies are translated paragraph by paragraph: paragraphs are merged up
+# to TRANSLATOR_CHUNK_MAX_CHARS, translated concurrently on
+# TRANSLATOR_CHUNK_WORKERS threads and cached per chunk in the default cache.
+TRANSLATOR_CHUNK_MAX_CHARS = 600
+TRANSLATOR_CHUNK_WORKERS = 4
+TRANSLATION_CHUNK_CACHE_TTL = 24 * 60 * 60
+
+# Fleet-wide googletrans rate limit (chat/rate_limiter.py): a token bucket in a
+# SQLite file shared by every worker process on the host. Calls wait up to
+# TRANSLATOR_RATE_LIMIT_MAX_QUEUE_SECONDS for a token, then degrade. Check
+# saturation with `python manage.py translation_quota`.
+TRANSLATOR_RATE_LIMIT_ENABLED = True
+TRANSLATOR_RATE_LIMIT_PER_SECOND = 5.0
+TRANSLATOR_RATE_LIMIT_BURST = 10
+TRANSLATOR_RATE_LIMIT_MAX_QUEUE_SECONDS = 1.0
+TRANSLATOR_RATE_LIMIT_PATH = BASE_DIR / 'translator_quota.sqlite3'
+
+# Pre-translated static bot strings, built with `python manage.py build_translation_catalog`
+# (human corrections go in chat/catalog/overrides.json)
+TRANSLATION_CATALOG_PATH = BASE_DIR / 'chat' / 'catalog' / 'catalog.json'
+
 # Rasa server configuration
 RASA_SERVER_URL = 'http://localhost:5005/webhooks/rest/webhook'
+RASA_TIMEOUT_SECONDS = 10
+
+# End-to-end budget for one chat request (chat/deadline.py). Detection,
+# translation and the Rasa call share it; reply translation is skipped and
+# unanswered-question logging deferred when less than
+# CHAT_OPTIONAL_STAGE_MIN_SECONDS is left.
+CHAT_REQUEST_DEADLINE_SECONDS = 8.0
+CHAT_OPTIONAL_STAGE_MIN_SECONDS = 1.0
+CHAT_RASA_MIN_SECONDS = 0.5
+CHAT_DEFERRED_TASKS_ASYNC = True
+
+# Longest message answered. Longer ones are still screened for mental-health
+# concerns, over at most MENTAL_HEALTH_SCAN_MAX_CHARS in overlapping windows of
+# MENTAL_HEALTH_SCAN_WINDOW_TOKENS, and otherwise rejected with 413.
+CHAT_MAX_MESSAGE_CHARS = 2000
+MENTAL_HEALTH_SCAN_MAX_CHARS = 20000
+MENTAL_HEALTH_SCAN_WINDOW_TOKENS = 200
+
+# Identical messages arriving together (same normalized text and language) share
+# one translation, FAQ lookup and, for these intents, one Rasa call
+# (chat/singleflight.py). Only intents whose reply never depends on the
+# conversation belong here; the in-process classifier decides, with
+# INTENT_CLASSIFIER_THRESHOLD.
+CHAT_SINGLEFLIGHT_ENABLED = True
+CHAT_SINGLEFLIGHT_RASA_INTENTS = [
+    'ask_about_wua', 'ask_admission', 'ask_fees_payment', 'ask_contact_info',
+    'ask_faculties', 'ask_general_wua',
+]
+
+# In-process intent classifier (train with `python manage.py train_intent_classifier`).
+# Confident predictions for these intents are answered without calling Rasa.
+INTENT_CLASSIFIER_ENABLED = True
+INTENT_CLASSIFIER_PATH = BASE_DIR / 'intent_classifier.npz'
+INTENT_CLASSIFIER_INTENTS = ['greet', 'thank_you', 'goodbye']
+INTENT_CLASSIFIER_THRESHOLD = 0.85
+INTENT_CLASSIFIER_MAX_WORDS = 6
+
+# Conversation changelist summary statistics are cached for this many seconds
+# (use the "refresh-summary/" admin URL to rebuild them on demand). Crisis
+# alert counts are never cached.
+ADMIN_SUMMARY_CACHE_TTL = 60
+
+# Misspelling-tolerant mental-health screening (chat/fuzzy_keywords.py).
+# Maximum edit distance per concern level; the index of keywords and DB
+# triggers is rebuilt on trigger changes and at least every TTL seconds.
+MENTAL_HEALTH_FUZZY_MATCHING = True
+MENTAL_HEALTH_FUZZY_MAX_DISTANCE = {'crisis': 2, 'high': 1, 'moderate': 1, 'low': 0}
+MENTAL_HEALTH_FUZZY_INDEX_TTL = 60
+
+# Crisis alert dispatch (chat/crisis_dispatch.py)
+CRISIS_DISPATCH_ASYNC = True
+CRISIS_DISPATCH_MAX_ATTEMPTS = 3
+CRISIS_DISPATCH_RETRY_SECONDS = 2.0  # before the 2nd attempt; doubled for each later one
+CRISIS_ALERT_NOTIFIERS = [
+    'chat.crisis_dispatch.EmailCrisisNotifier',
+]
+CRISIS_ALERT_RECIPIENTS = []  # e.g. ['counseling@wua.ac.zw']
+CRISIS_DELIVERY_SLO_SECONDS = 30
+CRISIS_ACK_SLO_SECONDS = 15 * 60
+CRISIS_STREAM_HEARTBEAT_SECONDS = 15
 
 # Logging configuration
 LOGGING = {